@@ -0,0 +1,246 @@
+"""
+Vectorized historical backtesting of the ML/technical signal rules.
+
+rule_signals() evaluates analyze_bollinger_signals, analyze_macd_signals,
+analyze_stochastic_signals and analyze_volume_signals at every bar at once,
+combine_signals() applies calculate_overall_signal to every bar, and
+simulate() turns the resulting BUY/SELL/HOLD series into positions, returns,
+drawdown and hit rates. Bar i only sees data up to and including bar i, so
+the series equals replaying generate_ml_trading_signals on every prefix
+(with the ML predictions supplied separately).
+"""
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from data.series import OHLCV, OHLCVLike
+from . import indicator_core as core
+from .ml_indicators import SIGNAL_WEIGHTS, SIGNAL_THRESHOLD, ML_SIGNAL_THRESHOLD
+
+BUY, HOLD, SELL = 1, 0, -1
+SIGNAL_NAMES = {BUY: 'BUY', HOLD: 'HOLD', SELL: 'SELL'}
+
+# generate_ml_trading_signals returns HOLD below this many candles
+MIN_HISTORY = 20
+
+RuleSignal = Tuple[np.ndarray, np.ndarray]  # (direction, strength) per bar
+
+
+def _rule(conditions, directions, strengths, n: int) -> RuleSignal:
+    """First matching condition wins; bars matching none are HOLD with strength 0."""
+    direction = np.select(conditions, [np.full(n, d) for d in directions], HOLD).astype(np.int8)
+    strength = np.select(conditions, [np.full(n, s) for s in strengths], 0.0)
+    return direction, strength
+
+
+def _previous(values: np.ndarray) -> np.ndarray:
+    return np.concatenate([[np.nan], values[:-1]])
+
+
+def bollinger_rule(closes: np.ndarray, window: int = 20, std_dev: float = 2) -> RuleSignal:
+    """analyze_bollinger_signals at every bar."""
+    upper, middle, lower = core.bollinger(closes, window, std_dev)
+    n = len(closes)
+    valid = ~np.isnan(middle) & (np.arange(n) >= 1)
+    return _rule(
+        [valid & (closes <= lower), valid & (closes >= upper), valid],
+        [BUY, SELL, HOLD], [0.8, 0.8, 0.3], n)
+
+
+def macd_rule(closes: np.ndarray, fast_period: int = 12, slow_period: int = 26,
+              signal_period: int = 9) -> RuleSignal:
+    """analyze_macd_signals at every bar."""
+    line, signal, _ = core.macd(closes, fast_period, slow_period, signal_period)
+    prev_line, prev_signal = _previous(line), _previous(signal)
+    n = len(closes)
+    valid = ~(np.isnan(line) | np.isnan(signal) | np.isnan(prev_line) | np.isnan(prev_signal))
+    return _rule(
+        [valid & (prev_line <= prev_signal) & (line > signal),
+         valid & (prev_line >= prev_signal) & (line < signal),
+         valid],
+        [BUY, SELL, HOLD], [0.7, 0.7, 0.4], n)
+
+
+def stochastic_rule(ohlcv: OHLCV, k_period: int = 14, d_period: int = 3) -> RuleSignal:
+    """analyze_stochastic_signals at every bar."""
+    k, d = core.stochastic(ohlcv.high, ohlcv.low, ohlcv.close, k_period, d_period)
+    n = len(ohlcv)
+    valid = ~(np.isnan(k) | np.isnan(d)) & (np.arange(n) >= 1)
+    return _rule(
+        [valid & (k < 20) & (d < 20), valid & (k > 80) & (d > 80), valid],
+        [BUY, SELL, HOLD], [0.6, 0.6, 0.2], n)
+
+
+def volume_rule(ohlcv: OHLCV) -> RuleSignal:
+    """analyze_volume_signals (with volume_indicators' trend) at every bar."""
+    closes, volumes = ohlcv.close, ohlcv.volume
+    n = len(ohlcv)
+    # Prefix sums give sum(volumes[-5:]) and sum(volumes[-10:-5]) for every prefix
+    csum = np.concatenate([[0.0], np.cumsum(volumes)])
+    length = np.arange(1, n + 1)
+    recent = csum[length] - csum[np.maximum(length - 5, 0)]
+    previous = csum[np.maximum(length - 5, 0)] - csum[np.maximum(length - 10, 0)]
+    volume_up = recent > previous
+    enough = length >= 5
+    price_up = np.zeros(n, dtype=bool)
+    price_up[4:] = closes[4:] > closes[:-4]
+    direction, strength = _rule(
+        [enough & price_up & volume_up, enough & ~price_up & volume_up, enough],
+        [BUY, SELL, HOLD], [0.5, 0.5, 0.2], n)
+    strength[~enough] = 0.1  # 'Insufficient price data for volume analysis'
+    return direction, strength
+
+
+def rule_signals(ohlc_data: OHLCVLike, bb_window: int = 20, bb_std: float = 2,
+                 macd_periods: Tuple[int, int, int] = (12, 26, 9), k_period: int = 14,
+                 d_period: int = 3) -> Dict[str, RuleSignal]:
+    """
+    Evaluate every technical rule over the whole history.
+    :return: Dict of signal type -> (direction int8 array, strength float array)
+    """
+    ohlcv = OHLCV.coerce(ohlc_data)
+    return {
+        'bollinger_bands': bollinger_rule(ohlcv.close, bb_window, bb_std),
+        'macd': macd_rule(ohlcv.close, *macd_periods),
+        'stochastic': stochastic_rule(ohlcv, k_period, d_period),
+        'volume': volume_rule(ohlcv),
+    }
+
+
+def combine_signals(rules: Dict[str, RuleSignal], ml_predictions: Optional[np.ndarray] = None,
+                    weights: Optional[Dict[str, float]] = None, threshold: float = SIGNAL_THRESHOLD,
+                    ml_threshold: float = ML_SIGNAL_THRESHOLD) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    calculate_overall_signal at every bar.
+    :param rules: Output of rule_signals()
+    :param ml_predictions: Ensemble predicted price change per bar (NaN/None = no prediction)
+    :return: (recommendation int8 array of BUY/HOLD/SELL, confidence float array)
+    """
+    weights = SIGNAL_WEIGHTS if weights is None else weights
+    n = len(next(iter(rules.values()))[0])
+    buy = np.zeros(n)
+    sell = np.zeros(n)
+    total_weight = 0.0
+    for signal_type, weight in weights.items():
+        if signal_type == 'ml_prediction':
+            # An empty prediction counts as 0, so the ML weight is always included
+            if ml_predictions is not None:
+                pred = np.nan_to_num(np.asarray(ml_predictions, dtype=np.float64))
+                buy += np.where(pred > ml_threshold, weight * np.abs(pred) * 50, 0.0)
+                sell += np.where(pred < -ml_threshold, weight * np.abs(pred) * 50, 0.0)
+            total_weight += weight
+        elif signal_type in rules:
+            direction, strength = rules[signal_type]
+            buy += np.where(direction == BUY, weight * strength, 0.0)
+            sell += np.where(direction == SELL, weight * strength, 0.0)
+            total_weight += weight
+
+    if total_weight <= 0:
+        return np.zeros(n, dtype=np.int8), np.zeros(n)
+    buy /= total_weight
+    sell /= total_weight
+    recommendation = np.select(
+        [(buy > sell) & (buy > threshold), (sell > buy) & (sell > threshold)], [BUY, SELL], HOLD
+    ).astype(np.int8)
+    confidence = np.maximum(buy, sell)
+    confidence = np.where(recommendation == HOLD, np.minimum(confidence, 0.3), confidence)
+    confidence = np.minimum(confidence, 1.0)
+
+    recommendation[:MIN_HISTORY - 1] = HOLD
+    confidence[:MIN_HISTORY - 1] = 0.0
+    return recommendation, confidence
+
+
+def simulate(closes: np.ndarray, recommendation: np.ndarray, allow_short: bool = False,
+             fee: float = 0.0) -> Dict[str, Any]:
+    """
+    Trade a BUY/HOLD/SELL series at each bar's close: BUY goes long, SELL goes
+    flat (or short with allow_short), HOLD keeps the current position.
+    :param fee: Proportional cost per unit of position change
+    :return: Dict with positions, per-bar strategy returns, equity curve and metrics
+    """
+    closes = core.as_array(closes)
+    n = len(closes)
+    sell_position = -1.0 if allow_short else 0.0
+    target = np.where(recommendation == BUY, 1.0, np.where(recommendation == SELL, sell_position, np.nan))
+    # Forward-fill the last non-HOLD target
+    last = np.where(~np.isnan(target), np.arange(n), -1)
+    np.maximum.accumulate(last, out=last)
+    positions = np.where(last >= 0, target[np.maximum(last, 0)], 0.0)
+
+    bar_returns = np.zeros(n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bar_returns[1:] = np.where(closes[:-1] != 0, closes[1:] / closes[:-1] - 1, 0.0)
+    held = np.concatenate([[0.0], positions[:-1]])  # position decided at bar i earns bar i+1
+    turnover = np.abs(np.diff(np.concatenate([[0.0], positions])))
+    strategy_returns = held * bar_returns - fee * turnover
+    equity = np.cumprod(1 + strategy_returns)
+    drawdown = equity / np.maximum.accumulate(equity) - 1 if n else equity
+
+    return {
+        'positions': positions,
+        'returns': strategy_returns,
+        'equity': equity,
+        'metrics': _metrics(closes, recommendation, positions, held, bar_returns, strategy_returns, equity, drawdown),
+    }
+
+
+def _metrics(closes, recommendation, positions, held, bar_returns, strategy_returns, equity, drawdown) -> Dict[str, Any]:
+    n = len(closes)
+    if n == 0:
+        return {'total_return': 0.0, 'buy_and_hold_return': 0.0, 'max_drawdown': 0.0, 'n_trades': 0,
+                'trade_hit_rate': None, 'signal_hit_rate': None, 'exposure': 0.0, 'n_signals': 0}
+
+    # Trades are maximal runs of the same non-zero held position
+    in_market = held != 0
+    run_start = in_market & np.concatenate([[True], held[1:] != held[:-1]])
+    trade_id = np.cumsum(run_start) - 1
+    n_trades = int(run_start.sum())
+    trade_hit_rate = None
+    if n_trades:
+        log_growth = np.log1p(np.maximum(strategy_returns, -1 + 1e-12))
+        trade_growth = np.bincount(trade_id[in_market], weights=log_growth[in_market], minlength=n_trades)
+        trade_hit_rate = float((trade_growth > 0).mean())
+
+    # A BUY/SELL signal is a hit when the next bar moves its way
+    signalled = (recommendation[:-1] != HOLD)
+    signal_hit_rate = None
+    if signalled.any():
+        agree = np.sign(bar_returns[1:]) == recommendation[:-1]
+        signal_hit_rate = float(agree[signalled].mean())
+
+    return {
+        'total_return': float(equity[-1] - 1),
+        'buy_and_hold_return': float(closes[-1] / closes[0] - 1) if closes[0] != 0 else 0.0,
+        'max_drawdown': float(drawdown.min()),
+        'n_trades': n_trades,
+        'trade_hit_rate': trade_hit_rate,
+        'signal_hit_rate': signal_hit_rate,
+        'exposure': float(in_market.mean()),
+        'n_signals': int(signalled.sum()),
+    }
+
+
+def backtest_signals(ohlc_data: OHLCVLike, ml_predictions: Optional[np.ndarray] = None,
+                     weights: Optional[Dict[str, float]] = None, threshold: float = SIGNAL_THRESHOLD,
+                     ml_threshold: float = ML_SIGNAL_THRESHOLD, bb_window: int = 20, bb_std: float = 2,
+                     macd_periods: Tuple[int, int, int] = (12, 26, 9), k_period: int = 14, d_period: int = 3,
+                     allow_short: bool = False, fee: float = 0.0) -> Dict[str, Any]:
+    """
+    Backtest the overall BUY/SELL/HOLD signal over an OHLCV history.
+
+    :param ohlc_data: OHLCV series (or list of (timestamp, open, high, low, close, volume) tuples)
+    :param ml_predictions: Optional ensemble prediction per bar (e.g. from OnlinePredictor)
+    :param weights: Signal weights (defaults to SIGNAL_WEIGHTS)
+    :param threshold: Weighted score needed for BUY/SELL
+    :param ml_threshold: Predicted change for the ML signal to count
+    :return: Dict with recommendation/confidence series, positions, returns, equity and metrics
+    """
+    ohlcv = OHLCV.coerce(ohlc_data)
+    rules = rule_signals(ohlcv, bb_window, bb_std, macd_periods, k_period, d_period)
+    recommendation, confidence = combine_signals(rules, ml_predictions, weights, threshold, ml_threshold)
+    result = simulate(ohlcv.close, recommendation, allow_short=allow_short, fee=fee)
+    result['recommendation'] = recommendation
+    result['confidence'] = confidence
+    result['timestamps'] = ohlcv.timestamps
+    return result
@@ -0,0 +1,157 @@
+"""
+Batch signal generation for many coins and timeframes.
+
+Fetching is I/O bound and runs on a thread pool; each series is handed to a
+process pool for the CPU-bound indicator and ML work as soon as it arrives,
+so analysis of early coins overlaps with fetching the rest.
+"""
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Sequence
+
+from data.fetch_prices import SUPPORTED_COINS, get_ohlcv_for_timeframe
+from data.rate_limiter import PRIORITY_PREFETCH, request_priority
+from data.series import OHLCV
+from .insights import get_trading_insights
+from .ml_indicators import generate_ml_trading_signals
+
+DEFAULT_FETCH_WORKERS = 8
+
+# Timeframe used for ML signals in the single-coin UI path
+DEFAULT_TIMEFRAMES = ("7d",)
+
+
+def _analyze_series(coin_id: str, timeframe: str, ohlcv: OHLCV, include_ml: bool) -> Dict[str, Any]:
+    """CPU-bound part of the pipeline; runs in a worker process."""
+    start = time.perf_counter()
+    prices = ohlcv.close.tolist()
+    # Worker processes are short-lived, so indicators are computed over the whole series
+    insights = get_trading_insights(prices, ohlcv)
+    # The OHLCV series is re-attached by the caller rather than pickled back
+    insights.pop('ohlcv_array', None)
+    result = {
+        'coin_id': coin_id,
+        'timeframe': timeframe,
+        'data_points': len(ohlcv),
+        'last_price': prices[-1] if prices else None,
+        'insights': insights,
+    }
+    if include_ml:
+        # One process per series already; train serially inside it
+        ml_signals = generate_ml_trading_signals(ohlcv, n_jobs=1, coin_id=coin_id, timeframe=timeframe)
+        result['ml_signals'] = ml_signals
+        result['recommendation'] = ml_signals.get('recommendation', 'HOLD')
+        result['confidence'] = ml_signals.get('confidence', 0)
+    result['analysis_seconds'] = time.perf_counter() - start
+    return result
+
+
+def _fetch_ohlcv(timeframe: str, coin_id: str) -> Optional[OHLCV]:
+    # Screens run in the background; let requests for the chart on screen go first
+    with request_priority(PRIORITY_PREFETCH):
+        return get_ohlcv_for_timeframe(timeframe, coin_id)
+
+
+def batch_trading_signals(coin_ids: Optional[Sequence[str]] = None, timeframes: Sequence[str] = DEFAULT_TIMEFRAMES,
+                          include_ml: bool = True, fetch_workers: int = DEFAULT_FETCH_WORKERS,
+                          cpu_workers: Optional[int] = None, executor: Optional[Executor] = None) -> Dict[str, Any]:
+    """
+    Fetch and analyze every (coin, timeframe) pair concurrently.
+
+    :param coin_ids: CoinGecko coin ids; defaults to SUPPORTED_COINS
+    :param timeframes: Timeframes to analyze per coin ('1h', '24h', '7d', '30d')
+    :param include_ml: Also run generate_ml_trading_signals (the expensive part)
+    :param fetch_workers: Threads used for fetching
+    :param cpu_workers: Analysis processes (-1 or None for all cores, 1 to analyze in-process)
+    :param executor: Existing executor to reuse for analysis instead of creating a process pool
+    :return: Dict with 'results' (coin -> timeframe -> result), 'errors' (coin -> timeframe -> message)
+             and 'timings'
+    """
+    coin_ids = list(SUPPORTED_COINS if coin_ids is None else coin_ids)
+    pairs = [(coin_id, timeframe) for coin_id in coin_ids for timeframe in timeframes]
+    results: Dict[str, Dict[str, Any]] = {coin_id: {} for coin_id in coin_ids}
+    errors: Dict[str, Dict[str, str]] = {}
+    wall_start = time.perf_counter()
+
+    if cpu_workers is None or cpu_workers == -1:
+        cpu_workers = os.cpu_count() or 1
+    own_executor = executor is None and cpu_workers > 1
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=min(cpu_workers, max(1, len(pairs))))
+
+    def record_error(coin_id: str, timeframe: str, message: str):
+        print(f"Batch analysis failed for {coin_id} ({timeframe}): {message}")
+        errors.setdefault(coin_id, {})[timeframe] = message
+
+    fetched: Dict[Any, OHLCV] = {}
+    analyses = {}
+    fetch_start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(fetch_workers, len(pairs)))) as fetch_pool:
+            fetches = {fetch_pool.submit(_fetch_ohlcv, timeframe, coin_id): (coin_id, timeframe)
+                       for coin_id, timeframe in pairs}
+            for future in as_completed(fetches):
+                coin_id, timeframe = fetches[future]
+                try:
+                    ohlcv = future.result()
+                except Exception as e:
+                    record_error(coin_id, timeframe, f"fetch failed: {e}")
+                    continue
+                if not ohlcv:
+                    record_error(coin_id, timeframe, "no OHLCV data")
+                    continue
+                fetched[(coin_id, timeframe)] = ohlcv
+                if executor is not None:
+                    # Start analysis while the remaining fetches are in flight
+                    analyses[(coin_id, timeframe)] = executor.submit(
+                        _analyze_series, coin_id, timeframe, ohlcv, include_ml)
+        fetch_seconds = time.perf_counter() - fetch_start
+
+        for coin_id, timeframe in pairs:
+            key = (coin_id, timeframe)
+            if key not in fetched:
+                continue
+            try:
+                if executor is not None:
+                    result = analyses[key].result()
+                else:
+                    result = _analyze_series(coin_id, timeframe, fetched[key], include_ml)
+            except Exception as e:
+                record_error(coin_id, timeframe, f"analysis failed: {e}")
+                continue
+            result['insights']['ohlcv_array'] = fetched[key]
+            results[coin_id][timeframe] = result
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    return {
+        'results': results,
+        'errors': errors,
+        'timings': {
+            'fetch_seconds': fetch_seconds,
+            'wall_seconds': time.perf_counter() - wall_start,
+        },
+    }
+
+
+def rank_by_signal(batch: Dict[str, Any], timeframe: str = DEFAULT_TIMEFRAMES[0]) -> List[Dict[str, Any]]:
+    """
+    Flatten a batch_trading_signals result into a screen, strongest signals first.
+    BUY/SELL rows come before HOLD, each ordered by confidence.
+    :return: List of {'coin_id', 'recommendation', 'confidence', 'last_price'} dicts
+    """
+    rows = []
+    for coin_id, by_timeframe in batch['results'].items():
+        result = by_timeframe.get(timeframe)
+        if result is None:
+            continue
+        rows.append({
+            'coin_id': coin_id,
+            'recommendation': result.get('recommendation', 'HOLD'),
+            'confidence': result.get('confidence', 0),
+            'last_price': result.get('last_price'),
+        })
+    rows.sort(key=lambda r: (r['recommendation'] == 'HOLD', -r['confidence']))
+    return rows
@@ -1,6 +1,7 @@
 from typing import Dict, Any, List, Tuple, Optional
 from .ml_indicators import generate_ml_trading_signals
 from .indicators import moving_average, relative_strength_index
+from .streaming import latest_indicators
 from data.fetch_prices import get_ohlcv_for_timeframe
 
 
@@ -23,19 +24,26 @@ def get_enhanced_trading_insights(coin_id: str = "bitcoin", timeframe: str = "7d
                 'data_available': False
             }
         
-        # Extract price data for backward compatibility
-        prices = [candle[4] for candle in ohlcv_data]  # close prices
+        # Close prices as a zero-copy column view
+        prices = ohlcv_data.close
         
         # Calculate traditional indicators for comparison
-        high_price = max(prices) if prices else 0
-        low_price = min(prices) if prices else 0
+        high_price = float(prices.max()) if len(prices) else 0
+        low_price = float(prices.min()) if len(prices) else 0
         
-        # RSI and MA calculations
-        rsi_values = relative_strength_index(prices, period=14)
-        ma_values = moving_average(prices, 14)
+        # RSI and MA calculations, advanced incrementally from the previous refresh
+        if len(ohlcv_data) >= 2:
+            current = latest_indicators((coin_id, timeframe), ohlcv_data, 14)['current']
+            rsi_current, ma_current = current['rsi_value'], current['ma_value']
+        else:
+            rsi_values = relative_strength_index(prices, period=14)
+            ma_values = moving_average(prices, 14)
+            rsi_current = rsi_values[-1] if rsi_values and rsi_values[-1] is not None else None
+            ma_current = ma_values[-1] if ma_values and ma_values[-1] is not None else None
         
-        rsi_current = rsi_values[-1] if rsi_values and rsi_values[-1] is not None else None
-        ma_current = ma_values[-1] if ma_values and ma_values[-1] is not None else None
+        # ML signals; the models learn only the candles closed since the previous refresh
+        ml_signals = generate_ml_trading_signals(ohlcv_data, coin_id=coin_id, timeframe=timeframe, incremental=True)
+        ml_analysis = ml_signals.get('ml_analysis', {})
         
         # Compile enhanced raw insights
         enhanced_insights = {
@@ -48,6 +56,12 @@ def get_enhanced_trading_insights(coin_id: str = "bitcoin", timeframe: str = "7d
             'low': low_price,
             'rsi_value': rsi_current,
             'ma_value': ma_current,
+            'ml_prediction': ml_analysis.get('predictions', {}).get('ensemble'),
+            'ml_recommendation': ml_signals.get('recommendation', 'HOLD'),
+            'ml_confidence': ml_signals.get('confidence', 0),
+            'ml_signals': ml_signals.get('signals', {}),
+            'ml_analysis': ml_analysis,
+            'technical_summary': ml_signals.get('technical_summary', ''),
             'ohlcv_array': ohlcv_data
         }
         
@@ -0,0 +1,213 @@
+"""
+Array-based indicator core.
+
+Every function here takes 1-D array-likes and returns float64 ndarrays of the
+same length, with NaN wherever the indicator is not yet defined. The list-based
+functions in indicators.py and ml_indicators.py are thin wrappers around these.
+"""
+import numpy as np
+from typing import List, Optional
+
+# Upper bound on temporary elements allocated per chunk by windowed reductions
+_CHUNK_ELEMENTS = 1 << 20
+
+
+def as_array(values) -> np.ndarray:
+    """Return values as a contiguous float64 ndarray (no copy if already one)."""
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def to_list(values: np.ndarray) -> List[Optional[float]]:
+    """Convert an indicator array to a list, mapping NaN to None."""
+    return [None if v != v else v for v in values.tolist()]
+
+
+def rolling_sum(values, window: int) -> np.ndarray:
+    """
+    Trailing rolling sum using a cumulative sum.
+    :param values: 1-D array-like
+    :param window: Window size (int)
+    :return: Array where out[i] = sum(values[i-window+1:i+1]), NaN for i < window-1
+    """
+    x = as_array(values)
+    out = np.full(x.shape[0], np.nan)
+    if window <= 0 or x.shape[0] < window:
+        return out
+    csum = np.cumsum(x)
+    out[window - 1] = csum[window - 1]
+    out[window:] = csum[window:] - csum[:-window]
+    return out
+
+
+def sma(values, window: int) -> np.ndarray:
+    """Simple moving average over a trailing window (NaN for i < window-1)."""
+    return rolling_sum(values, window) / window
+
+
+def rolling_std(values, window: int) -> np.ndarray:
+    """
+    Population standard deviation over a trailing window (matches np.std).
+    Computed on a strided window view in chunks, which keeps it exact for flat
+    windows where a sum-of-squares formula would cancel catastrophically.
+    """
+    x = as_array(values)
+    out = np.full(x.shape[0], np.nan)
+    if window <= 0 or x.shape[0] < window:
+        return out
+    windows = np.lib.stride_tricks.sliding_window_view(x, window)
+    step = max(1, _CHUNK_ELEMENTS // window)
+    for start in range(0, windows.shape[0], step):
+        chunk = windows[start:start + step]
+        out[window - 1 + start:window - 1 + start + chunk.shape[0]] = chunk.std(axis=1)
+    return out
+
+
+def rolling_max(values, window: int) -> np.ndarray:
+    """Trailing rolling maximum (NaN for i < window-1)."""
+    x = as_array(values)
+    out = np.full(x.shape[0], np.nan)
+    if window <= 0 or x.shape[0] < window:
+        return out
+    out[window - 1:] = np.lib.stride_tricks.sliding_window_view(x, window).max(axis=1)
+    return out
+
+
+def rolling_min(values, window: int) -> np.ndarray:
+    """Trailing rolling minimum (NaN for i < window-1)."""
+    x = as_array(values)
+    out = np.full(x.shape[0], np.nan)
+    if window <= 0 or x.shape[0] < window:
+        return out
+    out[window - 1:] = np.lib.stride_tricks.sliding_window_view(x, window).min(axis=1)
+    return out
+
+
+def ema(values, window: int) -> np.ndarray:
+    """
+    Exponential moving average seeded with the SMA of the first window.
+    :param values: 1-D array-like
+    :param window: Window size (int)
+    :return: Array of EMA values, NaN for i < window-1
+    """
+    x = as_array(values)
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    if window <= 0 or n < window:
+        return out
+    alpha = 2 / (window + 1)
+    decay = 1 - alpha
+    prev = x[:window].mean()
+    out[window - 1] = prev
+    # The recurrence is inherently sequential; run it over plain floats,
+    # which is several times faster than indexing into the ndarray.
+    tail = (alpha * x[window:]).tolist()
+    result = [0.0] * len(tail)
+    for i, scaled in enumerate(tail):
+        prev = scaled + decay * prev
+        result[i] = prev
+    out[window:] = result
+    return out
+
+
+def rsi(values, period: int = 14) -> np.ndarray:
+    """
+    Relative Strength Index using simple averages of gains and losses over the
+    period-1 price changes inside each trailing window of `period` prices.
+    :param values: 1-D array-like of prices
+    :param period: RSI period (int, default 14)
+    :return: Array of RSI values, NaN for i < period
+    """
+    x = as_array(values)
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    if period < 2 or n <= period:
+        return out
+    gain, loss, no_loss = windowed_gain_loss(x, period - 1)
+    # Gains/losses are indexed by diff, and diff[j] is the change into price
+    # j+1, so the window ending at price i ends at diff[i-1].
+    gain, loss, no_loss = gain[period - 1:], loss[period - 1:], no_loss[period - 1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values_ = 100 - (100 / (1 + gain / loss))
+    out[period:] = np.where(no_loss, 100.0, values_)
+    return out
+
+
+def windowed_gain_loss(x: np.ndarray, window: int):
+    """
+    Average gain and loss over trailing windows of `window` price changes.
+    :return: (avg_gain, avg_loss, no_loss), indexed by np.diff(x); no_loss is an
+             exact test for windows without a single down move.
+    """
+    diff = np.diff(x)
+    avg_gain = sma(np.maximum(diff, 0.0), window)
+    avg_loss = sma(np.maximum(-diff, 0.0), window)
+    no_loss = rolling_sum(diff < 0, window) == 0
+    return avg_gain, avg_loss, no_loss
+
+
+def macd(values, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9):
+    """
+    MACD line, signal line and histogram as arrays.
+    :return: (macd_line, signal_line, histogram)
+    """
+    x = as_array(values)
+    n = x.shape[0]
+    macd_line = ema(x, fast_period) - ema(x, slow_period)
+    signal_line = np.full(n, np.nan)
+    valid = np.flatnonzero(~np.isnan(macd_line))
+    if valid.size:
+        start = valid[0]
+        signal_line[start:] = ema(macd_line[start:], signal_period)
+    return macd_line, signal_line, macd_line - signal_line
+
+
+def bollinger(values, window: int = 20, std_dev: float = 2):
+    """
+    Bollinger Bands as arrays.
+    :return: (upper_band, middle_band, lower_band)
+    """
+    middle = sma(values, window)
+    std = rolling_std(values, window)
+    return middle + std_dev * std, middle, middle - std_dev * std
+
+
+def stochastic(highs, lows, closes, k_period: int = 14, d_period: int = 3):
+    """
+    Stochastic oscillator %K and %D as arrays. %K is 50 where the window's
+    high equals its low; %D is the d_period SMA of %K.
+    :return: (k_values, d_values)
+    """
+    c = as_array(closes)
+    highest = rolling_max(highs, k_period)
+    lowest = rolling_min(lows, k_period)
+    span = highest - lowest
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = (c - lowest) / span * 100
+    k = np.where(span == 0, 50.0, k)
+    d = np.full(c.shape[0], np.nan)
+    if c.shape[0] >= k_period:
+        d[k_period - 1:] = sma(k[k_period - 1:], d_period)
+    return k, d
+
+
+def obv(closes, volumes) -> np.ndarray:
+    """On-Balance Volume, starting at 0."""
+    c = as_array(closes)
+    v = as_array(volumes)
+    out = np.zeros(c.shape[0])
+    if c.shape[0] > 1:
+        out[1:] = np.cumsum(np.sign(np.diff(c)) * v[1:])
+    return out
+
+
+def vpt(closes, volumes) -> np.ndarray:
+    """Volume Price Trend, starting at 0; steps with a zero previous close add nothing."""
+    c = as_array(closes)
+    v = as_array(volumes)
+    out = np.zeros(c.shape[0])
+    if c.shape[0] > 1:
+        prev = c[:-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct = np.where(prev != 0, (c[1:] - prev) / prev, 0.0)
+        out[1:] = np.cumsum(v[1:] * pct)
+    return out
@@ -1,4 +1,4 @@
-import numpy as np
+from . import indicator_core as core
 
 def moving_average(prices, window):
     """
@@ -9,10 +9,7 @@ def moving_average(prices, window):
     """
     if len(prices) < window:
         return [None] * len(prices)
-    ma = [None] * (window - 1)
-    for i in range(window - 1, len(prices)):
-        ma.append(np.mean(prices[i - window + 1:i + 1]))
-    return ma
+    return core.to_list(core.sma(prices, window))
 
 def exponential_moving_average(prices, window):
     """
@@ -23,15 +20,7 @@ def exponential_moving_average(prices, window):
     """
     if len(prices) < window:
         return [None] * len(prices)
-    ema = [None] * (window - 1)
-    alpha = 2 / (window + 1)
-    # Start EMA with the first window's mean
-    prev_ema = np.mean(prices[:window])
-    ema.append(prev_ema)
-    for price in prices[window:]:
-        prev_ema = alpha * price + (1 - alpha) * prev_ema
-        ema.append(prev_ema)
-    return ema
+    return core.to_list(core.ema(prices, window))
 
 def relative_strength_index(prices, period=14):
     """
@@ -42,16 +31,4 @@ def relative_strength_index(prices, period=14):
     """
     if len(prices) < period:
         return [None] * len(prices)
-    rsi = [None] * period
-    for i in range(period, len(prices)):
-        window = prices[i - period + 1:i + 1]
-        gains = [max(0, window[j] - window[j - 1]) for j in range(1, len(window))]
-        losses = [max(0, window[j - 1] - window[j]) for j in range(1, len(window))]
-        avg_gain = np.mean(gains)
-        avg_loss = np.mean(losses)
-        if avg_loss == 0:
-            rsi.append(100)
-        else:
-            rs = avg_gain / avg_loss
-            rsi.append(100 - (100 / (1 + rs)))
-    return rsi
+    return core.to_list(core.rsi(prices, period))
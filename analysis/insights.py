@@ -1,4 +1,6 @@
+from data.series import OHLCV
 from .indicators import moving_average, relative_strength_index
+from .streaming import latest_indicators
 
 
 def get_high_low(prices):
@@ -51,22 +53,32 @@ def basic_buy_sell_signals(prices, window=14):
     return signals
 
 
-def get_trading_insights(prices, ohlcv_array, window=14):
+def get_trading_insights(prices, ohlcv_array, window=14, state_key=None):
     """
     Aggregate trading insights: high, low, and raw indicator values.
     :param prices: List of float prices
-    :param ohlcv_array: List of OHLCV tuples (timestamp, open, high, low, close, volume)
+    :param ohlcv_array: OHLCV series (timestamp, open, high, low, close, volume)
     :param window: Window for indicators
+    :param state_key: Series identity such as (coin_id, timeframe); if given, MA and RSI are
+                      updated incrementally from ohlcv_array's candles (whose closes must be
+                      prices) instead of recomputed over the whole history
     :return: Dict of raw insights
     """
-    high = max(prices) if prices else None
-    low = min(prices) if prices else None
-    ma = moving_average(prices, window)
-    rsi = relative_strength_index(prices, period=window)
+    high = max(prices) if len(prices) else None
+    low = min(prices) if len(prices) else None
+    ohlcv = OHLCV.coerce(ohlcv_array) if state_key is not None else None
+    if ohlcv is not None and len(ohlcv) >= 2:
+        current = latest_indicators(state_key, ohlcv, window)['current']
+        ma_value, rsi_value = current['ma_value'], current['rsi_value']
+    else:
+        ma = moving_average(prices, window)
+        rsi = relative_strength_index(prices, period=window)
+        ma_value = ma[-1] if ma and ma[-1] is not None else None
+        rsi_value = rsi[-1] if rsi and rsi[-1] is not None else None
     return {
         'high': high,
         'low': low,
-        'ma_value': ma[-1] if ma and ma[-1] is not None else None,
-        'rsi_value': rsi[-1] if rsi and rsi[-1] is not None else None,
+        'ma_value': ma_value,
+        'rsi_value': rsi_value,
         'ohlcv_array': ohlcv_array
     }
@@ -2,15 +2,40 @@ import numpy as np
 from typing import List, Tuple, Optional, Dict, Any
 from datetime import datetime
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.linear_model import LinearRegression, Ridge
-from sklearn.svm import SVR
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import cross_val_score
+from . import indicator_core as core
+from .model_training import train_models
+from .model_cache import ModelCache, get_model_cache
+from data.series import OHLCV, OHLCVLike
+from .streaming import latest_indicators
 import warnings
 warnings.filterwarnings('ignore')
 
 
+# Weight of each signal type in calculate_overall_signal
+SIGNAL_WEIGHTS = {
+    'bollinger_bands': 0.25,
+    'macd': 0.25,
+    'stochastic': 0.20,
+    'volume': 0.15,
+    'ml_prediction': 0.15
+}
+SIGNAL_THRESHOLD = 0.4  # Weighted score needed for a BUY/SELL recommendation
+ML_SIGNAL_THRESHOLD = 0.02  # Predicted price change (2%) for the ML signal to count
+
+# Tunable parameters of generate_ml_trading_signals (see analysis/sweep.py)
+DEFAULT_SIGNAL_PARAMS = {
+    'bb_window': 20,
+    'bb_std': 2,
+    'macd_periods': (12, 26, 9),
+    'k_period': 14,
+    'd_period': 3,
+    'weights': SIGNAL_WEIGHTS,
+    'threshold': SIGNAL_THRESHOLD,
+    'ml_threshold': ML_SIGNAL_THRESHOLD,
+}
+
+
 def bollinger_bands(prices: List[float], window: int = 20, std_dev: int = 2) -> Tuple[List[float], List[float], List[float]]:
     """
     Calculate Bollinger Bands: upper band, middle band (SMA), lower band.
@@ -23,20 +48,8 @@ def bollinger_bands(prices: List[float], window: int = 20, std_dev: int = 2) ->
     if len(prices) < window:
         return ([None] * len(prices), [None] * len(prices), [None] * len(prices))
     
-    upper_band = [None] * (window - 1)
-    middle_band = [None] * (window - 1)
-    lower_band = [None] * (window - 1)
-    
-    for i in range(window - 1, len(prices)):
-        window_prices = prices[i - window + 1:i + 1]
-        mean = np.mean(window_prices)
-        std = np.std(window_prices)
-        
-        middle_band.append(mean)
-        upper_band.append(mean + (std_dev * std))
-        lower_band.append(mean - (std_dev * std))
-    
-    return upper_band, middle_band, lower_band
+    upper_band, middle_band, lower_band = core.bollinger(prices, window, std_dev)
+    return core.to_list(upper_band), core.to_list(middle_band), core.to_list(lower_band)
 
 
 def macd(prices: List[float], fast_period: int = 12, slow_period: int = 26, signal_period: int = 9) -> Tuple[List[float], List[float], List[float]]:
@@ -52,37 +65,8 @@ def macd(prices: List[float], fast_period: int = 12, slow_period: int = 26, sign
     if len(prices) < slow_period:
         return ([None] * len(prices), [None] * len(prices), [None] * len(prices))
     
-    # Calculate EMAs
-    fast_ema = exponential_moving_average(prices, fast_period)
-    slow_ema = exponential_moving_average(prices, slow_period)
-    
-    # Calculate MACD line
-    macd_line = []
-    for i in range(len(prices)):
-        if fast_ema[i] is not None and slow_ema[i] is not None:
-            macd_line.append(fast_ema[i] - slow_ema[i])
-        else:
-            macd_line.append(None)
-    
-    # Calculate signal line (EMA of MACD line)
-    macd_values = [x for x in macd_line if x is not None]
-    if len(macd_values) < signal_period:
-        signal_line = [None] * len(prices)
-        histogram = [None] * len(prices)
-    else:
-        signal_ema = exponential_moving_average(macd_values, signal_period)
-        # Align signal line with original data
-        signal_line = [None] * (len(prices) - len(signal_ema)) + signal_ema
-        
-        # Calculate histogram
-        histogram = []
-        for i in range(len(prices)):
-            if macd_line[i] is not None and signal_line[i] is not None:
-                histogram.append(macd_line[i] - signal_line[i])
-            else:
-                histogram.append(None)
-    
-    return macd_line, signal_line, histogram
+    macd_line, signal_line, histogram = core.macd(prices, fast_period, slow_period, signal_period)
+    return core.to_list(macd_line), core.to_list(signal_line), core.to_list(histogram)
 
 
 def exponential_moving_average(prices: List[float], window: int) -> List[float]:
@@ -90,25 +74,14 @@ def exponential_moving_average(prices: List[float], window: int) -> List[float]:
     if len(prices) < window:
         return [None] * len(prices)
     
-    ema = [None] * (window - 1)
-    alpha = 2 / (window + 1)
-    
-    # Start with SMA for first value
-    first_ema = sum(prices[:window]) / window
-    ema.append(first_ema)
-    
-    # Calculate EMA for remaining values
-    for i in range(window, len(prices)):
-        ema.append(alpha * prices[i] + (1 - alpha) * ema[-1])
-    
-    return ema
+    return core.to_list(core.ema(prices, window))
 
 
-def stochastic_oscillator(ohlc_data: List[Tuple], k_period: int = 14, d_period: int = 3) -> Tuple[List[float], List[float]]:
+def stochastic_oscillator(ohlc_data: OHLCVLike, k_period: int = 14, d_period: int = 3) -> Tuple[List[float], List[float]]:
     """
     Calculate Stochastic Oscillator (%K and %D).
     
-    :param ohlc_data: List of (timestamp, open, high, low, close, volume) tuples
+    :param ohlc_data: OHLCV series (or list of (timestamp, open, high, low, close, volume) tuples)
     :param k_period: Period for %K calculation
     :param d_period: Period for %D (moving average of %K)
     :return: (%K values, %D values)
@@ -116,99 +89,57 @@ def stochastic_oscillator(ohlc_data: List[Tuple], k_period: int = 14, d_period:
     if len(ohlc_data) < k_period:
         return ([None] * len(ohlc_data), [None] * len(ohlc_data))
     
-    k_values = [None] * (k_period - 1)
+    ohlcv = OHLCV.coerce(ohlc_data)
     
-    for i in range(k_period - 1, len(ohlc_data)):
-        # Get k_period window
-        window = ohlc_data[i - k_period + 1:i + 1]
-        
-        # Extract high, low, close values
-        highs = [candle[2] for candle in window]  # high prices
-        lows = [candle[3] for candle in window]   # low prices
-        current_close = ohlc_data[i][4]           # current close
-        
-        highest_high = max(highs)
-        lowest_low = min(lows)
-        
-        if highest_high == lowest_low:
-            k_values.append(50)  # Avoid division by zero
-        else:
-            k_value = ((current_close - lowest_low) / (highest_high - lowest_low)) * 100
-            k_values.append(k_value)
-    
-    # Calculate %D (moving average of %K)
-    k_numeric = [x for x in k_values if x is not None]
-    if len(k_numeric) < d_period:
-        d_values = [None] * len(ohlc_data)
-    else:
-        d_values = [None] * (len(k_values) - len(k_numeric))
-        for i in range(d_period - 1, len(k_numeric)):
-            d_values.append(sum(k_numeric[i - d_period + 1:i + 1]) / d_period)
-        
-        # Pad to match original length
-        while len(d_values) < len(ohlc_data):
-            d_values.append(None)
-    
-    return k_values, d_values
+    # %D is aligned with the %K value it ends on
+    k_values, d_values = core.stochastic(ohlcv.high, ohlcv.low, ohlcv.close, k_period, d_period)
+    return core.to_list(k_values), core.to_list(d_values)
 
 
-def volume_indicators(ohlc_data: List[Tuple]) -> Dict[str, Any]:
+def volume_indicators(ohlc_data: OHLCVLike) -> Dict[str, Any]:
     """
     Calculate volume-based indicators.
     
-    :param ohlc_data: List of (timestamp, open, high, low, close, volume) tuples
+    :param ohlc_data: OHLCV series (or list of (timestamp, open, high, low, close, volume) tuples)
     :return: Dictionary with volume indicators
     """
     if not ohlc_data:
         return {}
     
-    volumes = [candle[5] for candle in ohlc_data]
-    prices = [candle[4] for candle in ohlc_data]  # close prices
+    ohlcv = OHLCV.coerce(ohlc_data)
+    volumes = ohlcv.volume
+    prices = ohlcv.close  # close prices
     
     # Volume Moving Average
     window = min(20, len(volumes))
-    volume_ma = []
-    for i in range(len(volumes)):
-        if i < window - 1:
-            volume_ma.append(None)
-        else:
-            volume_ma.append(sum(volumes[i - window + 1:i + 1]) / window)
-    
-    # On-Balance Volume (OBV)
-    obv = [0]
-    for i in range(1, len(ohlc_data)):
-        if prices[i] > prices[i-1]:
-            obv.append(obv[-1] + volumes[i])
-        elif prices[i] < prices[i-1]:
-            obv.append(obv[-1] - volumes[i])
-        else:
-            obv.append(obv[-1])
-    
-    # Volume Price Trend (VPT)
-    vpt = [0]
-    for i in range(1, len(ohlc_data)):
-        if prices[i-1] != 0:
-            price_change_pct = (prices[i] - prices[i-1]) / prices[i-1]
-            vpt.append(vpt[-1] + (volumes[i] * price_change_pct))
-        else:
-            vpt.append(vpt[-1])
+    volume_ma = core.to_list(core.sma(volumes, window))
+    
+    recent = volumes[-5:].sum()
+    previous = volumes[-10:-5].sum()
     
     return {
         'volume_ma': volume_ma,
-        'obv': obv,
-        'vpt': vpt,
-        'avg_volume': sum(volumes) / len(volumes) if volumes else 0,
-        'volume_trend': 'increasing' if volumes[-5:] and sum(volumes[-5:]) > sum(volumes[-10:-5]) else 'decreasing'
+        'obv': core.obv(prices, volumes).tolist(),
+        'vpt': core.vpt(prices, volumes).tolist(),
+        'avg_volume': float(volumes.mean()),
+        'volume_trend': 'increasing' if recent > previous else 'decreasing'
     }
 
 
-def advanced_ml_analysis(ohlc_data: List[Tuple], lookback_periods: int = 50) -> Dict[str, Any]:
+def advanced_ml_analysis(ohlc_data: OHLCVLike, lookback_periods: int = 50, n_jobs: Optional[int] = None,
+                         backend: str = 'thread', coin_id: Optional[str] = None, timeframe: Optional[str] = None,
+                         model_cache: Optional[ModelCache] = None) -> Dict[str, Any]:
     """
     Perform advanced ML analysis using multiple algorithms.
     
-    :param ohlc_data: List of (timestamp, open, high, low, close, volume) tuples
+    :param ohlc_data: OHLCV series (or list of (timestamp, open, high, low, close, volume) tuples)
     :param lookback_periods: Number of periods to use for feature engineering
-    :return: Dictionary with ML analysis results
+    :param n_jobs: Training workers (-1 for all cores); defaults to ML_TRAINING_WORKERS
+    :param backend: 'thread' or 'process' pool for parallel training
+    :param coin_id: Coin the data belongs to; enables the on-disk model cache
+    :param timeframe: Timeframe of the data, part of the model cache key
+    :param model_cache: ModelCache to use instead of the shared default
+    :return: Dictionary with ML analysis results (including per-model timings and total training_seconds)
     """
     if len(ohlc_data) < lookback_periods:
         return {
@@ -219,6 +150,8 @@ def advanced_ml_analysis(ohlc_data: List[Tuple], lookback_periods: int = 50) ->
         }
     
     try:
+        ohlc_data = OHLCV.coerce(ohlc_data)
+        
         # Extract features from OHLCV data
         features = extract_ml_features(ohlc_data, lookback_periods)
         
@@ -230,23 +163,12 @@ def advanced_ml_analysis(ohlc_data: List[Tuple], lookback_periods: int = 50) ->
                 'model_scores': {}
             }
         
-        # Prepare target variable (next period price change)
-        targets = []
-        closes = [candle[4] for candle in ohlc_data]
-        
-        for i in range(len(features)):
-            if i + lookback_periods + 1 < len(closes):
-                current_price = closes[i + lookback_periods]
-                next_price = closes[i + lookback_periods + 1]
-                price_change = (next_price - current_price) / current_price
-                targets.append(price_change)
-            else:
-                targets.append(0)  # Placeholder for last values
-        
-        # Remove last few samples that don't have future data
-        valid_samples = min(len(features), len(targets) - 1)
-        X = np.array(features[:valid_samples])
-        y = np.array(targets[:valid_samples])
+        # Prepare target variable (next period price change); the last
+        # feature row has no future price yet, so it is only used to predict
+        closes = ohlc_data.close
+        current_prices = closes[lookback_periods:-1]
+        X = features[:-1]
+        y = (closes[lookback_periods + 1:] - current_prices) / current_prices
         
         if len(X) < 5:
             return {
@@ -256,50 +178,45 @@ def advanced_ml_analysis(ohlc_data: List[Tuple], lookback_periods: int = 50) ->
                 'model_scores': {}
             }
         
-        # Scale features
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
+        # Reuse fitted models when this exact training window was seen before
+        cache = cache_key = cached = None
+        if coin_id is not None:
+            cache = model_cache or get_model_cache()
+            cache_key = cache.make_key(coin_id, timeframe, X, y, lookback_periods)
+            cached = cache.load(cache_key)
         
-        # Train multiple ML models
-        models = {
-            'random_forest': RandomForestRegressor(n_estimators=50, random_state=42, max_depth=10),
-            'gradient_boosting': GradientBoostingRegressor(n_estimators=50, random_state=42, max_depth=6),
-            'linear_regression': LinearRegression(),
-            'ridge': Ridge(alpha=1.0),
-            'svr': SVR(kernel='rbf', C=1.0, gamma='scale')
-        }
-        
-        predictions = {}
-        model_scores = {}
-        feature_importance = {}
-        
-        for name, model in models.items():
-            try:
-                # Cross-validation score
-                cv_scores = cross_val_score(model, X_scaled, y, cv=min(3, len(X)//2), scoring='r2')
-                model_scores[name] = {
-                    'mean_cv_score': np.mean(cv_scores),
-                    'std_cv_score': np.std(cv_scores)
-                }
-                
-                # Fit model and make prediction
-                model.fit(X_scaled, y)
-                
-                # Predict next price change
-                if len(features) > 0:
-                    last_features = np.array(features[-1]).reshape(1, -1)
-                    last_features_scaled = scaler.transform(last_features)
-                    pred = model.predict(last_features_scaled)[0]
-                    predictions[name] = pred
-                    
-                    # Feature importance (for tree-based models)
-                    if hasattr(model, 'feature_importances_'):
-                        feature_importance[name] = model.feature_importances_.tolist()
-                
-            except Exception as e:
-                print(f"Error training {name} model: {e}")
-                predictions[name] = 0
-                model_scores[name] = {'mean_cv_score': 0, 'std_cv_score': 0}
+        if cached is not None:
+            scaler = cached['scaler']
+            last_features_scaled = scaler.transform(features[-1].reshape(1, -1))
+            predictions = {
+                name: cached['models'][name].predict(last_features_scaled)[0] if name in cached['models'] else 0
+                for name in cached['model_scores']
+            }
+            model_scores = cached['model_scores']
+            feature_importance = cached['feature_importance']
+            timings = {}
+            training_seconds = 0.0
+        else:
+            # Scale features
+            scaler = StandardScaler()
+            X_scaled = scaler.fit_transform(X)
+            
+            # Train multiple ML models (CV folds and final fits may run in parallel)
+            last_features_scaled = scaler.transform(features[-1].reshape(1, -1))
+            training = train_models(X_scaled, y, last_features_scaled, n_jobs=n_jobs, backend=backend)
+            predictions = training['predictions']
+            model_scores = training['model_scores']
+            feature_importance = training['feature_importance']
+            timings = training['timings']
+            training_seconds = training['wall_seconds']
+            
+            if cache is not None:
+                cache.save(cache_key, {
+                    'scaler': scaler,
+                    'models': training['fitted_models'],
+                    'model_scores': model_scores,
+                    'feature_importance': feature_importance,
+                })
         
         # Ensemble prediction (average of all models)
         if predictions:
@@ -311,7 +228,10 @@ def advanced_ml_analysis(ohlc_data: List[Tuple], lookback_periods: int = 50) ->
             'feature_importance': feature_importance,
             'model_scores': model_scores,
             'sample_size': len(X),
-            'feature_count': X.shape[1] if len(X) > 0 else 0
+            'feature_count': X.shape[1] if len(X) > 0 else 0,
+            'timings': timings,
+            'training_seconds': training_seconds,
+            'cache_hit': cached is not None
         }
         
     except Exception as e:
@@ -323,80 +243,57 @@ def advanced_ml_analysis(ohlc_data: List[Tuple], lookback_periods: int = 50) ->
         }
 
 
-def extract_ml_features(ohlc_data: List[Tuple], lookback: int) -> Optional[List[List[float]]]:
+# Column order of the matrix returned by extract_ml_features
+ML_FEATURE_NAMES = [
+    'close_mean', 'close_std', 'high_max', 'low_min', 'close_to_mean',
+    'return_mean', 'return_std', 'return_max', 'return_min',
+    'volume_mean', 'volume_std', 'volume_ratio', 'rsi',
+]
+
+
+def extract_ml_features(ohlc_data: OHLCVLike, lookback: int) -> Optional[np.ndarray]:
     """
     Extract ML features from OHLCV data.
     
-    :param ohlc_data: List of (timestamp, open, high, low, close, volume) tuples
+    Row k describes the `lookback` candles before candle lookback+k. Every
+    column is computed for all rows at once from rolling sums and sliding
+    window views; see ML_FEATURE_NAMES for the column order.
+    
+    :param ohlc_data: OHLCV series (or list of (timestamp, open, high, low, close, volume) tuples)
     :param lookback: Number of lookback periods
-    :return: List of feature vectors
+    :return: Float array of shape (len(ohlc_data) - lookback, len(ML_FEATURE_NAMES))
     """
     try:
-        closes = [candle[4] for candle in ohlc_data]
-        highs = [candle[2] for candle in ohlc_data]
-        lows = [candle[3] for candle in ohlc_data]
-        volumes = [candle[5] for candle in ohlc_data]
+        ohlcv = OHLCV.coerce(ohlc_data)
+        closes, highs, lows, volumes = ohlcv.close, ohlcv.high, ohlcv.low, ohlcv.volume
+        n = len(ohlcv)
+        rows = max(n - lookback, 0)
+        features = np.empty((rows, len(ML_FEATURE_NAMES)))
+        if rows == 0:
+            return features
         
-        features = []
+        # Each row's window is the trailing window ending at the previous candle
+        window_end = slice(lookback - 1, n - 1)
         
-        for i in range(lookback, len(ohlc_data)):
-            feature_vector = []
-            
-            # Price-based features
-            window_closes = closes[i-lookback:i]
-            window_highs = highs[i-lookback:i]
-            window_lows = lows[i-lookback:i]
-            window_volumes = volumes[i-lookback:i]
-            
-            # Basic price statistics
-            feature_vector.extend([
-                np.mean(window_closes),
-                np.std(window_closes),
-                np.max(window_highs),
-                np.min(window_lows),
-                closes[i-1] / np.mean(window_closes) if np.mean(window_closes) != 0 else 1,  # Price to MA ratio
-            ])
-            
-            # Price changes and momentum
-            if len(window_closes) >= 2:
-                returns = [(window_closes[j] - window_closes[j-1]) / window_closes[j-1] 
-                          for j in range(1, len(window_closes)) if window_closes[j-1] != 0]
-                if returns:
-                    feature_vector.extend([
-                        np.mean(returns),
-                        np.std(returns),
-                        np.max(returns),
-                        np.min(returns)
-                    ])
-                else:
-                    feature_vector.extend([0, 0, 0, 0])
-            else:
-                feature_vector.extend([0, 0, 0, 0])
-            
-            # Volume features
-            feature_vector.extend([
-                np.mean(window_volumes),
-                np.std(window_volumes),
-                volumes[i-1] / np.mean(window_volumes) if np.mean(window_volumes) != 0 else 1,  # Volume ratio
-            ])
-            
-            # Technical indicators as features
-            if i >= 20:  # Need enough data for indicators
-                rsi_window = closes[i-14:i]
-                if len(rsi_window) >= 14:
-                    # Simple RSI calculation
-                    gains = [max(0, rsi_window[j] - rsi_window[j-1]) for j in range(1, len(rsi_window))]
-                    losses = [max(0, rsi_window[j-1] - rsi_window[j]) for j in range(1, len(rsi_window))]
-                    avg_gain = np.mean(gains) if gains else 0
-                    avg_loss = np.mean(losses) if losses else 0
-                    rsi = 50 if avg_loss == 0 else 100 - (100 / (1 + avg_gain / avg_loss))
-                    feature_vector.append(rsi)
-                else:
-                    feature_vector.append(50)
-            else:
-                feature_vector.append(50)
-            
-            features.append(feature_vector)
+        # Basic price statistics
+        close_mean = core.sma(closes, lookback)[window_end]
+        features[:, 0] = close_mean
+        features[:, 1] = core.rolling_std(closes, lookback)[window_end]
+        features[:, 2] = core.rolling_max(highs, lookback)[window_end]
+        features[:, 3] = core.rolling_min(lows, lookback)[window_end]
+        features[:, 4] = _safe_ratio(closes[window_end], close_mean)  # Price to MA ratio
+        
+        # Price changes and momentum
+        features[:, 5:9] = _window_return_stats(closes, lookback)
+        
+        # Volume features
+        volume_mean = core.sma(volumes, lookback)[window_end]
+        features[:, 9] = volume_mean
+        features[:, 10] = core.rolling_std(volumes, lookback)[window_end]
+        features[:, 11] = _safe_ratio(volumes[window_end], volume_mean)  # Volume ratio
+        
+        # Technical indicators as features
+        features[:, 12] = _window_rsi(closes, lookback)
         
         return features
         
@@ -405,11 +302,76 @@ def extract_ml_features(ohlc_data: List[Tuple], lookback: int) -> Optional[List[
         return None
 
 
-def generate_ml_trading_signals(ohlc_data: List[Tuple]) -> Dict[str, Any]:
+def _safe_ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """numerator / denominator, or 1 where the denominator is zero"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator != 0, numerator / denominator, 1.0)
+
+
+def _window_return_stats(closes: np.ndarray, lookback: int) -> np.ndarray:
+    """Mean/std/max/min of the simple returns inside each feature window (zeros if none)"""
+    rows = len(closes) - lookback
+    stats = np.zeros((rows, 4))
+    if lookback < 2:
+        return stats
+    
+    # Returns from a zero price are skipped, as in a per-window list comprehension
+    prev = closes[:-1]
+    valid = prev != 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.where(valid, (closes[1:] - prev) / prev, 0.0)
+    
+    # The window of row k holds returns[k:k + lookback - 1]
+    width = lookback - 1
+    window_end = slice(width - 1, width - 1 + rows)
+    count = core.rolling_sum(valid, width)[window_end]
+    has_returns = count > 0
+    count = np.where(has_returns, count, 1)
+    mean = core.rolling_sum(returns, width)[window_end] / count
+    std = core.rolling_std(returns, width)[window_end]
+    # Windows with skipped returns (rare) fall back to the std of the valid ones
+    for k in np.flatnonzero(has_returns & (count < width)):
+        std[k] = returns[k:k + width][valid[k:k + width]].std()
+    high = core.rolling_max(np.where(valid, returns, -np.inf), width)[window_end]
+    low = core.rolling_min(np.where(valid, returns, np.inf), width)[window_end]
+    
+    stats[has_returns] = np.column_stack([mean, std, high, low])[has_returns]
+    return stats
+
+
+def _window_rsi(closes: np.ndarray, lookback: int, period: int = 14) -> np.ndarray:
+    """Simple RSI over the `period` closes before each row's candle; 50 before candle 20 or with no losses"""
+    n = len(closes)
+    rsi = np.full(n - lookback, 50.0)
+    candle = np.arange(lookback, n)
+    use = candle >= 20  # Need enough data for indicators
+    if not use.any():
+        return rsi
+    avg_gain, avg_loss, no_loss = core.windowed_gain_loss(closes, period - 1)
+    # Changes inside closes[i-period:i] end at diff index i-2
+    idx = candle[use] - 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100 - (100 / (1 + avg_gain[idx] / avg_loss[idx]))
+    rsi[use] = np.where(no_loss[idx], 50.0, values)
+    return rsi
+
+
+def generate_ml_trading_signals(ohlc_data: OHLCVLike, n_jobs: Optional[int] = None, coin_id: Optional[str] = None,
+                                timeframe: Optional[str] = None,
+                                signal_params: Optional[Dict[str, Any]] = None,
+                                incremental: bool = False) -> Dict[str, Any]:
     """
     Generate comprehensive trading signals using ML and technical analysis.
     
-    :param ohlc_data: List of (timestamp, open, high, low, close, volume) tuples
+    :param ohlc_data: OHLCV series (or list of (timestamp, open, high, low, close, volume) tuples)
+    :param n_jobs: Workers for ML model training (see advanced_ml_analysis)
+    :param coin_id: Coin id, enables reuse of cached models (see advanced_ml_analysis)
+    :param timeframe: Timeframe of the data, part of the model cache key
+    :param signal_params: Overrides for DEFAULT_SIGNAL_PARAMS (indicator periods, weights, thresholds)
+    :param incremental: With coin_id and timeframe, update the Bollinger, MACD and stochastic values
+                        from the previous call for that series and learn the ML predictions online,
+                        one candle at a time (for a long-lived process that refreshes the same
+                        series), instead of recomputing the indicators and refitting the ensemble
     :return: Dictionary with trading signals and analysis
     """
     if not ohlc_data or len(ohlc_data) < 20:
@@ -421,16 +383,33 @@ def generate_ml_trading_signals(ohlc_data: List[Tuple]) -> Dict[str, Any]:
         }
     
     try:
-        closes = [candle[4] for candle in ohlc_data]
+        ohlc_data = OHLCV.coerce(ohlc_data)
+        closes = ohlc_data.close
+        params = {**DEFAULT_SIGNAL_PARAMS, **(signal_params or {})}
         
-        # Technical indicators
-        bb_upper, bb_middle, bb_lower = bollinger_bands(closes)
-        macd_line, signal_line, histogram = macd(closes)
-        k_values, d_values = stochastic_oscillator(ohlc_data)
+        # Technical indicators (the signals below only look at the last two values)
+        if incremental and coin_id is not None and timeframe is not None:
+            latest = latest_indicators((coin_id, timeframe), ohlc_data, bb_window=params['bb_window'],
+                                       bb_std=params['bb_std'], macd_periods=tuple(params['macd_periods']),
+                                       k_period=params['k_period'], d_period=params['d_period'])
+            # [previous, current] value pairs of each indicator output
+            pairs = {name: [list(pair) for pair in zip(latest['previous'][name], latest['current'][name])]
+                     for name in ('bollinger_bands', 'macd', 'stochastic')}
+            bb_upper, bb_middle, bb_lower = pairs['bollinger_bands']
+            macd_line, signal_line, histogram = pairs['macd']
+            k_values, d_values = pairs['stochastic']
+        else:
+            bb_upper, bb_middle, bb_lower = bollinger_bands(closes, params['bb_window'], params['bb_std'])
+            macd_line, signal_line, histogram = macd(closes, *params['macd_periods'])
+            k_values, d_values = stochastic_oscillator(ohlc_data, params['k_period'], params['d_period'])
         volume_data = volume_indicators(ohlc_data)
         
         # ML analysis
-        ml_results = advanced_ml_analysis(ohlc_data)
+        if incremental and coin_id is not None and timeframe is not None:
+            from .online_models import online_ml_analysis  # online_models imports this module
+            ml_results = online_ml_analysis((coin_id, timeframe), ohlc_data)
+        else:
+            ml_results = advanced_ml_analysis(ohlc_data, n_jobs=n_jobs, coin_id=coin_id, timeframe=timeframe)
         
         # Generate signals
         signals = {
@@ -442,7 +421,8 @@ def generate_ml_trading_signals(ohlc_data: List[Tuple]) -> Dict[str, Any]:
         }
         
         # Calculate overall confidence and recommendation
-        confidence, recommendation = calculate_overall_signal(signals, ml_results)
+        confidence, recommendation = calculate_overall_signal(
+            signals, ml_results, params['weights'], params['threshold'], params['ml_threshold'])
         
         return {
             'signals': signals,
@@ -463,7 +443,7 @@ def generate_ml_trading_signals(ohlc_data: List[Tuple]) -> Dict[str, Any]:
 
 def analyze_bollinger_signals(closes: List[float], upper: List[float], middle: List[float], lower: List[float]) -> Dict[str, Any]:
     """Analyze Bollinger Bands signals"""
-    if not all([closes, upper, middle, lower]) or len(closes) < 2:
+    if min(len(closes), len(upper), len(middle), len(lower)) == 0 or len(closes) < 2:
         return {'signal': 'HOLD', 'strength': 0, 'reason': 'Insufficient data'}
     
     current_price = closes[-1]
@@ -535,7 +515,7 @@ def analyze_stochastic_signals(k_values: List[float], d_values: List[float]) ->
 
 def analyze_volume_signals(volume_data: Dict[str, Any], closes: List[float]) -> Dict[str, Any]:
     """Analyze volume-based signals"""
-    if not volume_data or not closes:
+    if not volume_data or len(closes) == 0:
         return {'signal': 'HOLD', 'strength': 0, 'reason': 'No volume data available'}
     
     volume_trend = volume_data.get('volume_trend', 'unknown')
@@ -554,31 +534,24 @@ def analyze_volume_signals(volume_data: Dict[str, Any], closes: List[float]) ->
     return {'signal': 'HOLD', 'strength': 0.1, 'reason': 'Insufficient price data for volume analysis'}
 
 
-def calculate_overall_signal(signals: Dict[str, Any], ml_results: Dict[str, Any]) -> Tuple[float, str]:
+def calculate_overall_signal(signals: Dict[str, Any], ml_results: Dict[str, Any],
+                             weights: Optional[Dict[str, float]] = None, threshold: float = SIGNAL_THRESHOLD,
+                             ml_threshold: float = ML_SIGNAL_THRESHOLD) -> Tuple[float, str]:
     """Calculate overall trading signal and confidence"""
     buy_score = 0
     sell_score = 0
     total_weight = 0
     
-    # Weight different signal types
-    weights = {
-        'bollinger_bands': 0.25,
-        'macd': 0.25,
-        'stochastic': 0.20,
-        'volume': 0.15,
-        'ml_prediction': 0.15
-    }
-    
-    for signal_type, weight in weights.items():
+    for signal_type, weight in (SIGNAL_WEIGHTS if weights is None else weights).items():
         if signal_type in signals:
             signal_data = signals[signal_type]
             
             if signal_type == 'ml_prediction':
                 # Handle ML predictions
                 ensemble_pred = signal_data.get('ensemble', 0)
-                if ensemble_pred > 0.02:  # 2% positive change threshold
+                if ensemble_pred > ml_threshold:
                     buy_score += weight * abs(ensemble_pred) * 50
-                elif ensemble_pred < -0.02:  # 2% negative change threshold
+                elif ensemble_pred < -ml_threshold:
                     sell_score += weight * abs(ensemble_pred) * 50
                 total_weight += weight
             else:
@@ -598,9 +571,9 @@ def calculate_overall_signal(signals: Dict[str, Any], ml_results: Dict[str, Any]
         
         confidence = max(buy_score, sell_score)
         
-        if buy_score > sell_score and buy_score > 0.4:
+        if buy_score > sell_score and buy_score > threshold:
             recommendation = 'BUY'
-        elif sell_score > buy_score and sell_score > 0.4:
+        elif sell_score > buy_score and sell_score > threshold:
             recommendation = 'SELL'
         else:
             recommendation = 'HOLD'
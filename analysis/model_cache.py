@@ -0,0 +1,130 @@
+"""
+On-disk cache of fitted ML models.
+
+Entries are keyed by coin, timeframe, feature-schema version and a hash of
+the exact training window (features and targets), so a hit is only possible
+when refitting would produce the same models. Each entry holds the fitted
+models, the scaler and the CV scores. Entries are evicted by age and, least
+recently used first, by total size.
+"""
+import hashlib
+import os
+import pickle
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from data.paths import cache_dir
+
+# Bump whenever extract_ml_features, the targets or the model set change
+FEATURE_SCHEMA_VERSION = 1
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 7 * 24 * 3600
+
+
+class ModelCache:
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS):
+        """
+        :param directory: Cache directory; defaults to <cache root>/models
+        :param max_bytes: Total size budget for cached entries
+        :param max_age_seconds: Entries not used for this long are evicted
+        """
+        self.directory = directory or cache_dir("models")
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+
+    @staticmethod
+    def make_key(coin_id: str, timeframe: str, X: np.ndarray, y: np.ndarray, lookback: int) -> str:
+        """Key for a training window: coin, timeframe, schema version and a hash of X/y."""
+        digest = hashlib.sha256()
+        digest.update(f"{FEATURE_SCHEMA_VERSION}|{lookback}|{X.shape}|{y.shape}".encode())
+        digest.update(np.ascontiguousarray(X, dtype=np.float64).tobytes())
+        digest.update(np.ascontiguousarray(y, dtype=np.float64).tobytes())
+        safe = lambda s: "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in str(s))
+        return f"{safe(coin_id)}-{safe(timeframe)}-v{FEATURE_SCHEMA_VERSION}-{digest.hexdigest()[:32]}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for key, or None on a miss or unreadable entry."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # Stale pickle (e.g. after a scikit-learn upgrade) - drop it
+            print(f"Discarding unreadable model cache entry {key}: {e}")
+            self._remove(path)
+            return None
+        if time.time() - os.path.getmtime(path) > self.max_age_seconds:
+            self._remove(path)
+            return None
+        os.utime(path, None)  # mark as recently used
+        return entry
+
+    def save(self, key: str, entry: Dict[str, Any]):
+        """Store an entry atomically, then enforce the age and size limits."""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Failed to write model cache entry {key}: {e}")
+            self._remove(tmp_path)
+            return
+        self.evict()
+
+    def evict(self):
+        """Remove entries older than max_age_seconds, then least recently used ones until under max_bytes."""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".pkl"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                self._remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                self._remove(os.path.join(self.directory, name))
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_default_cache = None
+
+
+def get_model_cache() -> ModelCache:
+    """Shared ModelCache in the default cache directory."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ModelCache()
+    return _default_cache
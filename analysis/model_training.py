@@ -0,0 +1,173 @@
+"""
+Model training for advanced_ml_analysis.
+
+Each model's cross-validation folds and its final fit are independent tasks,
+so they can be fanned out to a thread or process pool. Results are gathered
+by (model, fold) key, which keeps the output identical to a serial run
+regardless of completion order.
+"""
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold
+from sklearn.svm import SVR
+
+def default_workers() -> int:
+    """Worker count from ML_TRAINING_WORKERS (1, i.e. serial in-process training, if unset or invalid)."""
+    value = os.environ.get("ML_TRAINING_WORKERS", "1")
+    try:
+        return int(value)
+    except ValueError:
+        print(f"Invalid ML_TRAINING_WORKERS={value!r}, training serially")
+        return 1
+
+FULL_FIT = -1  # fold index used for the final fit on all samples
+
+
+def build_models() -> Dict[str, Any]:
+    """Return the (unfitted) models of the ensemble, in reporting order."""
+    return {
+        'random_forest': RandomForestRegressor(n_estimators=50, random_state=42, max_depth=10),
+        'gradient_boosting': GradientBoostingRegressor(n_estimators=50, random_state=42, max_depth=6),
+        'linear_regression': LinearRegression(),
+        'ridge': Ridge(alpha=1.0),
+        'svr': SVR(kernel='rbf', C=1.0, gamma='scale')
+    }
+
+
+def _run_task(model, X: np.ndarray, y: np.ndarray, train_idx: Optional[np.ndarray],
+              test_idx: Optional[np.ndarray]) -> Tuple[Any, float, float]:
+    """
+    Fit one clone of `model`. With indices, return its R² on the held-out fold;
+    without, fit on all samples and return the fitted model.
+    :return: (fitted model or None, score or nan, elapsed seconds)
+    """
+    start = time.perf_counter()
+    estimator = clone(model)
+    if train_idx is None:
+        estimator.fit(X, y)
+        return estimator, float('nan'), time.perf_counter() - start
+    estimator.fit(X[train_idx], y[train_idx])
+    score = r2_score(y[test_idx], estimator.predict(X[test_idx]))
+    return None, score, time.perf_counter() - start
+
+
+def _make_executor(n_jobs: int, backend: str) -> Optional[Executor]:
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs <= 1:
+        return None
+    if backend == 'process':
+        return ProcessPoolExecutor(max_workers=n_jobs)
+    return ThreadPoolExecutor(max_workers=n_jobs)
+
+
+def train_models(X: np.ndarray, y: np.ndarray, x_last: np.ndarray, n_jobs: Optional[int] = None,
+                 backend: str = 'thread', executor: Optional[Executor] = None,
+                 models: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Cross-validate, fit and predict with every model, optionally in parallel.
+
+    :param X: Scaled training features
+    :param y: Training targets
+    :param x_last: Scaled feature row to predict from, shape (1, n_features)
+    :param n_jobs: Worker count (-1 for all cores); defaults to ML_TRAINING_WORKERS
+    :param backend: 'thread' or 'process' pool when n_jobs > 1
+    :param executor: Existing executor to reuse instead of creating one
+    :param models: Models to train; defaults to build_models()
+    :return: Dict with predictions, model_scores, feature_importance, fitted_models, timings
+             (model name -> seconds) and wall_seconds for the whole run
+    """
+    models = models if models is not None else build_models()
+    n_jobs = default_workers() if n_jobs is None else n_jobs
+    wall_start = time.perf_counter()
+
+    # Same folds as cross_val_score(cv=k) for a regressor: unshuffled KFold
+    try:
+        folds: List[Tuple[np.ndarray, np.ndarray]] = list(KFold(n_splits=min(3, len(X) // 2)).split(X))
+        fold_error = None
+    except Exception as e:
+        folds, fold_error = [], e
+
+    tasks = []
+    for name, model in models.items():
+        if fold_error is None:
+            for fold, (train_idx, test_idx) in enumerate(folds):
+                tasks.append((name, fold, model, train_idx, test_idx))
+        tasks.append((name, FULL_FIT, model, None, None))
+
+    own_executor = executor is None
+    if own_executor:
+        executor = _make_executor(n_jobs, backend)
+    results: Dict[Tuple[str, int], Any] = {}
+    try:
+        if executor is None:
+            for name, fold, model, train_idx, test_idx in tasks:
+                try:
+                    results[(name, fold)] = _run_task(model, X, y, train_idx, test_idx)
+                except Exception as e:
+                    results[(name, fold)] = e
+        else:
+            futures = {
+                (name, fold): executor.submit(_run_task, model, X, y, train_idx, test_idx)
+                for name, fold, model, train_idx, test_idx in tasks
+            }
+            for key, future in futures.items():
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    results[key] = e
+    finally:
+        if own_executor and executor is not None:
+            executor.shutdown()
+
+    predictions = {}
+    model_scores = {}
+    feature_importance = {}
+    fitted_models = {}
+    timings = {}
+    for name in models:
+        keys = [(name, fold) for fold in range(len(folds))] + [(name, FULL_FIT)]
+        outcomes = [results.get(key) for key in keys]
+        errors = [o for o in outcomes if isinstance(o, Exception)]
+        error = fold_error if fold_error is not None else (errors[0] if errors else None)
+        elapsed = [o[2] for o in outcomes if isinstance(o, tuple)]
+        timings[name] = {
+            'cv_seconds': sum(o[2] for o in outcomes[:-1] if isinstance(o, tuple)),
+            'fit_seconds': outcomes[-1][2] if isinstance(outcomes[-1], tuple) else 0.0,
+            'total_seconds': sum(elapsed),
+        }
+        if error is not None:
+            print(f"Error training {name} model: {error}")
+            predictions[name] = 0
+            model_scores[name] = {'mean_cv_score': 0, 'std_cv_score': 0}
+            continue
+
+        cv_scores = [o[1] for o in outcomes[:-1]]
+        model_scores[name] = {
+            'mean_cv_score': np.mean(cv_scores),
+            'std_cv_score': np.std(cv_scores)
+        }
+        fitted = outcomes[-1][0]
+        fitted_models[name] = fitted
+        predictions[name] = fitted.predict(x_last)[0]
+
+        # Feature importance (for tree-based models)
+        if hasattr(fitted, 'feature_importances_'):
+            feature_importance[name] = fitted.feature_importances_.tolist()
+
+    return {
+        'predictions': predictions,
+        'model_scores': model_scores,
+        'feature_importance': feature_importance,
+        'fitted_models': fitted_models,
+        'timings': timings,
+        'wall_seconds': time.perf_counter() - wall_start,
+    }
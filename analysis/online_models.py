@@ -0,0 +1,234 @@
+"""
+Online (incremental) ML predictors.
+
+OnlinePredictor consumes the same feature vectors as extract_ml_features but
+learns one candle at a time instead of refitting: a running standardizer
+replaces the refit StandardScaler, recursive least squares replaces the
+linear/ridge models, and partial_fit-capable scikit-learn regressors update
+in place. Each new candle costs O(lookback + d²), independent of history.
+
+latest_online_predictions() keeps one OnlinePredictor per series (e.g. coin and
+timeframe) for generate_ml_trading_signals(incremental=True), the way
+streaming.latest_indicators keeps indicator state: each refresh learns only the
+candles closed since the previous one.
+"""
+import copy
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+from sklearn.linear_model import SGDRegressor
+
+from data.series import OHLCV, OHLCVLike
+from .ml_indicators import extract_ml_features
+
+
+class RunningStandardizer:
+    """Welford running mean/variance; transform() matches StandardScaler on the data seen so far."""
+
+    def __init__(self, n_features: int):
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self._m2 = np.zeros(n_features)
+
+    def partial_fit(self, X: np.ndarray) -> "RunningStandardizer":
+        for row in np.atleast_2d(X):
+            self.count += 1
+            delta = row - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (row - self.mean)
+        return self
+
+    @property
+    def scale(self) -> np.ndarray:
+        if self.count == 0:
+            return np.ones_like(self.mean)
+        std = np.sqrt(self._m2 / self.count)
+        return np.where(std > 0, std, 1.0)  # constant features are left unscaled
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (np.atleast_2d(X) - self.mean) / self.scale
+
+
+class RecursiveLeastSquares:
+    """
+    Recursive least squares with intercept. With initial_precision=alpha (and no
+    forgetting) the solution is ridge regression with penalty alpha on the
+    coefficients, the intercept being left (all but) unpenalised as in
+    scikit-learn's Ridge; a tiny value approximates ordinary least squares.
+    forgetting < 1 discounts old samples.
+    """
+
+    # Prior precision of the intercept: small enough to leave it effectively unpenalised
+    INTERCEPT_PRECISION = 1e-8
+
+    def __init__(self, n_features: int, initial_precision: float = 1.0, forgetting: float = 1.0):
+        self.forgetting = forgetting
+        self.coef = np.zeros(n_features + 1)  # last element is the intercept
+        self.P = np.eye(n_features + 1) / initial_precision
+        self.P[-1, -1] = 1 / self.INTERCEPT_PRECISION
+
+    def partial_fit(self, X: np.ndarray, y) -> "RecursiveLeastSquares":
+        for row, target in zip(np.atleast_2d(X), np.atleast_1d(y)):
+            x = np.append(row, 1.0)
+            Px = self.P @ x
+            gain = Px / (self.forgetting + x @ Px)
+            self.coef += gain * (target - x @ self.coef)
+            self.P = (self.P - np.outer(gain, Px)) / self.forgetting
+        return self
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        X = np.atleast_2d(X)
+        return X @ self.coef[:-1] + self.coef[-1]
+
+
+def build_online_models(n_features: int) -> Dict[str, Any]:
+    """Online counterparts of the batch ensemble in model_training.build_models."""
+    return {
+        'linear_regression': RecursiveLeastSquares(n_features, initial_precision=1e-6),
+        'ridge': RecursiveLeastSquares(n_features, initial_precision=1.0),
+        'sgd': SGDRegressor(random_state=42, learning_rate='invscaling', eta0=0.001),
+    }
+
+
+class OnlinePredictor:
+    """
+    Incremental next-candle return predictor.
+
+    Seed once with history, then call update(candle) for every new candle: the
+    previous feature row is learned against the now-known return, and a fresh
+    prediction for the next return is made from the newest window.
+    """
+
+    def __init__(self, lookback: int = 50, history: Optional[OHLCVLike] = None):
+        self.lookback = lookback
+        # extract_ml_features only fills the RSI column from candle 20 on
+        self._candles = deque(maxlen=max(lookback + 1, 21))
+        self.standardizer = None
+        self.models = None
+        self.pending_features = None
+        self.samples = 0
+        if history is not None:
+            self.seed(history)
+
+    def _init_models(self, n_features: int):
+        self.standardizer = RunningStandardizer(n_features)
+        self.models = build_online_models(n_features)
+
+    def _learn(self, X: np.ndarray, y: np.ndarray):
+        self.standardizer.partial_fit(X)
+        X_scaled = self.standardizer.transform(X)
+        for model in self.models.values():
+            # Row-by-row, so RLS and SGD see samples in arrival order
+            for row, target in zip(X_scaled, y):
+                model.partial_fit(row.reshape(1, -1), np.array([target]))
+        self.samples += len(y)
+
+    def seed(self, history: OHLCVLike) -> Dict[str, Any]:
+        """Train on a batch of history (same samples as advanced_ml_analysis) and predict."""
+        ohlcv = OHLCV.coerce(history)
+        features = extract_ml_features(ohlcv, self.lookback)
+        if features is None or len(features) < 2:
+            raise ValueError(f"Need more than {self.lookback + 1} candles to seed the online predictor")
+        closes = ohlcv.close
+        current_prices = closes[self.lookback:-1]
+        y = (closes[self.lookback + 1:] - current_prices) / current_prices
+        self._init_models(features.shape[1])
+        self.samples = 0
+        # The standardizer sees the whole window before scaling, as StandardScaler would
+        self._learn(features[:-1], y)
+        self.pending_features = features[-1]
+        self._candles.clear()
+        self._candles.extend(ohlcv[-self._candles.maxlen:])
+        return self.predict()
+
+    def update(self, candle) -> Dict[str, Any]:
+        """Learn from the return the new candle completes, then predict the next one."""
+        if self.models is None:
+            raise RuntimeError("OnlinePredictor must be seeded with history before update()")
+        previous_close = self._candles[-1][4]
+        self._candles.append(tuple(candle))
+        if self.pending_features is not None and previous_close != 0:
+            target = (candle[4] - previous_close) / previous_close
+            self._learn(self.pending_features.reshape(1, -1), np.array([target]))
+        features = extract_ml_features(OHLCV.from_tuples(self._candles), self.lookback)
+        self.pending_features = features[-1] if features is not None and len(features) else None
+        return self.predict()
+
+    def peek(self, candle) -> Dict[str, Any]:
+        """Predictions after `candle` without learning it (for a candle that is still forming)."""
+        return copy.deepcopy(self).update(candle)
+
+    def predict(self) -> Dict[str, Any]:
+        """Predictions in the same shape as advanced_ml_analysis()['predictions']."""
+        predictions = {}
+        if self.pending_features is not None:
+            x = self.standardizer.transform(self.pending_features)
+            for name, model in self.models.items():
+                predictions[name] = float(model.predict(x)[0])
+            predictions['ensemble'] = float(np.mean(list(predictions.values())))
+        return {
+            'predictions': predictions,
+            'sample_size': self.samples,
+            'mode': 'online'
+        }
+
+
+# OnlinePredictors kept by latest_online_predictions (one per series and lookback)
+ONLINE_PREDICTOR_CACHE_SIZE = 32
+
+_predictors: "OrderedDict[Hashable, Any]" = OrderedDict()  # key -> (predictor, last learned timestamp)
+_predictors_lock = threading.Lock()
+
+
+def latest_online_predictions(key: Hashable, ohlcv: OHLCV, lookback: int = 50) -> Dict[str, Any]:
+    """
+    Online predictions for the return after the last candle of ohlcv, maintained incrementally.
+    Every candle but the last is treated as closed and learned once by the OnlinePredictor
+    kept under (key, lookback); the last one is applied to a copy, since a refresh may still
+    revise it. The predictor is reseeded from ohlcv when the series no longer continues it.
+    :param key: Series identity, e.g. (coin_id, timeframe)
+    :param ohlcv: Sorted OHLCV series
+    :raises ValueError: If ohlcv is too short to seed a predictor
+    :return: See OnlinePredictor.predict
+    """
+    n = len(ohlcv)
+    predictor_key = (key, lookback)
+    with _predictors_lock:
+        predictor, last_timestamp = _predictors.get(predictor_key, (None, None))
+        start = n - 1
+        if predictor is not None:
+            # Resume after the last closed candle the predictor has learned, if ohlcv still contains it
+            i = int(np.searchsorted(ohlcv.timestamps, last_timestamp))
+            if i < n - 1 and ohlcv.timestamps[i] == last_timestamp:
+                start = i + 1
+            else:
+                predictor = None
+        if predictor is None:
+            predictor = OnlinePredictor(lookback, ohlcv[:n - 1])
+        for candle in ohlcv[start:n - 1]:
+            predictor.update(candle)
+        _predictors[predictor_key] = (predictor, int(ohlcv.timestamps[n - 2]))
+        _predictors.move_to_end(predictor_key)
+        while len(_predictors) > ONLINE_PREDICTOR_CACHE_SIZE:
+            _predictors.popitem(last=False)
+        return predictor.peek(ohlcv[n - 1])
+
+
+def online_ml_analysis(key: Hashable, ohlc_data: OHLCVLike, lookback_periods: int = 50) -> Dict[str, Any]:
+    """
+    advanced_ml_analysis counterpart backed by latest_online_predictions (there are no
+    cross-validation scores or feature importances to report).
+    :return: Dictionary with 'predictions', 'sample_size' and 'mode', or 'error'
+    """
+    try:
+        result = latest_online_predictions(key, OHLCV.coerce(ohlc_data), lookback_periods)
+    except Exception as e:
+        return {
+            'error': f'Online ML analysis failed: {str(e)}',
+            'predictions': {},
+            'feature_importance': {},
+            'model_scores': {}
+        }
+    return {**result, 'feature_importance': {}, 'model_scores': {}}
@@ -0,0 +1,388 @@
+"""
+Streaming (incremental) indicators.
+
+Each indicator is seeded from history once and then advanced one candle at a
+time with update(), which returns the newest value in O(1) (amortised for the
+stochastic oscillator). Values match the last element of the corresponding
+batch function in indicators.py / ml_indicators.py, with None while the
+indicator is not yet defined.
+
+A candle may be a bare close price or an OHLCV tuple
+(timestamp, open, high, low, close, volume).
+
+latest_indicators() keeps one IndicatorState per key (coin, timeframe and
+indicator parameters) for the refresh paths in insights.py,
+enhanced_insights.py and ml_indicators.py: each refresh feeds only the candles
+closed since the previous one, and the still-forming last candle is applied to
+a copy, so a refresh costs O(new candles + indicator windows) rather than a
+pass over the whole history. The states live in this process only, and the
+least recently used are dropped beyond INDICATOR_STATE_CACHE_SIZE.
+"""
+import copy
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+import numpy as np
+
+from data.series import OHLCV
+
+
+def _close(candle) -> float:
+    if isinstance(candle, (int, float)):
+        return float(candle)
+    return float(candle[4])
+
+
+class StreamingIndicator(ABC):
+    """Base class: seed from history, then update() one candle at a time."""
+
+    def __init__(self):
+        self.value = None
+
+    def seed(self, history: Iterable) -> Any:
+        """Feed a batch of historical candles; return the latest value."""
+        for candle in history:
+            self.update(candle)
+        return self.value
+
+    @abstractmethod
+    def update(self, candle) -> Any:
+        """Advance by one candle and return the newest value."""
+
+
+class _RollingWindow:
+    """Fixed-size window with a running sum that is re-summed once per cycle to cancel drift."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self._nonzero = 0
+        self._since_resum = 0
+
+    def push(self, x: float):
+        if len(self.values) == self.size:
+            oldest = self.values[0]
+            self.total -= oldest
+            self._nonzero -= oldest != 0
+        self.values.append(x)
+        self.total += x
+        self._nonzero += x != 0
+        self._since_resum += 1
+        if self._nonzero == 0:
+            # Keep an all-zero window exactly zero (RSI tests avg_loss == 0)
+            self.total = 0.0
+        elif self._since_resum >= self.size:
+            self.total = sum(self.values)
+            self._since_resum = 0
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+
+class StreamingSMA(StreamingIndicator):
+    """Simple moving average, matching moving_average(prices, window)[-1]."""
+
+    def __init__(self, window: int, history: Optional[Iterable] = None):
+        super().__init__()
+        self.window = _RollingWindow(window)
+        if history is not None:
+            self.seed(history)
+
+    def update(self, candle) -> Optional[float]:
+        self.window.push(_close(candle))
+        self.value = self.window.total / self.window.size if self.window.full else None
+        return self.value
+
+
+class StreamingEMA(StreamingIndicator):
+    """Exponential moving average seeded with the SMA of the first window."""
+
+    def __init__(self, window: int, history: Optional[Iterable] = None):
+        super().__init__()
+        self.window = window
+        self.alpha = 2 / (window + 1)
+        self._seed_values = []
+        if history is not None:
+            self.seed(history)
+
+    def update(self, candle) -> Optional[float]:
+        price = _close(candle)
+        if self.value is None:
+            self._seed_values.append(price)
+            if len(self._seed_values) == self.window:
+                self.value = sum(self._seed_values) / self.window
+                self._seed_values = []
+        else:
+            self.value = self.alpha * price + (1 - self.alpha) * self.value
+        return self.value
+
+
+class StreamingRSI(StreamingIndicator):
+    """RSI over the last period-1 price changes, matching relative_strength_index(prices, period)[-1]."""
+
+    def __init__(self, period: int = 14, history: Optional[Iterable] = None):
+        super().__init__()
+        self.period = period
+        self.gains = _RollingWindow(period - 1)
+        self.losses = _RollingWindow(period - 1)
+        self._prev = None
+        self._count = 0
+        if history is not None:
+            self.seed(history)
+
+    def update(self, candle) -> Optional[float]:
+        price = _close(candle)
+        if self._prev is not None:
+            change = price - self._prev
+            self.gains.push(max(0.0, change))
+            self.losses.push(max(0.0, -change))
+        self._prev = price
+        self._count += 1
+        if self._count <= self.period:
+            self.value = None
+        elif self.losses.total <= 0:
+            self.value = 100.0
+        else:
+            rs = self.gains.total / self.losses.total
+            self.value = 100 - (100 / (1 + rs))
+        return self.value
+
+
+class StreamingBollinger(StreamingIndicator):
+    """Bollinger Bands, matching the last element of bollinger_bands(); value is (upper, middle, lower)."""
+
+    def __init__(self, window: int = 20, std_dev: float = 2, history: Optional[Iterable] = None):
+        super().__init__()
+        self.window = window
+        self.std_dev = std_dev
+        self.prices = deque(maxlen=window)
+        # Sums of (price - ref); ref is re-anchored to the window mean once per
+        # cycle so the sum of squares stays well-conditioned as prices drift.
+        self._ref = 0.0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._since_anchor = 0
+        self.value = (None, None, None)
+        if history is not None:
+            self.seed(history)
+
+    def _reanchor(self):
+        self._ref = sum(self.prices) / len(self.prices)
+        shifted = [p - self._ref for p in self.prices]
+        self._sum = sum(shifted)
+        self._sum_sq = sum(x * x for x in shifted)
+        self._since_anchor = 0
+
+    def update(self, candle) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        price = _close(candle)
+        if len(self.prices) == self.window:
+            oldest = self.prices[0] - self._ref
+            self._sum -= oldest
+            self._sum_sq -= oldest * oldest
+        self.prices.append(price)
+        shifted = price - self._ref
+        self._sum += shifted
+        self._sum_sq += shifted * shifted
+        self._since_anchor += 1
+        if self._since_anchor >= self.window:
+            self._reanchor()
+        if len(self.prices) < self.window:
+            self.value = (None, None, None)
+            return self.value
+        mean = self._sum / self.window
+        std = max(self._sum_sq / self.window - mean * mean, 0.0) ** 0.5
+        middle = mean + self._ref
+        self.value = (middle + self.std_dev * std, middle, middle - self.std_dev * std)
+        return self.value
+
+
+class StreamingMACD(StreamingIndicator):
+    """MACD, matching the last element of macd(); value is (macd_line, signal_line, histogram)."""
+
+    def __init__(self, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9,
+                 history: Optional[Iterable] = None):
+        super().__init__()
+        self.fast = StreamingEMA(fast_period)
+        self.slow = StreamingEMA(slow_period)
+        self.signal = StreamingEMA(signal_period)
+        self.value = (None, None, None)
+        if history is not None:
+            self.seed(history)
+
+    def update(self, candle) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        fast = self.fast.update(candle)
+        slow = self.slow.update(candle)
+        if fast is None or slow is None:
+            self.value = (None, None, None)
+            return self.value
+        line = fast - slow
+        signal = self.signal.update(line)
+        histogram = line - signal if signal is not None else None
+        self.value = (line, signal, histogram)
+        return self.value
+
+
+class StreamingStochastic(StreamingIndicator):
+    """
+    Stochastic oscillator over OHLCV candles, matching the last element of
+    stochastic_oscillator(); value is (%K, %D). Rolling high/low use monotonic
+    deques, so each update is amortised O(1).
+    """
+
+    def __init__(self, k_period: int = 14, d_period: int = 3, history: Optional[Iterable] = None):
+        super().__init__()
+        self.k_period = k_period
+        self._highs = deque()  # (index, high), decreasing highs
+        self._lows = deque()   # (index, low), increasing lows
+        self._index = -1
+        self.d = StreamingSMA(d_period)
+        self.value = (None, None)
+        if history is not None:
+            self.seed(history)
+
+    def update(self, candle) -> Tuple[Optional[float], Optional[float]]:
+        high, low, close = float(candle[2]), float(candle[3]), float(candle[4])
+        self._index += 1
+        i = self._index
+        while self._highs and self._highs[-1][1] <= high:
+            self._highs.pop()
+        self._highs.append((i, high))
+        while self._lows and self._lows[-1][1] >= low:
+            self._lows.pop()
+        self._lows.append((i, low))
+        start = i - self.k_period + 1
+        while self._highs[0][0] < start:
+            self._highs.popleft()
+        while self._lows[0][0] < start:
+            self._lows.popleft()
+        if start < 0:
+            self.value = (None, None)
+            return self.value
+        highest, lowest = self._highs[0][1], self._lows[0][1]
+        if highest == lowest:
+            k = 50.0
+        else:
+            k = (close - lowest) / (highest - lowest) * 100
+        self.value = (k, self.d.update(k))
+        return self.value
+
+
+class IndicatorState:
+    """
+    Bundle of streaming indicators for one coin/timeframe, mirroring what the
+    insight paths compute (MA/RSI, Bollinger, MACD, stochastic).
+
+    extend() accepts a full refreshed candle history and only feeds candles
+    newer than the last one seen, so callers can pass whatever they fetched.
+    """
+
+    def __init__(self, window: int = 14, history: Optional[Iterable] = None, bb_window: int = 20,
+                 bb_std: float = 2, macd_periods: Tuple[int, int, int] = (12, 26, 9), k_period: int = 14,
+                 d_period: int = 3):
+        self.ma = StreamingSMA(window)
+        self.rsi = StreamingRSI(window)
+        self.bollinger = StreamingBollinger(bb_window, bb_std)
+        self.macd = StreamingMACD(*macd_periods)
+        self.stochastic = StreamingStochastic(k_period, d_period)
+        self.last_timestamp = None
+        if history is not None:
+            self.extend(history)
+
+    def update(self, candle) -> Dict[str, Any]:
+        """Advance every indicator by one OHLCV candle and return the latest values."""
+        self.ma.update(candle)
+        self.rsi.update(candle)
+        self.bollinger.update(candle)
+        self.macd.update(candle)
+        self.stochastic.update(candle)
+        self.last_timestamp = candle[0]
+        return self.snapshot()
+
+    def extend(self, candles: Iterable) -> Dict[str, Any]:
+        """Feed only candles newer than the last one seen."""
+        for candle in candles:
+            if self.last_timestamp is None or candle[0] > self.last_timestamp:
+                self.update(candle)
+        return self.snapshot()
+
+    def peek(self, candle) -> Dict[str, Any]:
+        """Values after `candle` without committing it (for a candle that is still forming)."""
+        return copy.deepcopy(self).update(candle)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'ma_value': self.ma.value,
+            'rsi_value': self.rsi.value,
+            'bollinger_bands': self.bollinger.value,
+            'macd': self.macd.value,
+            'stochastic': self.stochastic.value,
+        }
+
+
+# IndicatorState parameters other than the MA/RSI window, with their defaults
+STATE_PARAMS = {'bb_window': 20, 'bb_std': 2, 'macd_periods': (12, 26, 9), 'k_period': 14, 'd_period': 3}
+
+# IndicatorStates kept by latest_indicators (one per series and parameter set)
+INDICATOR_STATE_CACHE_SIZE = 64
+
+_states: "OrderedDict[Hashable, IndicatorState]" = OrderedDict()
+_states_lock = threading.Lock()
+
+
+def _candles(ohlcv: OHLCV, start: int, stop: int):
+    """Rows start..stop-1 as (epoch-ms, open, high, low, close, volume) tuples."""
+    timestamps = ohlcv.timestamps[start:stop].tolist()
+    columns = ohlcv.values[:, start:stop].tolist()
+    return zip(timestamps, *columns)
+
+
+def latest_indicators(key: Hashable, ohlcv: OHLCV, window: int = 14, **params: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    Indicator values at the last two candles of ohlcv, maintained incrementally.
+    Every candle but the last is treated as closed and fed once to the IndicatorState
+    kept under (key, window, params); the last one is applied to a copy, since a
+    refresh may still revise it. The state is rebuilt from ohlcv when the series no
+    longer continues it (a gap, or the data was replaced).
+    Because the state carries history from earlier refreshes, EMA-based values (MACD)
+    match the batch functions run over that longer history.
+    :param key: Series identity, e.g. (coin_id, timeframe)
+    :param ohlcv: Sorted OHLCV series
+    :param window: MA/RSI window
+    :param params: Other IndicatorState parameters (bb_window, bb_std, macd_periods, k_period, d_period)
+    :return: Dict with 'previous' and 'current' snapshots (see IndicatorState.snapshot)
+    """
+    n = len(ohlcv)
+    if n < 2:
+        raise ValueError("latest_indicators needs at least two candles")
+    params = {**STATE_PARAMS, **params}
+    state_key = (key, window, tuple(sorted(params.items())))
+    with _states_lock:
+        state = _states.get(state_key)
+        start = 0
+        if state is not None and state.last_timestamp is not None:
+            # Resume after the last closed candle the state has seen, if ohlcv still contains it
+            i = int(np.searchsorted(ohlcv.timestamps, state.last_timestamp))
+            if i < n - 1 and ohlcv.timestamps[i] == state.last_timestamp:
+                start = i + 1
+            else:
+                state = None
+        if state is None:
+            state = _states[state_key] = IndicatorState(window, **params)
+        _states.move_to_end(state_key)
+        while len(_states) > INDICATOR_STATE_CACHE_SIZE:
+            _states.popitem(last=False)
+        for candle in _candles(ohlcv, start, n - 1):
+            state.update(candle)
+        previous = state.snapshot()
+        current = state.peek(next(_candles(ohlcv, n - 1, n)))
+    return {'previous': previous, 'current': current}
+
+
+def clear_indicator_states():
+    """Drop every incremental indicator state (they are rebuilt on the next refresh)."""
+    with _states_lock:
+        _states.clear()
@@ -0,0 +1,229 @@
+"""
+Parameter sweeps for the trading signal.
+
+Grid- or random-searches the tunable parameters of generate_ml_trading_signals
+(DEFAULT_SIGNAL_PARAMS: indicator periods, signal weights and thresholds)
+by backtesting every combination over one or more historical datasets.
+
+Combinations are grouped by their indicator parameters so each worker
+computes a given Bollinger/MACD/stochastic series once per dataset and reuses
+it for every weight/threshold combination; the per-rule memo also shares
+series between groups that differ in only one indicator. Work is spread over
+a process pool whose workers load the datasets once, at start-up.
+"""
+import csv
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from data.series import OHLCV, OHLCVLike
+from .backtest import bollinger_rule, combine_signals, macd_rule, simulate, stochastic_rule, volume_rule
+from .ml_indicators import DEFAULT_SIGNAL_PARAMS, SIGNAL_WEIGHTS
+
+# Parameters that change the indicator series (the rest only change how they are combined)
+INDICATOR_PARAMS = ('bb_window', 'bb_std', 'macd_periods', 'k_period', 'd_period')
+
+METRIC_COLUMNS = ('total_return', 'buy_and_hold_return', 'max_drawdown', 'n_trades',
+                  'trade_hit_rate', 'signal_hit_rate', 'exposure', 'n_signals')
+
+# Dataset: OHLCV history, or (history, per-bar ensemble ML predictions)
+Dataset = Union[OHLCVLike, Tuple[OHLCVLike, Optional[np.ndarray]]]
+
+# Per-process state, set up by _init_worker
+_datasets: Dict[str, Tuple[OHLCV, Optional[np.ndarray]]] = {}
+_rule_cache: Dict[Tuple, Any] = {}
+
+
+def grid_combinations(space: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """
+    Every combination of the values in `space`, on top of DEFAULT_SIGNAL_PARAMS.
+    :param space: Dict of parameter name -> list of candidate values
+    :return: List of full parameter dicts
+    """
+    names = list(space)
+    return [{**DEFAULT_SIGNAL_PARAMS, **dict(zip(names, values))}
+            for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_combinations(space: Dict[str, List[Any]], n_samples: int, seed: Optional[int] = None,
+                        random_weights: bool = False) -> List[Dict[str, Any]]:
+    """
+    Sample combinations uniformly from `space` (duplicates are dropped).
+    :param n_samples: Number of combinations to draw
+    :param seed: Random seed for reproducible sweeps
+    :param random_weights: Also draw signal weights from a flat Dirichlet over SIGNAL_WEIGHTS' signals
+    :return: List of full parameter dicts
+    """
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    combinations = []
+    seen = set()
+    for _ in range(n_samples):
+        params = {**DEFAULT_SIGNAL_PARAMS, **{name: rng.choice(values) for name, values in space.items()}}
+        if random_weights:
+            draws = np_rng.dirichlet(np.ones(len(SIGNAL_WEIGHTS)))
+            params['weights'] = {name: round(float(w), 4) for name, w in zip(SIGNAL_WEIGHTS, draws)}
+        key = _params_key(params)
+        if key not in seen:
+            seen.add(key)
+            combinations.append(params)
+    return combinations
+
+
+def _params_key(params: Dict[str, Any]) -> Tuple:
+    return tuple((name, tuple(sorted(value.items())) if isinstance(value, dict) else value)
+                 for name, value in sorted(params.items()))
+
+
+def _init_worker(datasets: Dict[str, Dataset]):
+    """Load the datasets into this process and reset the indicator memo."""
+    _datasets.clear()
+    _rule_cache.clear()
+    for name, dataset in datasets.items():
+        if isinstance(dataset, tuple):
+            ohlcv, predictions = dataset
+        else:
+            ohlcv, predictions = dataset, None
+        ohlcv = OHLCV.coerce(ohlcv)
+        if predictions is not None:
+            predictions = np.asarray(predictions, dtype=np.float64)
+        _datasets[name] = (ohlcv, predictions)
+
+
+def _cached_rule(dataset: str, rule: str, args: Tuple, compute):
+    key = (dataset, rule, args)
+    if key not in _rule_cache:
+        _rule_cache[key] = compute()
+    return _rule_cache[key]
+
+
+def _rules_for(dataset: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    ohlcv = _datasets[dataset][0]
+    bb = (params['bb_window'], params['bb_std'])
+    macd_periods = tuple(params['macd_periods'])
+    stoch = (params['k_period'], params['d_period'])
+    return {
+        'bollinger_bands': _cached_rule(dataset, 'bollinger_bands', bb, lambda: bollinger_rule(ohlcv.close, *bb)),
+        'macd': _cached_rule(dataset, 'macd', macd_periods, lambda: macd_rule(ohlcv.close, *macd_periods)),
+        'stochastic': _cached_rule(dataset, 'stochastic', stoch, lambda: stochastic_rule(ohlcv, *stoch)),
+        'volume': _cached_rule(dataset, 'volume', (), lambda: volume_rule(ohlcv)),
+    }
+
+
+def _evaluate_group(combinations: List[Dict[str, Any]], allow_short: bool, fee: float) -> List[Dict[str, Any]]:
+    """Backtest combinations that share indicator parameters; metrics are averaged across datasets."""
+    results = []
+    for params in combinations:
+        per_dataset = []
+        for name, (ohlcv, predictions) in _datasets.items():
+            rules = _rules_for(name, params)
+            recommendation, _ = combine_signals(rules, predictions, params['weights'], params['threshold'],
+                                                params['ml_threshold'])
+            per_dataset.append(simulate(ohlcv.close, recommendation, allow_short=allow_short, fee=fee)['metrics'])
+        metrics = {}
+        for column in METRIC_COLUMNS:
+            values = [m[column] for m in per_dataset if m[column] is not None]
+            metrics[column] = float(np.mean(values)) if values else None
+        results.append({'params': params, 'metrics': metrics})
+    return results
+
+
+def _group_by_indicators(combinations: List[Dict[str, Any]], n_chunks: int) -> List[List[Dict[str, Any]]]:
+    """Group combinations by indicator parameters, splitting large groups so every worker gets work."""
+    groups: Dict[Tuple, List[Dict[str, Any]]] = {}
+    for params in combinations:
+        key = tuple(tuple(v) if isinstance(v, list) else v for v in (params[p] for p in INDICATOR_PARAMS))
+        groups.setdefault(key, []).append(params)
+    chunk_size = max(1, -(-len(combinations) // max(1, n_chunks)))
+    chunks = []
+    for group in groups.values():
+        for start in range(0, len(group), chunk_size):
+            chunks.append(group[start:start + chunk_size])
+    return chunks
+
+
+def run_sweep(datasets: Dict[str, Dataset], space: Dict[str, List[Any]], method: str = 'grid',
+              n_samples: int = 100, seed: Optional[int] = None, random_weights: bool = False,
+              objective: str = 'total_return', n_jobs: Optional[int] = None, allow_short: bool = False,
+              fee: float = 0.0, output_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Backtest parameter combinations and rank them.
+
+    :param datasets: Dict of name -> OHLCV history, or (history, per-bar ML predictions)
+    :param space: Dict of DEFAULT_SIGNAL_PARAMS name -> list of candidate values
+    :param method: 'grid' for every combination, 'random' for n_samples random ones
+    :param n_samples: Number of combinations for random search
+    :param seed: Random seed for random search
+    :param random_weights: With random search, also sample the signal weights
+    :param objective: Metric to rank by, highest first (e.g. 'total_return', 'signal_hit_rate')
+    :param n_jobs: Worker processes (-1 or None for all cores, 1 to run in-process)
+    :param allow_short: Passed to backtest.simulate
+    :param fee: Passed to backtest.simulate
+    :param output_path: Optional CSV path for the ranked results table
+    :return: List of {'rank', 'params', 'metrics'} dicts, best first
+    """
+    if objective not in METRIC_COLUMNS:
+        raise ValueError(f"Unknown objective '{objective}', expected one of {METRIC_COLUMNS}")
+    unknown = set(space) - set(DEFAULT_SIGNAL_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+    if method == 'grid':
+        combinations = grid_combinations(space)
+    elif method == 'random':
+        combinations = random_combinations(space, n_samples, seed, random_weights)
+    else:
+        raise ValueError(f"Unknown sweep method '{method}', expected 'grid' or 'random'")
+
+    if n_jobs is None or n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    chunks = _group_by_indicators(combinations, n_jobs * 4)
+
+    results: List[Dict[str, Any]] = []
+    if n_jobs <= 1:
+        _init_worker(datasets)
+        try:
+            for chunk in chunks:
+                results.extend(_evaluate_group(chunk, allow_short, fee))
+        finally:
+            _datasets.clear()
+            _rule_cache.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(datasets,)) as executor:
+            futures = [executor.submit(_evaluate_group, chunk, allow_short, fee) for chunk in chunks]
+            for future in futures:
+                results.extend(future.result())
+
+    # Stable sort keeps enumeration order among ties; missing metrics rank last
+    results.sort(key=lambda r: r['metrics'][objective] if r['metrics'][objective] is not None else -np.inf,
+                 reverse=True)
+    for rank, result in enumerate(results, start=1):
+        result['rank'] = rank
+    if output_path:
+        write_results(results, output_path)
+    return results
+
+
+def write_results(results: List[Dict[str, Any]], path: str):
+    """Write ranked sweep results as CSV; weights are flattened to w_<signal> columns."""
+    weight_names = list(SIGNAL_WEIGHTS)
+    for result in results:
+        for name in result['params']['weights']:
+            if name not in weight_names:
+                weight_names.append(name)
+    param_names = [name for name in DEFAULT_SIGNAL_PARAMS if name != 'weights']
+    header = ['rank'] + param_names + [f'w_{name}' for name in weight_names] + list(METRIC_COLUMNS)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for result in results:
+            params = result['params']
+            row = [result['rank']]
+            row += ['/'.join(map(str, params[name])) if isinstance(params[name], (tuple, list)) else params[name]
+                    for name in param_names]
+            row += [params['weights'].get(name, 0) for name in weight_names]
+            row += ['' if result['metrics'][c] is None else result['metrics'][c] for c in METRIC_COLUMNS]
+            writer.writerow(row)
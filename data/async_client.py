@@ -0,0 +1,278 @@
+"""
+Concurrent CoinGecko fetcher built on asyncio and httpx.
+
+AsyncPriceClient runs the same loaders as fetch_prices (its step generators,
+so the price store, tail fetches, fallbacks and result shapes are shared) but
+drives them with async I/O: every request of a refresh is issued concurrently,
+capped by a semaphore, so a refresh takes as long as its slowest request
+rather than the sum of all of them. Identical loads within one client, such
+as the 1-day base series behind both '1h' and '24h', are made once.
+
+fetch_bundle_sync() is the entry point for sync code: it fetches a bundle of
+series and pre-fills the in-memory price cache, so the existing
+get_prices_for_timeframe / get_ohlcv_for_timeframe calls that follow are hits.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence
+
+import httpx
+
+from . import fetch_prices as fp
+from . import http_client
+from .rate_limiter import RateLimiter, current_priority, get_rate_limiter
+
+ASYNC_FETCH_CONCURRENCY = int(os.environ.get("ASYNC_FETCH_CONCURRENCY", "8"))
+
+
+class AsyncPriceClient:
+    def __init__(self, max_concurrency: int = ASYNC_FETCH_CONCURRENCY, retries: int = http_client.HTTP_MAX_RETRIES,
+                 backoff_factor: float = http_client.HTTP_BACKOFF_FACTOR,
+                 timeout: float = http_client.DEFAULT_TIMEOUT, limiter: Optional[RateLimiter] = None,
+                 priority: Optional[int] = None):
+        """
+        :param max_concurrency: Requests in flight at once
+        :param retries: Retries per request on transport errors and 429/5xx
+        :param backoff_factor: Exponential backoff base in seconds (Retry-After wins if sent)
+        :param timeout: Per-request timeout in seconds
+        :param limiter: Rate limiter every request takes a token from; 429s pause it for their Retry-After
+        :param priority: Priority of this client's requests at the limiter (defaults to request_priority())
+        """
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.limiter = limiter
+        self.priority = current_priority() if priority is None else priority
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[Any, asyncio.Task] = {}
+
+    async def __aenter__(self) -> "AsyncPriceClient":
+        self._client = httpx.AsyncClient(
+            headers=http_client.DEFAULT_HEADERS,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_concurrency,
+                                max_keepalive_connections=self.max_concurrency),
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._client.aclose()
+        self._client = None
+        self._inflight.clear()
+
+    async def get_json(self, url: str, params: Optional[Dict[str, Any]] = None,
+                       headers: Optional[Dict[str, str]] = None) -> Any:
+        """
+        Async counterpart of http_client.get_json (shares its ETag/Last-Modified validators).
+        :raises httpx.HTTPStatusError: On an error status after retries
+        """
+        key, request_headers, cached = http_client.revalidation_headers(url, params, {**fp.HEADERS, **(headers or {})})
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                await self.limiter.acquire_async(self.priority)
+            try:
+                async with self._semaphore:
+                    resp = await self._client.get(url, params=params, headers=request_headers)
+            except httpx.TransportError:
+                attempt += 1
+                if attempt > self.retries:
+                    raise
+                await asyncio.sleep(http_client.retry_delay(attempt, backoff_factor=self.backoff_factor))
+                continue
+            if resp.status_code in http_client.RETRY_STATUSES and attempt < self.retries:
+                attempt += 1
+                delay = http_client.retry_delay(attempt, resp.headers.get("Retry-After"), self.backoff_factor)
+                if resp.status_code == 429 and self.limiter is not None:
+                    self.limiter.penalize(delay)  # the next acquire waits it out
+                else:
+                    # Sleep outside the semaphore so other requests keep the slots busy
+                    await asyncio.sleep(delay)
+                continue
+            break
+        if resp.status_code == 304 and cached is not None:
+            return http_client.not_modified_body(key, cached)
+        resp.raise_for_status()
+        body = resp.json()
+        http_client.remember_response(key, resp.headers, body)
+        return body
+
+    def _once(self, key, factory):
+        """Share one task between identical requests made through this client."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+        return task
+
+    async def _run_steps(self, steps):
+        """Drive one of fetch_prices' step generators with this client's concurrent requests."""
+        value, error = None, None
+        while True:
+            try:
+                step = steps.throw(error) if error is not None else steps.send(value)
+            except StopIteration as stop:
+                return stop.value
+            value, error = None, None
+            try:
+                if isinstance(step, fp._Load):
+                    value = await self._run_load(step)
+                else:
+                    value = await self.get_json(step.url, params=step.params)
+            except Exception as e:
+                optional = isinstance(step, fp._Request) and step.optional and isinstance(e, httpx.HTTPStatusError)
+                error = None if optional else e
+
+    def _run_load(self, load):
+        return self._once(load.key, lambda: self._run_steps(load.steps()))
+
+    async def market_chart(self, coin_id: str, params: dict):
+        """Async market_chart load: stored window plus tail, or a full fetch."""
+        return await self._run_load(fp._market_chart_load(coin_id, params))
+
+    async def ohlc(self, coin_id: str, days: int):
+        """Async OHLC load: stored window plus tail, or a full fetch."""
+        return await self._run_load(fp._ohlc_load(coin_id, days))
+
+    async def base_series(self, days: int, coin_id: str):
+        """Async fetch_base_series: market_chart at default granularity as degenerate candles."""
+        return await self._run_steps(fp._base_series_steps(days, coin_id))
+
+    async def historical_prices(self, days: int, coin_id: str):
+        """Async fetch_historical_prices, with the same parameter fallbacks (None if all of them fail)."""
+        return await self._once(("prices", coin_id, days),
+                                lambda: self._run_steps(fp._historical_prices_steps(days, coin_id)))
+
+    async def ohlcv_data(self, days: int, coin_id: str):
+        """Async fetch_ohlcv_data: OHLC endpoint first, market_chart candles as fallback."""
+        return await self._once(("ohlcv", coin_id, days),
+                                lambda: self._run_steps(fp._ohlcv_data_steps(days, coin_id)))
+
+    async def prices_for_timeframe(self, timeframe: str, coin_id: str):
+        """Same result as fetch_prices.get_prices_for_timeframe (without the in-memory cache)."""
+        fp._check_timeframe(timeframe)
+        base = await self.base_series(fp.BASE_SERIES_DAYS[timeframe], coin_id)
+        if base:
+            return fp._prices_view(timeframe, base)
+        days, _ = fp.PRICE_TIMEFRAMES[timeframe]
+        data = await self.historical_prices(days, coin_id)
+        return fp._prices_for_timeframe(timeframe, data if data is not None else fp._mock_prices(days, coin_id))
+
+    async def ohlcv_for_timeframe(self, timeframe: str, coin_id: str):
+        """Same result as fetch_prices.get_ohlcv_for_timeframe (without the in-memory cache)."""
+        fp._check_timeframe(timeframe)
+        return fp._ohlcv_for_timeframe(timeframe, await self.ohlcv_data(fp.OHLCV_TIMEFRAME_DAYS[timeframe], coin_id))
+
+
+async def fetch_bundle(coin_ids: Sequence[str], price_timeframes: Sequence[str] = (),
+                       ohlcv_timeframes: Sequence[str] = (), max_concurrency: int = ASYNC_FETCH_CONCURRENCY,
+                       skip_cached: bool = True, priority: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Fetch price and OHLCV series for every coin and timeframe concurrently, paced
+    by the shared CoinGecko rate limiter. Each underlying series is fetched once;
+    timeframe views are cut locally.
+
+    :param coin_ids: CoinGecko coin ids
+    :param price_timeframes: Timeframes for (datetime, price) series
+    :param ohlcv_timeframes: Timeframes for OHLCV series
+    :param max_concurrency: Requests in flight at once
+    :param skip_cached: Leave out series that are fresh in the in-memory price cache
+    :param priority: Rate limiter priority of the requests (defaults to request_priority())
+    :return: Dict with 'prices' and 'ohlcv' (coin -> timeframe -> series), 'series' and 'series_ttl'
+             (price cache key -> underlying series / its TTL), 'errors' and 'elapsed_seconds'
+    """
+    start = time.perf_counter()
+    views = []
+    for coin_id in coin_ids:
+        views += [("prices", coin_id, timeframe) for timeframe in price_timeframes]
+        views += [("ohlcv", coin_id, timeframe) for timeframe in ohlcv_timeframes]
+
+    # Underlying series, keyed like the price cache so shared windows are fetched once
+    jobs = {}
+    for kind, coin_id, timeframe in views:
+        fp._check_timeframe(timeframe)
+        key = fp.price_cache_key(timeframe, coin_id, ohlcv=kind == "ohlcv")
+        if key in jobs or (skip_cached and key in fp._price_cache):
+            continue
+        jobs[key] = (kind, coin_id, timeframe)
+
+    bundle = {'prices': {}, 'ohlcv': {}, 'series': {}, 'series_ttl': {}, 'errors': {}}
+    if jobs:
+        async with AsyncPriceClient(max_concurrency=max_concurrency, limiter=get_rate_limiter(),
+                                    priority=priority) as client:
+            results = await asyncio.gather(*(
+                client.base_series(fp.BASE_SERIES_DAYS[timeframe], coin_id) if kind == "prices"
+                else client.ohlcv_data(fp.OHLCV_TIMEFRAME_DAYS[timeframe], coin_id)
+                for kind, coin_id, timeframe in jobs.values()
+            ), return_exceptions=True)
+        for key, result in zip(jobs, results):
+            if isinstance(result, Exception):
+                kind, coin_id, timeframe = jobs[key]
+                print(f"Concurrent fetch of {kind} {coin_id} ({timeframe}) failed: {result}")
+                bundle['errors'].setdefault(coin_id, {})[key] = str(result)
+            else:
+                kind, _, timeframe = jobs[key]
+                bundle['series'][key] = result
+                bundle['series_ttl'][key] = fp.series_ttl(timeframe, ohlcv=kind == "ohlcv")
+
+    for kind, coin_id, timeframe in views:
+        key = fp.price_cache_key(timeframe, coin_id, ohlcv=kind == "ohlcv")
+        if not bundle['series'].get(key):
+            continue  # fresh in the price cache already, or failed
+        if kind == "prices":
+            view = fp._prices_view(timeframe, bundle['series'][key])
+        else:
+            view = fp._ohlcv_for_timeframe(timeframe, bundle['series'][key])
+        bundle[kind].setdefault(coin_id, {})[timeframe] = view
+    bundle['elapsed_seconds'] = time.perf_counter() - start
+    return bundle
+
+
+def prefill_price_cache(bundle: Dict[str, Any]):
+    """Put a bundle's underlying series into the in-memory price cache (failed OHLCV fetches are skipped)."""
+    for key, series in bundle['series'].items():
+        if series:
+            fp._price_cache.set(key, series, ttl=bundle['series_ttl'][key])
+
+
+def run_sync(coroutine):
+    """Run a coroutine to completion from sync code, even if this thread already runs an event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    outcome = {}
+
+    def runner():
+        try:
+            outcome['result'] = asyncio.run(coroutine)
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=runner)
+    thread.start()
+    thread.join()
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+
+def fetch_bundle_sync(coin_ids: Sequence[str], price_timeframes: Sequence[str] = (),
+                      ohlcv_timeframes: Sequence[str] = (), max_concurrency: int = ASYNC_FETCH_CONCURRENCY,
+                      prefill_cache: bool = True, priority: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Blocking fetch_bundle. With prefill_cache, the fetched series are put in the
+    in-memory price cache so subsequent get_*_for_timeframe calls are served from it.
+    """
+    # Resolve the priority here: run_sync may run the loop on a thread without this context
+    priority = current_priority() if priority is None else priority
+    bundle = run_sync(fetch_bundle(coin_ids, price_timeframes, ohlcv_timeframes, max_concurrency,
+                                   priority=priority))
+    if prefill_cache:
+        prefill_price_cache(bundle)
+    return bundle
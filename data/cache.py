@@ -0,0 +1,170 @@
+"""
+In-memory cache with per-entry TTLs, LRU eviction under a memory budget and
+stale-while-revalidate reads.
+
+An entry is fresh until its TTL runs out, then stale for a further grace
+period: a stale read returns the old value immediately and refreshes it on a
+background thread. Entries past the grace period are reloaded synchronously.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .singleflight import SingleFlight
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 300.0
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory footprint of a cached value in bytes."""
+    if hasattr(value, 'nbytes'):  # OHLCV series and numpy arrays
+        return int(value.nbytes) + sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return sys.getsizeof(value)
+        # Rows are homogeneous (e.g. (datetime, price) tuples); size one and extrapolate
+        first = value[0]
+        row = sys.getsizeof(first)
+        if isinstance(first, (list, tuple)):
+            row += sum(sys.getsizeof(item) for item in first)
+        return sys.getsizeof(value) + row * len(value)
+    return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'fresh_until', 'stale_until')
+
+    def __init__(self, value: Any, size: int, fresh_until: float, stale_until: float):
+        self.value = value
+        self.size = size
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class TTLCache:
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, default_ttl: float = DEFAULT_TTL_SECONDS,
+                 stale_factor: float = 1.0):
+        """
+        :param max_bytes: Memory budget; least recently used entries are evicted beyond it
+        :param default_ttl: Seconds an entry stays fresh when no ttl is given
+        :param stale_factor: Grace period after expiry, as a multiple of the entry's ttl (0 disables)
+        """
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.stale_factor = stale_factor
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._flight = SingleFlight()
+        self._counters = dict.fromkeys(
+            ('hits', 'stale_hits', 'misses', 'evictions', 'expirations', 'refreshes', 'refresh_errors'), 0)
+
+    def get(self, key: Hashable, allow_stale: bool = False) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired."""
+        with self._lock:
+            entry, fresh = self._lookup(key, time.monotonic())
+            if entry is None or (not fresh and not allow_stale):
+                self._counters['misses'] += 1
+                return None
+            self._counters['hits' if fresh else 'stale_hits'] += 1
+            return entry.value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store value for ttl seconds (default_ttl if None), evicting LRU entries over the budget."""
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.monotonic()
+        size = estimate_size(value)
+        with self._lock:
+            self._discard(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = _Entry(value, size, now + ttl, now + ttl * (1 + self.stale_factor))
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._counters['evictions'] += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """
+        Return the cached value, loading it on a miss. A stale value is returned
+        as is while loader refreshes it in the background. Concurrent misses for
+        the same key share one loader call. None results are not cached.
+        """
+        with self._lock:
+            entry, fresh = self._lookup(key, time.monotonic())
+            if entry is not None:
+                self._counters['hits' if fresh else 'stale_hits'] += 1
+                if not fresh and key not in self._refreshing:
+                    self._refreshing.add(key)
+                    threading.Thread(target=self._refresh, args=(key, loader, ttl), daemon=True).start()
+                return entry.value
+            self._counters['misses'] += 1
+        return self._flight.do(key, lambda: self._load(key, loader, ttl))
+
+    def _load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float]) -> Any:
+        value = loader()
+        if value is not None:
+            self.set(key, value, ttl)
+        return value
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float]):
+        try:
+            value = loader()
+            if value is not None:
+                self.set(key, value, ttl)
+            with self._lock:
+                self._counters['refreshes'] += 1
+        except Exception as e:
+            print(f"Background refresh of {key} failed, keeping stale value: {e}")
+            with self._lock:
+                self._counters['refresh_errors'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _lookup(self, key: Hashable, now: float):
+        """(entry, is_fresh) for key, dropping it if past its grace period. Caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, False
+        if now >= entry.stale_until:
+            self._discard(key)
+            self._counters['expirations'] += 1
+            return None, False
+        self._entries.move_to_end(key)
+        return entry, now < entry.fresh_until
+
+    def _discard(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus current entry count and size."""
+        with self._lock:
+            stats = {**self._counters, 'entries': len(self._entries), 'bytes': self._bytes,
+                     'max_bytes': self.max_bytes}
+        stats['coalesced'] = self._flight.stats()['shared']
+        return stats
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() < entry.fresh_until
+
+    def __len__(self) -> int:
+        return len(self._entries)
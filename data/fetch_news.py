@@ -1,4 +1,4 @@
-import requests
+from . import http_client
 
 COINGECKO_API_URL = "https://api.coingecko.com/api/v3"
 BITCOIN_ID = "bitcoin"
@@ -11,9 +11,7 @@ def fetch_bitcoin_news():
     """
     url = f"{COINGECKO_API_URL}/status_updates"
     try:
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
+        data = http_client.get_json(url)
         articles = []
         for item in data.get("status_updates", []):
             project = item.get("project")
@@ -26,6 +24,4 @@ def fetch_bitcoin_news():
     except Exception as e:
         print(f"Error fetching Bitcoin news from CoinGecko: {e}")
         print(f"Request URL: {url}")
-        if 'resp' in locals():
-            print(f"Response content: {resp.text}")
         return []
@@ -1,51 +1,330 @@
-import requests
 import os
-from datetime import datetime, timedelta
+import requests
+import numpy as np
+from .series import OHLCV, PriceSeries
+from . import http_client, resample
+from .cache import TTLCache
+from .singleflight import SingleFlight
+from .rate_limiter import get_rate_limiter
+from .price_store import get_price_store, now_ms
 
 COINGECKO_API_URL = "https://api.coingecko.com/api/v3"
 BITCOIN_ID = "bitcoin"
 
-HEADERS = {"User-Agent": "Mozilla/5.0"}
+# Coins offered in the UI coin selector, screened by analysis.batch by default
+SUPPORTED_COINS = ["bitcoin", "ethereum", "dogecoin", "solana", "ripple"]
+
+HEADERS = {}
 api_key = os.environ.get("COINGECKO_API_KEY")
 if api_key:
     HEADERS["x-cg-pro-api-key"] = api_key
 
-# Simple in-memory cache for price data by timeframe
-_price_cache = {}
+# Random mock prices when CoinGecko cannot be reached, for offline development only
+USE_MOCK_DATA = os.environ.get("TRADING_INSIGHTS_MOCK_DATA", "").lower() in ("1", "true", "yes")
+
+# Memory budget for the in-memory price cache
+PRICE_CACHE_MAX_BYTES = int(os.environ.get("PRICE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+DAY_MS = 24 * 3600 * 1000
+
+# Spacing of each stored series (market_chart granularities and OHLC candle sizes)
+SERIES_STEP_MS = {
+    "5m": 5 * 60 * 1000,
+    "30m": 30 * 60 * 1000,
+    "hourly": 3600 * 1000,
+    "4h": 4 * 3600 * 1000,
+    "daily": DAY_MS,
+    "4d": 4 * DAY_MS,
+}
+
+# `days` values the OHLC endpoint accepts, by the candle size they return
+OHLC_REQUEST_DAYS = {"30m": (1,), "4h": (7, 14, 30), "4d": (90, 180, 365)}
+
+# Seconds cached price data stays fresh, by timeframe (short windows move faster)
+TIMEFRAME_TTL_SECONDS = {"1h": 60, "24h": 300, "7d": 900, "30d": 3600}
+
+# In-memory cache for price and OHLCV data by coin and timeframe
+_price_cache = TTLCache(max_bytes=PRICE_CACHE_MAX_BYTES)
+
+
+# Coalesces concurrent requests for the same endpoint and parameters
+_flight = SingleFlight()
+
 
 def clear_cache():
-    global _price_cache
-    _price_cache = {}
+    _price_cache.clear()
+
 
+def cache_stats():
+    """Hit/miss/eviction counters and size of the in-memory price cache, plus request coalescing and rate limiting."""
+    return {**_price_cache.stats(), 'requests': _flight.stats(), 'rate_limiter': get_rate_limiter().stats()}
 
-def fetch_current_price():
-    """Fetch the current price of Bitcoin in USD."""
+
+def _get_json(url: str, params: dict):
+    """CoinGecko GET, scheduled through the shared rate limiter at the caller's request_priority()."""
+    return http_client.get_json(url, params=params, headers=HEADERS, limiter=get_rate_limiter())
+
+
+# Quotes move constantly; keep them just long enough to absorb repeated lookups
+QUOTE_TTL_SECONDS = 30
+# Coin ids per /simple/price request
+QUOTE_CHUNK_SIZE = 250
+
+
+def _quote_key(coin_id: str, vs_currencies) -> str:
+    return f"{coin_id}:quote:{','.join(vs_currencies)}"
+
+
+def _fetch_quote_chunk(coin_ids, vs_currencies):
     url = f"{COINGECKO_API_URL}/simple/price"
-    params = {"ids": BITCOIN_ID, "vs_currencies": "usd"}
+    params = {
+        "ids": ",".join(coin_ids),
+        "vs_currencies": ",".join(vs_currencies),
+        "include_24hr_change": "true",
+        "include_24hr_vol": "true",
+        "include_last_updated_at": "true",
+    }
     try:
-        resp = requests.get(url, params=params, headers=HEADERS, timeout=10)
-        resp.raise_for_status()
-        return resp.json()[BITCOIN_ID]["usd"]
+        return _get_json(url, params)
     except Exception as e:
-        print(f"Error fetching current price: {e}")
+        print(f"Error fetching quotes for {len(coin_ids)} coins: {e}")
         print(f"Request URL: {url}")
         print(f"Params: {params}")
-        if 'resp' in locals():
-            print(f"Response content: {resp.text}")
+        return {}
+
+
+def fetch_quotes(coin_ids, vs_currencies=("usd",)):
+    """
+    Current quotes for many coins in as few /simple/price requests as possible.
+    Coins quoted within QUOTE_TTL_SECONDS are served from the cache; the rest are
+    requested in chunks of QUOTE_CHUNK_SIZE ids.
+    :param coin_ids: CoinGecko coin ids
+    :param vs_currencies: Quote currencies, e.g. ("usd", "eur")
+    :return: Dict coin id -> CoinGecko quote fields ('usd', 'usd_24h_change', 'usd_24h_vol',
+             'last_updated_at', ...); coins that could not be quoted are left out
+    """
+    vs_currencies = tuple(vs_currencies)
+    quotes = {}
+    missing = []
+    for coin_id in dict.fromkeys(coin_ids):
+        quote = _price_cache.get(_quote_key(coin_id, vs_currencies))
+        if quote is not None:
+            quotes[coin_id] = quote
+        else:
+            missing.append(coin_id)
+    for i in range(0, len(missing), QUOTE_CHUNK_SIZE):
+        chunk = tuple(missing[i:i + QUOTE_CHUNK_SIZE])
+        payload = _flight.do(("quotes", chunk, vs_currencies), lambda: _fetch_quote_chunk(chunk, vs_currencies))
+        for coin_id in chunk:
+            quote = payload.get(coin_id)
+            if quote:
+                _price_cache.set(_quote_key(coin_id, vs_currencies), quote, ttl=QUOTE_TTL_SECONDS)
+                quotes[coin_id] = quote
+    return quotes
+
+
+def fetch_current_price(coin_id: str = BITCOIN_ID, vs_currency: str = "usd"):
+    """Fetch the current price of a coin (Bitcoin by default) in vs_currency."""
+    quote = fetch_quotes([coin_id], (vs_currency,)).get(coin_id)
+    return quote.get(vs_currency) if quote else None
+
+
+# The loaders below are written once as step generators, shared by the blocking
+# path here and the concurrent one in async_client. A generator yields _Request
+# (GET a CoinGecko URL; the JSON body is sent back, or the error thrown in) or
+# _Load (run another loader, shared by concurrent callers with the same key) and
+# returns its result; the driver supplies the I/O.
+
+class _Request:
+    def __init__(self, url: str, params: dict, optional: bool = False):
+        """:param optional: Resolve to None instead of raising on an HTTP error status"""
+        self.url = url
+        self.params = params
+        self.optional = optional
+
+
+class _Load:
+    def __init__(self, key, steps):
+        """
+        :param key: Identity of the load; concurrent loads with the same key share one run
+        :param steps: Zero-argument callable returning the step generator
+        """
+        self.key = key
+        self.steps = steps
+
+
+def _run_steps(steps):
+    """Drive a step generator with blocking requests through the shared rate limiter."""
+    value, error = None, None
+    while True:
+        try:
+            step = steps.throw(error) if error is not None else steps.send(value)
+        except StopIteration as stop:
+            return stop.value
+        value, error = None, None
+        try:
+            if isinstance(step, _Load):
+                value = _run_load(step)
+            else:
+                value = _get_json(step.url, step.params)
+        except Exception as e:
+            optional = isinstance(step, _Request) and step.optional and isinstance(e, requests.HTTPError)
+            error = None if optional else e
+
+
+def _run_load(load: _Load):
+    """Run a load, sharing one run between concurrent callers with the same key."""
+    return _flight.do(load.key, lambda: _run_steps(load.steps()))
+
+
+def _chart_series(params: dict) -> str:
+    """Granularity CoinGecko returns for market_chart params (names the stored series)."""
+    days = params["days"]
+    if params.get("interval") == "hourly":
+        return "hourly"
+    if days <= 1:
+        return "5m"
+    return "hourly" if days <= 90 else "daily"
+
+
+def _ohlc_series(days: int) -> str:
+    """Candle size CoinGecko's OHLC endpoint returns for `days`."""
+    if days <= 2:
+        return "30m"
+    return "4h" if days <= 30 else "4d"
+
+
+def _parse_market_chart(data: dict):
+    """
+    Turn a market_chart response into aligned arrays.
+    :return: (int64 timestamps, (n, 2) float64 array of price and volume) or None if there are no prices
+    """
+    prices = data.get("prices", [])
+    volumes = data.get("total_volumes", [])
+    if not prices:
         return None
+    points = np.asarray(prices, dtype=np.float64)
+    timestamps = points[:, 0].astype(np.int64)
 
+    # Match volumes to price timestamps (missing timestamps get 0)
+    volume = np.zeros(len(timestamps))
+    if volumes:
+        vol_points = np.asarray(volumes, dtype=np.float64)
+        vol_ts = vol_points[:, 0].astype(np.int64)
+        order = np.argsort(vol_ts, kind='stable')
+        vol_ts, vol_values = vol_ts[order], vol_points[order, 1]
+        idx = np.clip(np.searchsorted(vol_ts, timestamps, side='right') - 1, 0, len(vol_ts) - 1)
+        matched = vol_ts[idx] == timestamps
+        volume[matched] = vol_values[idx[matched]]
+    return timestamps, np.column_stack([points[:, 1], volume])
 
-def fetch_historical_prices(days: int, interval: str = "hourly", coin_id: str = "bitcoin"):
+
+def _thin(timestamps: np.ndarray, values: np.ndarray, step_ms: int, after_ms: int):
+    """Keep the first point of each step after after_ms (range tails come back finer than the series)."""
+    steps = np.floor((timestamps - after_ms) / step_ms + 0.05).astype(np.int64)
+    _, first = np.unique(steps, return_index=True)
+    first = first[steps[first] >= 1]
+    return timestamps[first], values[first]
+
+
+def _tail_start(kind: str, coin_id: str, series: str, days: int):
     """
-    Fetch historical prices for a coin with fallback strategies.
-    :param days: Number of days of data (1 for 1d, 7 for 7d, etc.)
-    :param interval: 'hourly' or 'daily'
-    :param coin_id: CoinGecko coin id (e.g., 'bitcoin', 'ethereum')
-    :return: List of (timestamp, price) tuples
+    Last stored timestamp if the price store covers the window ending now, else None (full fetch needed).
     """
-    url = f"{COINGECKO_API_URL}/coins/{coin_id}/market_chart"
-    
-    # Try different parameter combinations based on API limitations
+    store = get_price_store()
+    window_start = now_ms() - days * DAY_MS
+    covered = store.covered_from(kind, coin_id, series)
+    last = store.last_timestamp(kind, coin_id, series)
+    if covered is None or last is None or covered > window_start or last < window_start:
+        return None
+    return last
+
+
+def _needs_tail(series: str, last_ts: int) -> bool:
+    return now_ms() - last_ts >= SERIES_STEP_MS[series]
+
+
+def _tail_failed(kind: str, coin_id: str, series: str, error: Exception):
+    # Stale rows beat a full re-download that would likely fail as well
+    print(f"Tail fetch failed for {coin_id} ({kind} {series}), using stored data: {error}")
+
+
+def _read_window(kind: str, coin_id: str, series: str, days: int):
+    """Stored (timestamps, values) for the window ending now, or None if empty."""
+    timestamps, values = get_price_store().read(kind, coin_id, series, now_ms() - days * DAY_MS)
+    return (timestamps, values) if len(timestamps) else None
+
+
+def _clip_window(timestamps: np.ndarray, values: np.ndarray, days: int):
+    """Rows inside the window ending now, so fresh fetches match what _read_window returns later."""
+    keep = timestamps >= now_ms() - days * DAY_MS
+    return (timestamps[keep], values[keep]) if keep.any() else None
+
+
+def _chart_request(coin_id: str, params: dict):
+    return f"{COINGECKO_API_URL}/coins/{coin_id}/market_chart", params
+
+
+def _chart_range_request(coin_id: str, last_ts: int):
+    range_params = {"vs_currency": "usd", "from": last_ts // 1000 + 1, "to": now_ms() // 1000}
+    return f"{COINGECKO_API_URL}/coins/{coin_id}/market_chart/range", range_params
+
+
+def _ohlc_request(coin_id: str, days: int):
+    return f"{COINGECKO_API_URL}/coins/{coin_id}/ohlc", {"vs_currency": "usd", "days": days}
+
+
+def _save_chart(coin_id: str, series: str, days: int, requested_at: int, payload: dict):
+    """Store a full market_chart response; the window it covers starts `days` before the request."""
+    parsed = _parse_market_chart(payload)
+    if parsed:
+        store = get_price_store()
+        store.write("market_chart", coin_id, series, *parsed)
+        store.set_covered_from("market_chart", coin_id, series, requested_at - days * DAY_MS)
+        parsed = _clip_window(*parsed, days)
+    return parsed
+
+
+def _save_chart_tail(coin_id: str, series: str, last_ts: int, payload: dict):
+    parsed = _parse_market_chart(payload)
+    if parsed:
+        timestamps, values = parsed
+        if series != "5m":
+            timestamps, values = _thin(timestamps, values, SERIES_STEP_MS[series], last_ts)
+        get_price_store().write("market_chart", coin_id, series, timestamps, values)
+
+
+def _market_chart_load(coin_id: str, params: dict) -> _Load:
+    """
+    market_chart prices and volumes for params, from the store plus a tail fetch when possible.
+    Loads resolve to (int64 timestamps, (n, 2) price/volume array) or None if no data.
+    """
+    return _Load(("market_chart", coin_id, tuple(sorted(params.items()))),
+                 lambda: _market_chart_steps(coin_id, params))
+
+
+def _market_chart_steps(coin_id: str, params: dict):
+    series = _chart_series(params)
+    last = _tail_start("market_chart", coin_id, series, params["days"])
+    if last is not None:
+        if _needs_tail(series, last):
+            try:
+                url, range_params = _chart_range_request(coin_id, last)
+                _save_chart_tail(coin_id, series, last, (yield _Request(url, range_params)))
+            except Exception as e:
+                _tail_failed("market_chart", coin_id, series, e)
+        stored = _read_window("market_chart", coin_id, series, params["days"])
+        if stored is not None:
+            return stored
+
+    requested_at = now_ms()
+    url, params = _chart_request(coin_id, params)
+    return _save_chart(coin_id, series, params["days"], requested_at,
+                       (yield _Request(url, params)))
+
+
+def _price_attempts(days: int):
+    """market_chart parameter sets to try in order, based on API limitations."""
     attempts = []
     
     if days <= 1:
@@ -59,38 +338,54 @@ def fetch_historical_prices(days: int, interval: str = "hourly", coin_id: str =
         # Fallback to shorter period if long period fails
         attempts.append({"vs_currency": "usd", "days": 7})
         attempts.append({"vs_currency": "usd", "days": 1, "interval": "hourly"})
-    
+
+    if api_key:
+        # Remove interval parameter if using API key
+        for params in attempts:
+            params.pop("interval", None)
+    return attempts
+
+
+def _price_series(data) -> PriceSeries:
+    timestamps, values = data
+    return PriceSeries(timestamps, values[:, 0])
+
+
+def fetch_historical_prices(days: int, interval: str = "hourly", coin_id: str = "bitcoin"):
+    """
+    Fetch historical prices for a coin with fallback strategies.
+    Windows already in the price store only fetch the tail since the last stored point.
+    :param days: Number of days of data (1 for 1d, 7 for 7d, etc.)
+    :param interval: 'hourly' or 'daily'
+    :param coin_id: CoinGecko coin id (e.g., 'bitcoin', 'ethereum')
+    :return: PriceSeries (iterates as (datetime, price) tuples) or None if every attempt failed
+    """
+    return _run_steps(_historical_prices_steps(days, coin_id))
+
+
+def _historical_prices_steps(days: int, coin_id: str):
+    attempts = _price_attempts(days)
     for i, params in enumerate(attempts):
         try:
-            if api_key:
-                # Remove interval parameter if using API key
-                params.pop("interval", None)
-                
-            resp = requests.get(url, params=params, headers=HEADERS, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()["prices"]
+            data = yield _market_chart_load(coin_id, params)
             
             if data:  # Successfully got data
-                result = [(datetime.fromtimestamp(ts/1000), price) for ts, price in data]
                 if i > 0:  # Used fallback
                     print(f"Used fallback parameters for {coin_id}: {params}")
-                return result
+                return _price_series(data)
                 
         except Exception as e:
             if i == len(attempts) - 1:  # Last attempt failed
                 print(f"All attempts failed for {coin_id} ({days} days): {e}")
-                print(f"Final URL: {url}")
                 print(f"Final params: {params}")
-                if 'resp' in locals():
-                    print(f"Response: {resp.text}")
-                return _generate_mock_data(days, coin_id)
+                return None
             # Continue to next attempt
     
-    return []
+    return None
 
 
 def _generate_mock_data(days: int, coin_id: str = "bitcoin"):
-    """Generate mock price data as ultimate fallback"""
+    """Generate mock price data (only served with TRADING_INSIGHTS_MOCK_DATA set, never cached)"""
     print(f"Generating mock data for {coin_id} ({days} days)")
     
     # Base prices for different coins
@@ -103,129 +398,285 @@ def _generate_mock_data(days: int, coin_id: str = "bitcoin"):
     }
     
     base_price = base_prices.get(coin_id, 45000)
-    current_time = datetime.now()
     data_points = min(days * 24, 168)  # Limit to reasonable number of points
     
-    mock_data = []
-    for i in range(data_points):
-        # Generate some realistic price variation (+/- 3%)
-        import random
-        variation = random.uniform(-0.03, 0.03)
-        price = base_price * (1 + variation)
-        timestamp = current_time - timedelta(hours=data_points - i)
-        mock_data.append((timestamp, price))
-    
-    return mock_data
+    # Hourly points up to now with some realistic price variation (+/- 3%)
+    timestamps = now_ms() - np.arange(data_points, 0, -1, dtype=np.int64) * 3600 * 1000
+    prices = base_price * (1 + np.random.uniform(-0.03, 0.03, data_points))
+    return PriceSeries(timestamps, prices)
+
+
+# Base market_chart series each price timeframe is cut from, by days fetched. At
+# CoinGecko's default granularity 1 day comes in 5-minute points and 30 days hourly.
+BASE_SERIES_DAYS = {"1h": 1, "24h": 1, "7d": 30, "30d": 30}
+TIMEFRAME_WINDOW_MS = {"1h": 3600 * 1000, "24h": DAY_MS, "7d": 7 * DAY_MS, "30d": 30 * DAY_MS}
+BASE_STEP_MS = {1: SERIES_STEP_MS["5m"], 30: SERIES_STEP_MS["hourly"]}
+
+# (days, interval) fetched per price timeframe when the base series is unavailable
+PRICE_TIMEFRAMES = {"1h": (1, "hourly"), "24h": (1, "hourly"), "7d": (7, "hourly"), "30d": (30, "daily")}
+OHLCV_TIMEFRAME_DAYS = {"1h": 1, "24h": 1, "7d": 7, "30d": 30}
+
+
+def price_cache_key(timeframe: str, coin_id: str, ohlcv: bool = False) -> str:
+    """
+    Key of the series behind a timeframe in the in-memory price cache. Timeframes
+    cut from the same series ('1h' and '24h', '7d' and '30d') share one entry.
+    """
+    if ohlcv:
+        return f"{coin_id}:ohlcv:{OHLCV_TIMEFRAME_DAYS[timeframe]}d"
+    return f"{coin_id}:base:{BASE_SERIES_DAYS[timeframe]}d"
+
+
+def series_ttl(timeframe: str, ohlcv: bool = False) -> float:
+    """TTL of the series behind a timeframe: the shortest TTL of the timeframes sharing it."""
+    days_by_timeframe = OHLCV_TIMEFRAME_DAYS if ohlcv else BASE_SERIES_DAYS
+    days = days_by_timeframe[timeframe]
+    return min(TIMEFRAME_TTL_SECONDS[tf] for tf, d in days_by_timeframe.items() if d == days)
+
+
+def _check_timeframe(timeframe: str):
+    if timeframe not in TIMEFRAME_TTL_SECONDS:
+        raise ValueError("Unsupported timeframe. Use '1h', '24h', '7d', or '30d'.")
+
+
+def _base_days(days: int) -> int:
+    """Days of the base series that covers a `days` window."""
+    if days <= 1:
+        return 1
+    return 30 if days <= 30 else days
+
+
+def _base_params(days: int) -> dict:
+    return {"vs_currency": "usd", "days": days}
+
+
+def _window_start(timeframe: str) -> int:
+    return now_ms() - TIMEFRAME_WINDOW_MS[timeframe]
+
+
+def fetch_base_series(days: int, coin_id: str = "bitcoin"):
+    """
+    market_chart points for the last `days` at CoinGecko's default granularity,
+    as degenerate candles (open = high = low = close, rolling 24h volume).
+    :return: OHLCV or None if failed
+    """
+    return _run_steps(_base_series_steps(days, coin_id))
+
+
+def _base_series_steps(days: int, coin_id: str):
+    try:
+        data = yield _market_chart_load(coin_id, _base_params(days))
+    except Exception as e:
+        print(f"Error fetching base series for {coin_id} ({days} days): {e}")
+        return None
+    if not data:
+        return None
+    timestamps, values = data
+    return resample.ticks_to_ohlcv(timestamps, values[:, 0], values[:, 1])
+
+
+def get_base_series(timeframe: str, coin_id: str = "bitcoin"):
+    """Cached base series every view of `timeframe` is cut from (None if it could not be fetched)."""
+    _check_timeframe(timeframe)
+    days = BASE_SERIES_DAYS[timeframe]
+    return _price_cache.get_or_load(price_cache_key(timeframe, coin_id),
+                                    lambda: fetch_base_series(days, coin_id), ttl=series_ttl(timeframe))
+
+
+def _prices_view(timeframe: str, base: OHLCV) -> PriceSeries:
+    view = base.since(_window_start(timeframe))
+    return PriceSeries(view.timestamps, view.close)
 
 
 def get_prices_for_timeframe(timeframe: str, coin_id: str = "bitcoin"):
     """
     Get price data for a given timeframe: '1h', '24h', '7d', or '30d' for a given coin.
-    :return: List of (datetime, price) tuples
+    Cut locally from the cached base series, so switching timeframes needs no
+    request; falls back to a dedicated fetch if the base series is unavailable.
+    :return: PriceSeries (epoch-ms timestamps; iterates as (datetime, price) tuples),
+             empty if no data could be fetched
     """
-    cache_key = f"{coin_id}:{timeframe}"
-    if cache_key in _price_cache:
-        return _price_cache[cache_key]
+    base = get_base_series(timeframe, coin_id)
+    if base:
+        return _prices_view(timeframe, base)
+    days, interval = PRICE_TIMEFRAMES[timeframe]
+    # Failed fetches return None, which is not cached
+    data = _price_cache.get_or_load(f"{coin_id}:prices:{days}d",
+                                    lambda: fetch_historical_prices(days, interval=interval, coin_id=coin_id),
+                                    ttl=TIMEFRAME_TTL_SECONDS[timeframe])
+    return _prices_for_timeframe(timeframe, data if data is not None else _mock_prices(days, coin_id))
+
+
+def get_candles(timeframe: str, coin_id: str = "bitcoin", interval: str = "1h"):
+    """
+    Candles of any interval over a timeframe, resampled locally from the cached base series.
+    :param timeframe: '1h', '24h', '7d', or '30d'
+    :param interval: Candle size: '5m', '15m', '30m', '1h', '4h', '1d', '4d' or '1w' (5m/15m/30m
+                     need the 5-minute base, i.e. a '1h' or '24h' timeframe)
+    :return: OHLCV series or None if the base series could not be fetched
+    """
+    _check_timeframe(timeframe)
+    # Validate before get_base_series, which fetches on a miss
+    step = resample.interval_ms(interval)
+    if step < BASE_STEP_MS[BASE_SERIES_DAYS[timeframe]]:
+        raise ValueError(f"Interval '{interval}' is finer than the base series of the {timeframe} timeframe")
+    base = get_base_series(timeframe, coin_id)
+    if not base:
+        return None
+    # Start on a bucket boundary so the first candle is complete
+    window = base.since(resample.bucket_start(_window_start(timeframe), interval))
+    return resample.resample_ohlcv(window, interval, volume="last")
+
+
+def _mock_prices(days: int, coin_id: str):
+    """Mock series when opted in with TRADING_INSIGHTS_MOCK_DATA, otherwise None."""
+    return _generate_mock_data(days, coin_id) if USE_MOCK_DATA else None
+
+
+def _prices_for_timeframe(timeframe: str, data: PriceSeries) -> PriceSeries:
+    if not data:
+        return PriceSeries.empty()
     if timeframe == "1h":
-        data = fetch_historical_prices(1, interval="hourly", coin_id=coin_id)
-        if data:
-            now = datetime.now()
-            one_hour_ago = now - timedelta(hours=1)
-            result = [(dt, price) for dt, price in data if dt >= one_hour_ago]
-            _price_cache[cache_key] = result
-            return result
-        _price_cache[cache_key] = []
-        return []
-    elif timeframe == "24h":
-        result = fetch_historical_prices(1, interval="hourly", coin_id=coin_id)
-        _price_cache[cache_key] = result
-        return result
-    elif timeframe == "7d":
-        result = fetch_historical_prices(7, interval="hourly", coin_id=coin_id)
-        _price_cache[cache_key] = result
-        return result
-    elif timeframe == "30d":
-        result = fetch_historical_prices(30, interval="daily", coin_id=coin_id)
-        _price_cache[cache_key] = result
-        return result
-    else:
-        raise ValueError("Unsupported timeframe. Use '1h', '24h', '7d', or '30d'.")
+        return data.since(_window_start("1h"))
+    return data
+
+
+def _parse_ohlc(payload):
+    """OHLC data format: [[timestamp, open, high, low, close], ...] -> (n, 5) array or None."""
+    rows = np.array([ohlc[:5] for ohlc in payload if len(ohlc) >= 5], dtype=np.float64).reshape(-1, 5)
+    return rows if len(rows) else None
+
+
+def _ohlc_tail_days(series: str, last_ts: int):
+    """
+    The endpoint has no range form: the shortest window with the same candle size that reaches last_ts.
+    :return: Days to request, or None if the gap is longer than every such window
+    """
+    gap_days = (now_ms() - last_ts + SERIES_STEP_MS[series]) / DAY_MS
+    return next((d for d in OHLC_REQUEST_DAYS[series] if d >= gap_days), None)
+
+
+def _save_ohlc_tail(coin_id: str, series: str, last_ts: int, payload):
+    rows = _parse_ohlc(payload)
+    if rows is not None:
+        rows = rows[rows[:, 0] >= last_ts]  # the stored last candle may still have been forming
+        get_price_store().write("ohlc", coin_id, series, rows[:, 0].astype(np.int64), rows[:, 1:])
+
+
+def _save_ohlc(coin_id: str, series: str, days: int, requested_at: int, payload):
+    rows = _parse_ohlc(payload)
+    if rows is None:
+        return None
+    timestamps, values = rows[:, 0].astype(np.int64), rows[:, 1:]
+    store = get_price_store()
+    store.write("ohlc", coin_id, series, timestamps, values)
+    store.set_covered_from("ohlc", coin_id, series, requested_at - days * DAY_MS)
+    return _clip_window(timestamps, values, days)
+
+
+def _ohlc_load(coin_id: str, days: int) -> _Load:
+    """
+    OHLC candles for the last `days`, from the store plus a tail fetch when possible.
+    Loads resolve to (int64 timestamps, (n, 4) open/high/low/close array) or None if no data.
+    """
+    return _Load(("ohlc", coin_id, days), lambda: _ohlc_steps(coin_id, days))
+
+
+def _ohlc_steps(coin_id: str, days: int):
+    series = _ohlc_series(days)
+    last = _tail_start("ohlc", coin_id, series, days)
+    if last is not None and _needs_tail(series, last):
+        tail_days = _ohlc_tail_days(series, last)
+        if tail_days is None:
+            last = None  # no window of this candle size reaches back to the stored data: refetch it all
+        else:
+            try:
+                url, params = _ohlc_request(coin_id, tail_days)
+                _save_ohlc_tail(coin_id, series, last, (yield _Request(url, params)))
+            except Exception as e:
+                _tail_failed("ohlc", coin_id, series, e)
+    if last is not None:
+        stored = _read_window("ohlc", coin_id, series, days)
+        if stored is not None:
+            return stored
+
+    requested_at = now_ms()
+    url, params = _ohlc_request(coin_id, days)
+    # An error status resolves to None, e.g. not available on the free tier
+    payload = yield _Request(url, params, optional=True)
+    if payload is None:
+        return None
+    return _save_ohlc(coin_id, series, days, requested_at, payload)
+
+
+def _ohlcv_from_ohlc(coin_id: str, data) -> OHLCV:
+    timestamps, rows = data
+    # Note: Volume data not available in OHLC endpoint, set to 0
+    result = OHLCV.from_arrays(timestamps, rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3],
+                               np.zeros(len(timestamps)))
+    print(f"Successfully fetched OHLC data for {coin_id}: {len(result)} data points")
+    return result
+
+
+# resample interval for each stored series name
+_RESAMPLE_INTERVALS = {"5m": "5m", "30m": "30m", "hourly": "1h", "4h": "4h", "daily": "1d", "4d": "4d"}
+
+
+def _chart_candle_interval(days: int) -> str:
+    """
+    Candle size for market_chart data covering `days`: what the OHLC endpoint would
+    return, unless the chart series behind it is coarser than that.
+    """
+    candle = _ohlc_series(days)
+    chart = _chart_series(_base_params(_base_days(days)))
+    return _RESAMPLE_INTERVALS[max(candle, chart, key=SERIES_STEP_MS.get)]
+
+
+def _ohlcv_from_chart(coin_id: str, data, days: int) -> OHLCV:
+    """
+    Aggregate market_chart points into real candles, bucketed like the OHLC endpoint.
+    total_volumes are rolling 24h figures, so each candle keeps the last one.
+    """
+    timestamps, values = data
+    ticks = resample.ticks_to_ohlcv(timestamps, values[:, 0], values[:, 1])
+    result = resample.resample_ohlcv(ticks, _chart_candle_interval(days), volume="last")
+    print(f"Successfully converted market_chart to OHLCV for {coin_id}: {len(result)} data points")
+    return result
 
 
 def fetch_ohlcv_data(days: int, coin_id: str = "bitcoin"):
     """
     Fetch OHLCV (Open, High, Low, Close, Volume) data from CoinGecko API.
     Falls back to market_chart endpoint if OHLC endpoint is unavailable.
+    Windows already in the price store only fetch the tail since the last stored candle.
     
     :param days: Number of days of data to fetch
     :param coin_id: CoinGecko coin id (e.g., 'bitcoin', 'ethereum')
-    :return: List of OHLCV tuples (timestamp, open, high, low, close, volume) or None if failed
+    :return: OHLCV series (int64 epoch-ms timestamps, float64 columns) or None if failed
     """
-    # Try OHLC endpoint first (for paid API users)
-    ohlc_url = f"{COINGECKO_API_URL}/coins/{coin_id}/ohlc"
-    market_chart_url = f"{COINGECKO_API_URL}/coins/{coin_id}/market_chart"
-    
-    # First attempt: Try OHLC endpoint
+    return _run_steps(_ohlcv_data_steps(days, coin_id))
+
+
+def _ohlcv_data_steps(days: int, coin_id: str):
+    # First attempt: Try OHLC endpoint (for paid API users)
     try:
-        params = {"vs_currency": "usd", "days": days}
-        resp = requests.get(ohlc_url, params=params, headers=HEADERS, timeout=10)
-        
-        if resp.status_code == 200:
-            ohlc_data = resp.json()
-            if ohlc_data and len(ohlc_data) > 0:
-                # OHLC data format: [[timestamp, open, high, low, close], ...]
-                result = []
-                for ohlc in ohlc_data:
-                    if len(ohlc) >= 5:
-                        timestamp = datetime.fromtimestamp(ohlc[0]/1000)
-                        # Note: Volume data not available in OHLC endpoint, set to 0
-                        result.append((timestamp, ohlc[1], ohlc[2], ohlc[3], ohlc[4], 0))
-                print(f"Successfully fetched OHLC data for {coin_id}: {len(result)} data points")
-                return result
+        ohlc_data = yield _ohlc_load(coin_id, days)
+        if ohlc_data is not None:
+            return _ohlcv_from_ohlc(coin_id, ohlc_data)
     except Exception as e:
         print(f"OHLC endpoint failed for {coin_id}: {e}")
     
     # Fallback: Use market_chart endpoint to construct OHLCV data
     try:
-        params = {"vs_currency": "usd", "days": days}
-        resp = requests.get(market_chart_url, params=params, headers=HEADERS, timeout=10)
-        resp.raise_for_status()
-        
-        data = resp.json()
-        prices = data.get("prices", [])
-        volumes = data.get("total_volumes", [])
+        # Cut from the base series the price timeframes share
+        data = yield _market_chart_load(coin_id, _base_params(_base_days(days)))
+        data = _clip_window(*data, days) if data else None
         
-        if not prices:
+        if not data:
             print(f"No price data available for {coin_id}")
             return None
         
-        # Convert market_chart data to OHLCV format
-        # Group by time periods to create OHLC data
-        result = []
-        volume_dict = {v[0]: v[1] for v in volumes} if volumes else {}
-        
-        # For market_chart data, we only have single price points
-        # We'll use the price as close and estimate OHLC based on adjacent prices
-        for i, (ts, price) in enumerate(prices):
-            timestamp = datetime.fromtimestamp(ts/1000)
-            volume = volume_dict.get(ts, 0)
-            
-            # Use price as close, estimate others based on local context
-            close_price = price
-            
-            # Look at adjacent prices for OHLC estimation
-            prev_price = prices[i-1][1] if i > 0 else price
-            next_price = prices[i+1][1] if i < len(prices)-1 else price
-            
-            # Simple OHLC estimation from available data
-            open_price = prev_price
-            high_price = max(prev_price, price, next_price)
-            low_price = min(prev_price, price, next_price)
-            
-            result.append((timestamp, open_price, high_price, low_price, close_price, volume))
-        
-        print(f"Successfully converted market_chart to OHLCV for {coin_id}: {len(result)} data points")
-        return result
+        return _ohlcv_from_chart(coin_id, data, days)
         
     except Exception as e:
         print(f"Error fetching OHLCV data for {coin_id}: {e}")
@@ -235,37 +686,25 @@ def fetch_ohlcv_data(days: int, coin_id: str = "bitcoin"):
 def get_ohlcv_for_timeframe(timeframe: str, coin_id: str = "bitcoin"):
     """
     Get OHLCV data for a given timeframe.
+    The underlying series is cached (stale data is served while it is refreshed);
+    the '1h' view is cut locally from the cached 1-day series.
     :param timeframe: '1h', '24h', '7d', or '30d'
     :param coin_id: CoinGecko coin id
-    :return: List of OHLCV tuples (timestamp, open, high, low, close, volume) or None if failed
+    :return: OHLCV series or None if failed
     """
-    cache_key = f"{coin_id}:ohlcv:{timeframe}"
-    if cache_key in _price_cache:
-        return _price_cache[cache_key]
-    
-    if timeframe == "1h":
-        data = fetch_ohlcv_data(1, coin_id=coin_id)
-        if data:
-            now = datetime.now()
-            one_hour_ago = now - timedelta(hours=1)
-            result = [(ts, o, h, l, c, v) for ts, o, h, l, c, v in data if ts >= one_hour_ago]
-            _price_cache[cache_key] = result
-            return result
+    _check_timeframe(timeframe)
+    days = OHLCV_TIMEFRAME_DAYS[timeframe]
+    # Failed fetches return None, which is not cached
+    data = _price_cache.get_or_load(price_cache_key(timeframe, coin_id, ohlcv=True),
+                                    lambda: fetch_ohlcv_data(days, coin_id=coin_id) or None,
+                                    ttl=series_ttl(timeframe, ohlcv=True))
+    return _ohlcv_for_timeframe(timeframe, data)
+
+
+def _ohlcv_for_timeframe(timeframe: str, data):
+    """OHLCV for a timeframe, or None (not cached) if the fetch failed."""
+    if not data:
         return None
-    elif timeframe == "24h":
-        result = fetch_ohlcv_data(1, coin_id=coin_id)
-        if result:
-            _price_cache[cache_key] = result
-        return result
-    elif timeframe == "7d":
-        result = fetch_ohlcv_data(7, coin_id=coin_id)
-        if result:
-            _price_cache[cache_key] = result
-        return result
-    elif timeframe == "30d":
-        result = fetch_ohlcv_data(30, coin_id=coin_id)
-        if result:
-            _price_cache[cache_key] = result
-        return result
-    else:
-        raise ValueError("Unsupported timeframe. Use '1h', '24h', '7d', or '30d'.")
+    if timeframe == "1h":
+        return data.since(_window_start("1h"))
+    return data
@@ -0,0 +1,161 @@
+"""
+Shared HTTP client for the data fetchers.
+
+One pooled requests.Session keeps connections to CoinGecko alive across calls,
+retries idempotent requests with exponential backoff on 429/5xx (honouring
+Retry-After), asks for gzip responses and revalidates repeated requests with
+ETag / Last-Modified so unchanged responses come back as a body-less 304.
+Requests given a RateLimiter take a token from it first and report 429s to it.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .rate_limiter import RateLimiter
+
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", "0.5"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# 429s are retried by get_json, which can hand their Retry-After to a rate limiter
+SESSION_RETRY_STATUSES = (500, 502, 503, 504)
+POOL_MAXSIZE = 16
+DEFAULT_TIMEOUT = 10
+
+# Responses kept for conditional revalidation
+VALIDATOR_CACHE_SIZE = 256
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+_session = None
+_session_lock = threading.Lock()
+_validators: "OrderedDict[Any, Dict[str, Any]]" = OrderedDict()
+_validators_lock = threading.Lock()
+
+
+def build_session(retries: int = HTTP_MAX_RETRIES, backoff_factor: float = HTTP_BACKOFF_FACTOR,
+                  pool_maxsize: int = POOL_MAXSIZE) -> requests.Session:
+    """
+    Create a session with a keep-alive connection pool and retry policy.
+    :param retries: Retries per request on connection errors and SESSION_RETRY_STATUSES
+    :param backoff_factor: Sleep backoff_factor * 2**(n-1) seconds before retry n (Retry-After wins if sent)
+    :param pool_maxsize: Connections kept per host
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=SESSION_RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # hand the final response back so callers see its status
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Shared pooled session."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def get(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+        timeout: float = DEFAULT_TIMEOUT) -> requests.Response:
+    """GET through the shared session (retries included); the response is returned whatever its status."""
+    return get_session().get(url, params=params, headers=headers, timeout=timeout)
+
+
+def revalidation_headers(url: str, params: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]]):
+    """
+    Request headers with If-None-Match / If-Modified-Since for a previously seen response.
+    :return: (validator key, request headers, cached entry or None)
+    """
+    key = (url, tuple(sorted((params or {}).items())))
+    with _validators_lock:
+        cached = _validators.get(key)
+    request_headers = dict(headers or {})
+    if cached is not None:
+        if cached.get("etag"):
+            request_headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            request_headers["If-Modified-Since"] = cached["last_modified"]
+    return key, request_headers, cached
+
+
+def remember_response(key, response_headers, body: Any):
+    """Keep body and its validators (if the server sent any) for revalidating the next request."""
+    etag = response_headers.get("ETag")
+    last_modified = response_headers.get("Last-Modified")
+    with _validators_lock:
+        if etag or last_modified:
+            _validators[key] = {"etag": etag, "last_modified": last_modified, "body": body}
+            _validators.move_to_end(key)
+            while len(_validators) > VALIDATOR_CACHE_SIZE:
+                _validators.popitem(last=False)
+        else:
+            _validators.pop(key, None)
+
+
+def not_modified_body(key, cached: Dict[str, Any]) -> Any:
+    with _validators_lock:
+        if key in _validators:
+            _validators.move_to_end(key)
+    return cached["body"]
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None, backoff_factor: float = HTTP_BACKOFF_FACTOR) -> float:
+    """Seconds to wait before retry number `attempt` (1-based): Retry-After if given, else exponential backoff."""
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+    return backoff_factor * (2 ** (attempt - 1))
+
+
+def get_json(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+             timeout: float = DEFAULT_TIMEOUT, limiter: Optional[RateLimiter] = None) -> Any:
+    """
+    GET and decode JSON, revalidating with If-None-Match / If-Modified-Since when
+    an earlier response carried an ETag or Last-Modified header.
+    :param limiter: Rate limiter to take a token from before each attempt; 429s pause it for their Retry-After
+    :raises requests.HTTPError: On an error status after retries
+    :return: Decoded JSON (the cached body on 304 Not Modified)
+    """
+    key, request_headers, cached = revalidation_headers(url, params, headers)
+    attempt = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+        resp = get(url, params=params, headers=request_headers, timeout=timeout)
+        if resp.status_code != 429 or attempt >= HTTP_MAX_RETRIES:
+            break
+        attempt += 1
+        delay = retry_delay(attempt, resp.headers.get("Retry-After"))
+        if limiter is not None:
+            limiter.penalize(delay)  # the next acquire() waits it out, along with every other request
+        else:
+            time.sleep(delay)
+    if resp.status_code == 304 and cached is not None:
+        return not_modified_body(key, cached)
+    resp.raise_for_status()
+    body = resp.json()
+    remember_response(key, resp.headers, body)
+    return body
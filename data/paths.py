@@ -0,0 +1,14 @@
+import os
+
+# Root directory for on-disk caches (models, price store, LLM responses)
+CACHE_ROOT = os.environ.get(
+    "TRADING_INSIGHTS_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "trading-insights"),
+)
+
+
+def cache_dir(*parts: str) -> str:
+    """Return (and create) a directory under CACHE_ROOT."""
+    path = os.path.join(CACHE_ROOT, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
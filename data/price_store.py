@@ -0,0 +1,149 @@
+"""
+Persistent local store for fetched price and OHLCV series.
+
+Rows live in SQLite under the cache root, keyed by (coin, series, timestamp),
+where the series names the endpoint and granularity the rows came from (e.g.
+'hourly' market_chart points or '4h' OHLC candles) so data of different
+resolutions never mixes. Each series also records the earliest timestamp it
+has complete coverage from, which lets callers fetch only the missing tail
+after the last stored row instead of re-downloading the whole window.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from .paths import cache_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS market_chart (
+    coin_id TEXT NOT NULL,
+    series TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    price REAL NOT NULL,
+    volume REAL NOT NULL,
+    PRIMARY KEY (coin_id, series, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ohlc (
+    coin_id TEXT NOT NULL,
+    series TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    open REAL NOT NULL,
+    high REAL NOT NULL,
+    low REAL NOT NULL,
+    close REAL NOT NULL,
+    PRIMARY KEY (coin_id, series, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    coin_id TEXT NOT NULL,
+    series TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    covered_from INTEGER NOT NULL,
+    PRIMARY KEY (coin_id, series, kind)
+);
+"""
+
+# Value columns per table, in storage order
+TABLE_COLUMNS = {
+    'market_chart': ('price', 'volume'),
+    'ohlc': ('open', 'high', 'low', 'close'),
+}
+
+# Rows older than this are pruned on write
+DEFAULT_RETENTION_MS = 400 * 24 * 3600 * 1000
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class PriceStore:
+    def __init__(self, path: Optional[str] = None, retention_ms: int = DEFAULT_RETENTION_MS):
+        """
+        :param path: SQLite file; defaults to <cache root>/prices/prices.sqlite3
+        :param retention_ms: Rows older than this are pruned on write
+        """
+        self.path = path or os.path.join(cache_dir("prices"), "prices.sqlite3")
+        self.retention_ms = retention_ms
+        # One connection shared by fetch threads, serialised by the lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def read(self, kind: str, coin_id: str, series: str, since_ms: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Stored rows at or after since_ms, oldest first.
+        :param kind: 'market_chart' or 'ohlc'
+        :return: (int64 timestamps, float64 values of shape (n, n_columns))
+        """
+        columns = TABLE_COLUMNS[kind]
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT ts, {', '.join(columns)} FROM {kind} WHERE coin_id = ? AND series = ? AND ts >= ? ORDER BY ts",
+                (coin_id, series, int(since_ms)),
+            ).fetchall()
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty((0, len(columns)))
+        table = np.asarray(rows, dtype=np.float64)
+        return table[:, 0].astype(np.int64), table[:, 1:]
+
+    def write(self, kind: str, coin_id: str, series: str, timestamps: np.ndarray, values: np.ndarray):
+        """Insert or replace rows (a re-fetched, still-forming candle overwrites the stored one)."""
+        if len(timestamps) == 0:
+            return
+        columns = TABLE_COLUMNS[kind]
+        placeholders = ", ".join("?" * (len(columns) + 3))
+        rows = [(coin_id, series, int(ts), *row) for ts, row in
+                zip(np.asarray(timestamps, dtype=np.int64).tolist(), np.asarray(values, dtype=np.float64).tolist())]
+        with self._lock, self._conn:
+            self._conn.executemany(f"INSERT OR REPLACE INTO {kind} VALUES ({placeholders})", rows)
+            self._conn.execute(f"DELETE FROM {kind} WHERE coin_id = ? AND series = ? AND ts < ?",
+                               (coin_id, series, now_ms() - self.retention_ms))
+
+    def last_timestamp(self, kind: str, coin_id: str, series: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT MAX(ts) FROM {kind} WHERE coin_id = ? AND series = ?",
+                                     (coin_id, series)).fetchone()
+        return row[0] if row and row[0] is not None else None
+
+    def covered_from(self, kind: str, coin_id: str, series: str) -> Optional[int]:
+        """Earliest timestamp from which the stored series has no gaps, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT covered_from FROM coverage WHERE coin_id = ? AND series = ? AND kind = ?",
+                                     (coin_id, series, kind)).fetchone()
+        return row[0] if row else None
+
+    def set_covered_from(self, kind: str, coin_id: str, series: str, start_ms: int):
+        """Record a complete fetch from start_ms; an existing, earlier start is kept."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO coverage VALUES (?, ?, ?, ?) ON CONFLICT (coin_id, series, kind) "
+                "DO UPDATE SET covered_from = MIN(covered_from, excluded.covered_from)",
+                (coin_id, series, kind, int(start_ms)),
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = {kind: self._conn.execute(f"SELECT COUNT(*) FROM {kind}").fetchone()[0] for kind in TABLE_COLUMNS}
+        return {'path': self.path, 'rows': counts, 'bytes': os.path.getsize(self.path)}
+
+    def clear(self):
+        with self._lock, self._conn:
+            for kind in (*TABLE_COLUMNS, 'coverage'):
+                self._conn.execute(f"DELETE FROM {kind}")
+
+
+_default_store = None
+
+
+def get_price_store() -> PriceStore:
+    """Shared PriceStore in the default cache directory."""
+    global _default_store
+    if _default_store is None:
+        _default_store = PriceStore()
+    return _default_store
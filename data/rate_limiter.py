@@ -0,0 +1,227 @@
+"""
+Token-bucket request scheduler for the CoinGecko API.
+
+Every CoinGecko request takes a token from one shared bucket that refills at
+the plan's rate limit, so a burst of fetches is spread out instead of running
+into 429s. Requests waiting for a token are served by priority (the chart on
+screen before background prefetch), then in arrival order. A 429 pauses the
+whole bucket for its Retry-After, so requests already queued wait it out
+rather than each being rejected in turn.
+
+The priority of a request comes from the request_priority() context, so call
+sites pick it without threading an argument through every loader. The context
+can also cap how long its requests wait for tokens, for fetches made on the GUI
+thread that should give up rather than sit out a long 429 pause.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+PRIORITY_INTERACTIVE = 0  # data the user is looking at
+PRIORITY_NORMAL = 1
+PRIORITY_PREFETCH = 2  # background prefetch and batch screens
+
+# (requests per minute, burst) by CoinGecko plan
+TIER_LIMITS = {"free": (30, 5), "pro": (500, 50)}
+COINGECKO_TIER = "pro" if os.environ.get("COINGECKO_API_KEY") else "free"
+COINGECKO_RATE_LIMIT = int(os.environ.get("COINGECKO_RATE_LIMIT", str(TIER_LIMITS[COINGECKO_TIER][0])))
+
+_priority = contextvars.ContextVar("request_priority", default=PRIORITY_NORMAL)
+_deadline = contextvars.ContextVar("request_deadline", default=None)  # time.monotonic() value
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+@contextmanager
+def request_priority(priority: int, max_wait: Optional[float] = None):
+    """
+    Run the requests made inside the block at the given priority.
+    :param max_wait: Seconds the block's requests may wait for tokens in total; acquire() raises
+                     TimeoutError once they are used up (an enclosing block's limit still applies)
+    """
+    deadline = _deadline.get()
+    if max_wait is not None:
+        own = time.monotonic() + max_wait
+        deadline = own if deadline is None else min(deadline, own)
+    token = _priority.set(priority)
+    deadline_token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(deadline_token)
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+class RateLimiter:
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        """
+        :param rate_per_minute: Sustained requests per minute
+        :param burst: Bucket capacity, i.e. requests allowed back to back after an idle period
+        """
+        self.rate_per_minute = rate_per_minute
+        self.burst = max(1, burst)
+        self._rate = rate_per_minute / 60.0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._queue = []  # heap of (priority, sequence) tickets
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._async_waiters = {}  # asyncio future -> its loop, woken by _notify()
+        self._counters = {'acquired': 0, 'throttled': 0, 'timeouts': 0, 'max_queue_depth': 0,
+                          'wait_seconds_total': 0.0, 'wait_seconds_max': 0.0}
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def _notify(self):
+        """Wake every waiter to re-check its turn. Caller holds the lock."""
+        self._cond.notify_all()
+        for waiter, loop in self._async_waiters.items():
+            loop.call_soon_threadsafe(_wake, waiter)
+        self._async_waiters.clear()
+
+    def _enqueue(self, priority: Optional[int]):
+        ticket = (current_priority() if priority is None else priority, next(self._sequence))
+        heapq.heappush(self._queue, ticket)
+        self._counters['max_queue_depth'] = max(self._counters['max_queue_depth'], len(self._queue))
+        return ticket
+
+    def _dequeue(self, ticket):
+        """Withdraw a ticket that gave up waiting. Caller holds the lock."""
+        if ticket in self._queue:
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+            self._notify()
+
+    def _try_acquire(self, ticket, start: float):
+        """
+        Take a token for ticket if it heads the queue and one is available. Caller holds the lock.
+        :return: (seconds waited, None) if granted, else (None, seconds until a token is due,
+                 or None while another ticket is ahead)
+        """
+        now = time.monotonic()
+        self._refill(now)
+        if self._queue[0] != ticket:
+            return None, None
+        if now >= self._paused_until and self._tokens >= 1:
+            heapq.heappop(self._queue)
+            self._tokens -= 1
+            waited = now - start
+            self._counters['acquired'] += 1
+            self._counters['wait_seconds_total'] += waited
+            self._counters['wait_seconds_max'] = max(self._counters['wait_seconds_max'], waited)
+            self._notify()
+            return waited, None
+        return None, max(self._paused_until - now, (1 - self._tokens) / self._rate)
+
+    def acquire(self, priority: Optional[int] = None, timeout: Optional[float] = None) -> float:
+        """
+        Block until a token is available and no request of higher priority is waiting.
+        :param priority: Lower is served first; defaults to the request_priority() context
+        :param timeout: Give up after this many seconds; defaults to what is left of the
+                        request_priority() context's max_wait, if any
+        :raises TimeoutError: If timeout passes before a token is granted
+        :return: Seconds waited
+        """
+        start = time.monotonic()
+        deadline = _deadline.get() if timeout is None else start + timeout
+        with self._cond:
+            ticket = self._enqueue(priority)
+            try:
+                while True:
+                    waited, delay = self._try_acquire(ticket, start)
+                    if waited is not None:
+                        return waited
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._counters['timeouts'] += 1
+                            raise TimeoutError(f"No request slot within {timeout}s" if timeout is not None
+                                               else "No request slot before the request_priority() deadline")
+                        delay = remaining if delay is None else min(delay, remaining)
+                    self._cond.wait(delay)
+            except BaseException:
+                self._dequeue(ticket)
+                raise
+
+    async def acquire_async(self, priority: Optional[int] = None) -> float:
+        """
+        acquire() for coroutines. Waits on an asyncio future rather than a thread, and
+        cancelling the coroutine withdraws its place in the queue.
+        """
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        with self._cond:
+            ticket = self._enqueue(priority)
+        try:
+            while True:
+                with self._cond:
+                    waited, delay = self._try_acquire(ticket, start)
+                    if waited is not None:
+                        return waited
+                    waiter = loop.create_future()
+                    self._async_waiters[waiter] = loop
+                try:
+                    await asyncio.wait_for(waiter, delay)
+                except asyncio.TimeoutError:
+                    pass  # a token is due; check again
+                finally:
+                    with self._cond:
+                        self._async_waiters.pop(waiter, None)
+        except BaseException:
+            with self._cond:
+                self._dequeue(ticket)
+            raise
+
+    def penalize(self, seconds: float):
+        """Record a 429 and hold every request back for `seconds` (the response's Retry-After)."""
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = 0.0
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._counters['throttled'] += 1
+            self._notify()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus current queue depth, tokens and remaining pause."""
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            acquired = self._counters['acquired']
+            return {
+                **self._counters,
+                'queue_depth': len(self._queue),
+                'wait_seconds_avg': self._counters['wait_seconds_total'] / acquired if acquired else 0.0,
+                'tokens': self._tokens,
+                'paused_seconds': max(0.0, self._paused_until - now),
+                'rate_per_minute': self.rate_per_minute,
+            }
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Shared limiter for CoinGecko, sized to the plan (pro when COINGECKO_API_KEY is set)."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter(COINGECKO_RATE_LIMIT, TIER_LIMITS[COINGECKO_TIER][1])
+    return _limiter
@@ -0,0 +1,81 @@
+"""
+Vectorized OHLCV resampling.
+
+Candles of any supported interval are aggregated from a finer series in one
+pass over its timestamp array: rows are bucketed by floor((ts - origin) /
+interval), and each bucket's open is its first open, high the max, low the
+min, close the last close and volume the sum (or the last value for rolling
+volumes such as CoinGecko's 24h total_volumes). Output timestamps are bucket
+start times in epoch ms.
+"""
+from typing import Optional
+
+import numpy as np
+
+from .series import OHLCV
+
+MINUTE_MS = 60 * 1000
+HOUR_MS = 60 * MINUTE_MS
+DAY_MS = 24 * HOUR_MS
+
+INTERVAL_MS = {
+    "5m": 5 * MINUTE_MS,
+    "15m": 15 * MINUTE_MS,
+    "30m": 30 * MINUTE_MS,
+    "1h": HOUR_MS,
+    "4h": 4 * HOUR_MS,
+    "1d": DAY_MS,
+    "4d": 4 * DAY_MS,
+    "1w": 7 * DAY_MS,
+}
+
+# Bucket origins: the epoch (UTC midnight) for all but weeks, which start on Monday 1970-01-05
+INTERVAL_ORIGIN_MS = {"1w": 4 * DAY_MS}
+
+
+def interval_ms(interval: str) -> int:
+    if interval not in INTERVAL_MS:
+        raise ValueError(f"Unsupported interval '{interval}'. Use one of {', '.join(INTERVAL_MS)}.")
+    return INTERVAL_MS[interval]
+
+
+def bucket_start(epoch_ms: int, interval: str) -> int:
+    """Start of the interval bucket containing epoch_ms."""
+    step = interval_ms(interval)
+    origin = INTERVAL_ORIGIN_MS.get(interval, 0)
+    return (epoch_ms - origin) // step * step + origin
+
+
+def ticks_to_ohlcv(timestamps: np.ndarray, prices: np.ndarray, volumes: Optional[np.ndarray] = None) -> OHLCV:
+    """Point prices as degenerate candles (open = high = low = close), ready for resampling."""
+    prices = np.asarray(prices, dtype=np.float64)
+    volumes = np.zeros(len(prices)) if volumes is None else volumes
+    return OHLCV.from_arrays(np.asarray(timestamps, dtype=np.int64), prices, prices, prices, prices, volumes)
+
+
+def resample_ohlcv(ohlcv: OHLCV, interval: str, volume: str = "sum") -> OHLCV:
+    """
+    Aggregate a sorted OHLCV series into `interval` candles.
+    :param ohlcv: Source series, finer than `interval`
+    :param interval: One of INTERVAL_MS ('5m', '15m', '30m', '1h', '4h', '1d', '4d', '1w')
+    :param volume: 'sum' for per-candle volumes, 'last' for rolling volumes
+    :return: OHLCV with one candle per non-empty bucket, stamped with the bucket start
+    """
+    if volume not in ("sum", "last"):
+        raise ValueError("volume must be 'sum' or 'last'")
+    step = interval_ms(interval)
+    if len(ohlcv) == 0:
+        return OHLCV.empty()
+    origin = INTERVAL_ORIGIN_MS.get(interval, 0)
+    buckets = (ohlcv.timestamps - origin) // step
+    starts = np.flatnonzero(np.concatenate([[True], buckets[1:] != buckets[:-1]]))
+    ends = np.concatenate([starts[1:], [len(ohlcv)]]) - 1
+    volumes = np.add.reduceat(ohlcv.volume, starts) if volume == "sum" else ohlcv.volume[ends]
+    return OHLCV.from_arrays(
+        buckets[starts] * step + origin,
+        ohlcv.open[starts],
+        np.maximum.reduceat(ohlcv.high, starts),
+        np.minimum.reduceat(ohlcv.low, starts),
+        ohlcv.close[ends],
+        volumes,
+    )
@@ -0,0 +1,217 @@
+"""
+Columnar containers for market data.
+
+OHLCV stores candles as a struct of arrays: int64 epoch-millisecond
+timestamps plus one contiguous float64 row per open/high/low/close/volume
+column. Column access and slicing return views, never copies.
+
+For backward compatibility an OHLCV still behaves like the old list of
+(datetime, open, high, low, close, volume) tuples: len(), truthiness,
+integer indexing and iteration all yield such tuples.
+
+PriceSeries does the same for (datetime, price) series. Timestamps stay
+int64 epoch ms (datetime64[ms] on request) until something displays them.
+"""
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+import numpy as np
+
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(5)
+
+
+def _to_epoch_ms(ts) -> int:
+    if isinstance(ts, datetime):
+        return int(round(ts.timestamp() * 1000))
+    return int(ts)
+
+
+class OHLCV:
+    """Struct-of-arrays candle series with zero-copy column views."""
+
+    __slots__ = ('timestamps', 'values')
+
+    def __init__(self, timestamps, values):
+        """
+        :param timestamps: int64 array of epoch milliseconds, shape (n,)
+        :param values: float64 array of shape (5, n), rows open/high/low/close/volume
+        """
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float64)
+        if self.values.shape != (5, self.timestamps.shape[0]):
+            raise ValueError(f"OHLCV values must have shape (5, {self.timestamps.shape[0]}), got {self.values.shape}")
+
+    @classmethod
+    def from_arrays(cls, timestamps, open, high, low, close, volume) -> "OHLCV":
+        """Build from separate column arrays (copied into one contiguous block)."""
+        return cls(timestamps, np.vstack([open, high, low, close, volume]).astype(np.float64, copy=False))
+
+    @classmethod
+    def from_tuples(cls, rows: Iterable[Sequence]) -> "OHLCV":
+        """Build from (timestamp, open, high, low, close, volume) rows; timestamp may be a datetime or epoch ms."""
+        rows = list(rows)
+        if not rows:
+            return cls.empty()
+        timestamps = np.fromiter((_to_epoch_ms(row[0]) for row in rows), dtype=np.int64, count=len(rows))
+        values = np.array([row[1:6] for row in rows], dtype=np.float64).T
+        return cls(timestamps, np.ascontiguousarray(values))
+
+    @classmethod
+    def empty(cls) -> "OHLCV":
+        return cls(np.empty(0, dtype=np.int64), np.empty((5, 0)))
+
+    @classmethod
+    def coerce(cls, data: "OHLCVLike") -> Optional["OHLCV"]:
+        """Return data as an OHLCV, converting a list of tuples if needed."""
+        if data is None or isinstance(data, cls):
+            return data
+        return cls.from_tuples(data)
+
+    @classmethod
+    def concat(cls, items: Iterable[Optional["OHLCV"]]) -> "OHLCV":
+        """Concatenate several series, skipping None and empty ones."""
+        parts = [cls.coerce(item) for item in items if item is not None and len(item)]
+        if not parts:
+            return cls.empty()
+        return cls(np.concatenate([p.timestamps for p in parts]),
+                   np.concatenate([p.values for p in parts], axis=1))
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.values[OPEN]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.values[HIGH]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.values[LOW]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.values[CLOSE]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.values[VOLUME]
+
+    @property
+    def nbytes(self) -> int:
+        return self.timestamps.nbytes + self.values.nbytes
+
+    def datetimes(self) -> List[datetime]:
+        """Materialise timestamps as datetime objects (for display only)."""
+        return [datetime.fromtimestamp(ts / 1000) for ts in self.timestamps.tolist()]
+
+    def datetime64(self) -> np.ndarray:
+        """Timestamps as a datetime64[ms] view (UTC)."""
+        return self.timestamps.view('datetime64[ms]')
+
+    def since(self, epoch_ms: int) -> "OHLCV":
+        """View of the candles at or after epoch_ms (timestamps are sorted)."""
+        start = int(np.searchsorted(self.timestamps, epoch_ms, side='left'))
+        return self[start:]
+
+    def to_tuples(self) -> List[Tuple]:
+        return list(self)
+
+    def __len__(self) -> int:
+        return self.timestamps.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return OHLCV(self.timestamps[index], self.values[:, index])
+        o, h, l, c, v = self.values[:, index].tolist()
+        return (datetime.fromtimestamp(int(self.timestamps[index]) / 1000), o, h, l, c, v)
+
+    def __iter__(self):
+        columns = self.values.tolist()
+        for i, ts in enumerate(self.timestamps.tolist()):
+            yield (datetime.fromtimestamp(ts / 1000), columns[0][i], columns[1][i],
+                   columns[2][i], columns[3][i], columns[4][i])
+
+    def __repr__(self) -> str:
+        if not len(self):
+            return "OHLCV(n=0)"
+        return (f"OHLCV(n={len(self)}, start={int(self.timestamps[0])}, "
+                f"end={int(self.timestamps[-1])}, last_close={float(self.close[-1])})")
+
+
+class PriceSeries:
+    """Struct-of-arrays (timestamp, price) series."""
+
+    __slots__ = ('timestamps', 'prices')
+
+    def __init__(self, timestamps, prices):
+        """
+        :param timestamps: int64 array of epoch milliseconds, shape (n,)
+        :param prices: float64 array, shape (n,)
+        """
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.prices = np.asarray(prices, dtype=np.float64)
+        if self.prices.shape != self.timestamps.shape:
+            raise ValueError(f"PriceSeries prices must have shape {self.timestamps.shape}, got {self.prices.shape}")
+
+    @classmethod
+    def from_tuples(cls, rows: Iterable[Sequence]) -> "PriceSeries":
+        """Build from (timestamp, price) rows; timestamp may be a datetime or epoch ms."""
+        rows = list(rows)
+        if not rows:
+            return cls.empty()
+        timestamps = np.fromiter((_to_epoch_ms(row[0]) for row in rows), dtype=np.int64, count=len(rows))
+        return cls(timestamps, np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows)))
+
+    @classmethod
+    def empty(cls) -> "PriceSeries":
+        return cls(np.empty(0, dtype=np.int64), np.empty(0))
+
+    @classmethod
+    def coerce(cls, data: "PriceSeriesLike") -> Optional["PriceSeries"]:
+        """Return data as a PriceSeries, converting a list of tuples if needed."""
+        if data is None or isinstance(data, cls):
+            return data
+        return cls.from_tuples(data)
+
+    @property
+    def nbytes(self) -> int:
+        return self.timestamps.nbytes + self.prices.nbytes
+
+    def datetimes(self) -> List[datetime]:
+        """Materialise timestamps as datetime objects (for display only)."""
+        return [datetime.fromtimestamp(ts / 1000) for ts in self.timestamps.tolist()]
+
+    def datetime64(self) -> np.ndarray:
+        """Timestamps as a datetime64[ms] view (UTC)."""
+        return self.timestamps.view('datetime64[ms]')
+
+    def since(self, epoch_ms: int) -> "PriceSeries":
+        """Points at or after epoch_ms (works on unsorted series too)."""
+        mask = self.timestamps >= epoch_ms
+        if mask.all():
+            return self
+        return PriceSeries(self.timestamps[mask], self.prices[mask])
+
+    def to_tuples(self) -> List[Tuple]:
+        return list(self)
+
+    def __len__(self) -> int:
+        return self.timestamps.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PriceSeries(self.timestamps[index], self.prices[index])
+        return (datetime.fromtimestamp(int(self.timestamps[index]) / 1000), float(self.prices[index]))
+
+    def __iter__(self):
+        for ts, price in zip(self.timestamps.tolist(), self.prices.tolist()):
+            yield (datetime.fromtimestamp(ts / 1000), price)
+
+    def __repr__(self) -> str:
+        if not len(self):
+            return "PriceSeries(n=0)"
+        return (f"PriceSeries(n={len(self)}, start={int(self.timestamps[0])}, "
+                f"end={int(self.timestamps[-1])}, last={float(self.prices[-1])})")
+
+
+OHLCVLike = Union[OHLCV, List[Tuple]]
+PriceSeriesLike = Union[PriceSeries, List[Tuple]]
@@ -0,0 +1,52 @@
+"""
+Watchlist of coins quoted together.
+
+Every refresh resolves the whole list with fetch_quotes, i.e. one
+/simple/price request per QUOTE_CHUNK_SIZE coins instead of one per coin.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from .fetch_prices import SUPPORTED_COINS, fetch_quotes
+
+
+class Watchlist:
+    def __init__(self, coin_ids: Optional[Iterable[str]] = None, vs_currency: str = "usd"):
+        """
+        :param coin_ids: CoinGecko coin ids; defaults to SUPPORTED_COINS
+        :param vs_currency: Quote currency
+        """
+        self.coin_ids: List[str] = list(dict.fromkeys(SUPPORTED_COINS if coin_ids is None else coin_ids))
+        self.vs_currency = vs_currency
+
+    def add(self, coin_id: str):
+        if coin_id not in self.coin_ids:
+            self.coin_ids.append(coin_id)
+
+    def remove(self, coin_id: str):
+        if coin_id in self.coin_ids:
+            self.coin_ids.remove(coin_id)
+
+    def refresh(self) -> List[Dict[str, Any]]:
+        """
+        Quote every coin on the list.
+        :return: One row per coin in list order: coin_id, price, change_24h (%), volume_24h and
+                 last_updated_at (epoch seconds); values are None for coins that could not be quoted
+        """
+        vs = self.vs_currency
+        quotes = fetch_quotes(self.coin_ids, (vs,))
+        rows = []
+        for coin_id in self.coin_ids:
+            quote = quotes.get(coin_id, {})
+            rows.append({
+                'coin_id': coin_id,
+                'price': quote.get(vs),
+                'change_24h': quote.get(f"{vs}_24h_change"),
+                'volume_24h': quote.get(f"{vs}_24h_vol"),
+                'last_updated_at': quote.get('last_updated_at'),
+            })
+        return rows
+
+    def top_movers(self, n: int = 5) -> List[Dict[str, Any]]:
+        """The n quoted coins with the largest absolute 24h change."""
+        rows = [row for row in self.refresh() if row['change_24h'] is not None]
+        return sorted(rows, key=lambda row: abs(row['change_24h']), reverse=True)[:n]
@@ -3,6 +3,13 @@ from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
+from dateutil import tz
+import numpy as np
+from data.series import PriceSeries
+
+# Axis labels in local time with each date's own UTC offset (DST aware), like the tooltips
+LOCAL_TZ = tz.tzlocal()
+
 
 class PriceGraphWidget(QWidget):
     def __init__(self, parent=None, dark_mode=True):
@@ -16,7 +23,8 @@ class PriceGraphWidget(QWidget):
         self.ax = self.figure.add_subplot(111)
         self.figure.tight_layout()
         self.set_theme(self.dark_mode)
-        self.data = []
+        self.data = PriceSeries.empty()
+        self._xdata = np.empty(0)
         self._hover_cid = self.canvas.mpl_connect('motion_notify_event', self._on_hover)
         self._last_annotation = None
 
@@ -48,23 +56,27 @@ class PriceGraphWidget(QWidget):
 
     def plot_prices(self, data, title="Bitcoin Price"):
         """
-        data: list of (datetime, price) tuples
+        data: PriceSeries (a list of (datetime, price) tuples is converted)
         """
-        self.data = data
+        self.data = PriceSeries.coerce(data) if data is not None else PriceSeries.empty()
+        dates = self.data.datetime64()  # UTC; the axis formatter converts to local time
+        # Plot positions in matplotlib date units, kept for hover lookups
+        self._xdata = mdates.date2num(dates)
         self.ax.clear()
         if self.dark_mode:
             self.ax.set_facecolor('#232323')
         else:
             self.ax.set_facecolor('#f5f5f5')
-        if data:
-            dates, prices = zip(*data)
-            self.ax.plot(dates, prices, color='#42a5f5', linewidth=2)
+        if self.data:
+            self.ax.plot(dates, self.data.prices, color='#42a5f5', linewidth=2)
             self.ax.set_title(title)
             self.ax.set_xlabel("Time")
             self.ax.set_ylabel("Price (USD)")
-            self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d %H:%M'))
-            self.ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+            self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d %H:%M', tz=LOCAL_TZ))
+            self.ax.xaxis.set_major_locator(mdates.AutoDateLocator(tz=LOCAL_TZ))
             self.figure.autofmt_xdate()
+        else:
+            self.ax.set_title(f"{title}: no data available (CoinGecko unreachable or rate limited)")
         self.ax.grid(True)
         self.canvas.draw()
 
@@ -72,17 +84,17 @@ class PriceGraphWidget(QWidget):
         if not self.data or not event.inaxes:
             QToolTip.hideText()
             return
-        # Find nearest data point
-        dates, prices = zip(*self.data)
-        if not dates:
-            return
-        xdata = mdates.date2num(dates)
         mouse_x = event.xdata
         if mouse_x is None:
             QToolTip.hideText()
             return
-        idx = min(range(len(xdata)), key=lambda i: abs(xdata[i] - mouse_x))
-        dt = dates[idx]
-        price = prices[idx]
+        # Find nearest data point (x positions are sorted)
+        xdata = self._xdata
+        idx = int(np.searchsorted(xdata, mouse_x))
+        if idx >= len(xdata):
+            idx = len(xdata) - 1
+        elif idx > 0 and mouse_x - xdata[idx - 1] < xdata[idx] - mouse_x:
+            idx -= 1
+        dt, price = self.data[idx]
         tooltip_text = f"{dt.strftime('%Y-%m-%d %H:%M')}: ${price:,.2f}"
         QToolTip.showText(self.mapToGlobal(self.canvas.pos()) + event.guiEvent.pos(), tooltip_text, self)
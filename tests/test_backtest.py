@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from analysis.backtest import BUY, SELL, HOLD, SIGNAL_NAMES, MIN_HISTORY, backtest_signals, simulate
+from analysis.ml_indicators import (analyze_bollinger_signals, analyze_macd_signals, analyze_stochastic_signals,
+                                    analyze_volume_signals, bollinger_bands, calculate_overall_signal, macd,
+                                    stochastic_oscillator, volume_indicators)
+from data.series import OHLCV
+
+CODES = {name: code for code, name in SIGNAL_NAMES.items()}
+
+
+def _random_ohlcv(n=160, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.03, n))
+    high = close * (1 + rng.uniform(0, 0.02, n))
+    low = close * (1 - rng.uniform(0, 0.02, n))
+    volume = rng.uniform(1e3, 5e3, n)
+    timestamps = 1_700_000_000_000 + np.arange(n) * 3_600_000
+    return OHLCV.from_arrays(timestamps, close, high, low, close, volume)
+
+
+def _replay(ohlcv, ml_predictions):
+    """calculate_overall_signal on every prefix, the way generate_ml_trading_signals builds its signals."""
+    recommendation, confidence = [], []
+    for i in range(len(ohlcv)):
+        prefix = ohlcv[:i + 1]
+        if len(prefix) < MIN_HISTORY:
+            recommendation.append(HOLD)
+            confidence.append(0.0)
+            continue
+        closes = prefix.close
+        prediction = ml_predictions[i]
+        signals = {
+            'bollinger_bands': analyze_bollinger_signals(closes, *bollinger_bands(closes)),
+            'macd': analyze_macd_signals(*macd(closes)),
+            'stochastic': analyze_stochastic_signals(*stochastic_oscillator(prefix)),
+            'volume': analyze_volume_signals(volume_indicators(prefix), closes),
+            'ml_prediction': {} if np.isnan(prediction) else {'ensemble': prediction},
+        }
+        bar_confidence, bar_recommendation = calculate_overall_signal(signals, {})
+        recommendation.append(CODES[bar_recommendation])
+        confidence.append(bar_confidence)
+    return np.array(recommendation, dtype=np.int8), np.array(confidence)
+
+
+@pytest.mark.parametrize('seed', [1, 7, 42])
+def test_backtest_matches_per_bar_replay(seed):
+    ohlcv = _random_ohlcv(seed=seed)
+    rng = np.random.default_rng(seed + 100)
+    ml_predictions = rng.normal(0, 0.04, len(ohlcv))
+    ml_predictions[rng.random(len(ohlcv)) < 0.2] = np.nan
+
+    recommendation, confidence = _replay(ohlcv, ml_predictions)
+    result = backtest_signals(ohlcv, ml_predictions)
+
+    assert (recommendation != HOLD).any()
+    np.testing.assert_array_equal(result['recommendation'], recommendation)
+    np.testing.assert_allclose(result['confidence'], confidence)
+
+    replayed = simulate(ohlcv.close, recommendation)
+    np.testing.assert_array_equal(result['positions'], replayed['positions'])
+    np.testing.assert_allclose(result['equity'], replayed['equity'])
+    assert result['metrics'] == replayed['metrics']
+
+
+@pytest.mark.parametrize('allow_short', [False, True])
+def test_simulate_matches_bar_by_bar_loop(allow_short):
+    closes = _random_ohlcv(n=80).close
+    rng = np.random.default_rng(3)
+    recommendation = rng.choice([BUY, HOLD, HOLD, SELL], size=len(closes)).astype(np.int8)
+    fee = 0.001
+
+    result = simulate(closes, recommendation, allow_short=allow_short, fee=fee)
+
+    position, equity = 0.0, 1.0
+    for i in range(len(closes)):
+        held = position
+        if recommendation[i] == BUY:
+            position = 1.0
+        elif recommendation[i] == SELL:
+            position = -1.0 if allow_short else 0.0
+        bar_return = closes[i] / closes[i - 1] - 1 if i else 0.0
+        equity *= 1 + held * bar_return - fee * abs(position - held)
+        assert result['positions'][i] == position
+        assert result['equity'][i] == pytest.approx(equity)
+    assert result['metrics']['total_return'] == pytest.approx(equity - 1)
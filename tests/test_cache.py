@@ -0,0 +1,70 @@
+import threading
+import time
+
+from data.cache import TTLCache
+
+TTL = 0.2
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_stale_value_is_served_while_refreshing_in_background():
+    cache = TTLCache(default_ttl=TTL, stale_factor=5)
+    cache.set('btc', 'old')
+    time.sleep(TTL * 1.5)
+    assert 'btc' not in cache  # past its TTL, inside the grace period
+
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(threading.current_thread())
+        release.wait(2)
+        return 'new'
+
+    start = time.monotonic()
+    assert cache.get_or_load('btc', loader) == 'old'
+    assert time.monotonic() - start < TTL  # did not wait for the loader
+    # A second stale read does not start another refresh
+    assert cache.get_or_load('btc', loader) == 'old'
+
+    release.set()
+    _wait_for(lambda: cache.stats()['refreshes'] == 1)
+    assert len(calls) == 1 and calls[0] is not threading.current_thread()
+    assert cache.get_or_load('btc', loader) == 'new'
+    stats = cache.stats()
+    assert stats['stale_hits'] == 2 and stats['hits'] == 1 and stats['misses'] == 0
+
+
+def test_failed_refresh_keeps_stale_value():
+    cache = TTLCache(default_ttl=TTL, stale_factor=5)
+    cache.set('btc', 'old')
+    time.sleep(TTL * 1.5)
+
+    def loader():
+        raise ConnectionError('offline')
+
+    assert cache.get_or_load('btc', loader) == 'old'
+    _wait_for(lambda: cache.stats()['refresh_errors'] == 1)
+    assert cache.get('btc', allow_stale=True) == 'old'
+
+
+def test_expired_grace_period_reloads_synchronously():
+    cache = TTLCache(default_ttl=TTL, stale_factor=0.5)
+    cache.set('btc', 'old')
+    time.sleep(TTL * 2)
+
+    assert cache.get_or_load('btc', lambda: 'new') == 'new'
+    stats = cache.stats()
+    assert stats['expirations'] == 1 and stats['misses'] == 1 and stats['stale_hits'] == 0
+
+
+def test_none_results_are_not_cached():
+    cache = TTLCache()
+    assert cache.get_or_load('btc', lambda: None) is None
+    assert cache.get_or_load('btc', lambda: 'loaded') == 'loaded'
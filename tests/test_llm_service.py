@@ -0,0 +1,165 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("ollama")
+
+from ui.llm_service import PRIORITY_BACKGROUND, PRIORITY_VISIBLE, LLMQueueFull, LLMService
+
+
+class FakeClient:
+    """Stands in for ollama.AsyncClient: each generation takes `delay` seconds and echoes the prompt."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.started = []
+        self.cancelled = []
+
+    async def generate(self, model, prompt, stream=False, **options):
+        self.started.append(prompt)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(prompt)
+            raise
+        return {'response': prompt}
+
+
+@pytest.fixture
+def make_service():
+    services = []
+
+    def make(max_queued=8, delay=0.05):
+        service = LLMService(max_concurrency=1, max_queued=max_queued)
+        service._client = FakeClient(delay)
+        services.append(service)
+        return service
+
+    yield make
+    for service in services:
+        service.shutdown()
+
+
+def _run(service, scenario):
+    return service.run(scenario()).result(timeout=5)
+
+
+async def _start(service, prompt, **options):
+    """Submit a generation and let it reach the slot queue."""
+    task = asyncio.ensure_future(service.generate(prompt, 'model', **options))
+    await asyncio.sleep(0.005)
+    return task
+
+
+def test_waiters_are_served_by_priority_then_arrival(make_service):
+    service = make_service()
+
+    async def scenario():
+        tasks = [await _start(service, 'first'),
+                 await _start(service, 'background-1', priority=PRIORITY_BACKGROUND),
+                 await _start(service, 'visible', priority=PRIORITY_VISIBLE),
+                 await _start(service, 'background-2', priority=PRIORITY_BACKGROUND)]
+        return await asyncio.gather(*tasks)
+
+    assert _run(service, scenario) == ['first', 'background-1', 'visible', 'background-2']
+    assert service._client.started == ['first', 'visible', 'background-1', 'background-2']
+
+
+def test_least_urgent_waiter_is_dropped_when_the_queue_is_full(make_service):
+    service = make_service(max_queued=2)
+
+    async def scenario():
+        tasks = [await _start(service, 'first'),
+                 await _start(service, 'background-1'),
+                 await _start(service, 'background-2'),
+                 await _start(service, 'visible', priority=PRIORITY_VISIBLE),  # drops background-2
+                 await _start(service, 'background-3')]  # least urgent itself
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    first, background_1, background_2, visible, background_3 = _run(service, scenario)
+    assert (first, background_1, visible) == ('first', 'background-1', 'visible')
+    assert isinstance(background_2, LLMQueueFull) and isinstance(background_3, LLMQueueFull)
+    assert service._client.started == ['first', 'visible', 'background-1']
+    stats = service.stats()
+    assert stats['dropped'] == 2 and stats['completed'] == 3 and stats['queued'] == 0
+
+
+def test_cancelled_waiters_are_neither_counted_nor_dropped(make_service):
+    service = make_service(max_queued=2)
+
+    async def scenario():
+        first = await _start(service, 'first')
+        background = [await _start(service, f'background-{i}') for i in range(2)]
+        for task in background:
+            task.cancel()
+        # Queued in the same loop step, before the cancelled tasks leave the heap
+        visible = await service.generate('visible', 'model', priority=PRIORITY_VISIBLE)
+        return visible, await first, await asyncio.gather(*background, return_exceptions=True)
+
+    visible, first, background = _run(service, scenario)
+    assert (visible, first) == ('visible', 'first')
+    assert all(isinstance(result, asyncio.CancelledError) for result in background)
+    assert service._client.started == ['first', 'visible']
+    stats = service.stats()
+    assert stats['cancelled'] == 2 and stats['dropped'] == 0
+
+
+def test_cancelling_a_waiting_request_skips_it(make_service):
+    service = make_service()
+
+    async def scenario():
+        first = await _start(service, 'first')
+        waiting = await _start(service, 'cancelled')
+        last = await _start(service, 'last')
+        waiting.cancel()
+        return await asyncio.gather(first, waiting, last, return_exceptions=True)
+
+    first, waiting, last = _run(service, scenario)
+    assert (first, last) == ('first', 'last')
+    assert isinstance(waiting, asyncio.CancelledError)
+    assert service._client.started == ['first', 'last']
+    assert service.stats()['cancelled'] == 1
+
+
+def test_cancelling_a_running_request_cancels_the_client_call(make_service):
+    service = make_service(delay=0.2)
+
+    async def scenario():
+        running = await _start(service, 'running')
+        waiting = await _start(service, 'waiting')
+        running.cancel()
+        return await asyncio.gather(running, waiting, return_exceptions=True)
+
+    running, waiting = _run(service, scenario)
+    assert isinstance(running, asyncio.CancelledError)
+    assert waiting == 'waiting'  # the slot was passed on
+    assert service._client.cancelled == ['running']
+    assert service.stats()['in_flight'] == 0
+
+
+def test_cancelling_the_submitted_future_cancels_the_generation(make_service):
+    service = make_service(delay=0.2)
+    future = service.submit('running', 'model')
+    while service.stats()['in_flight'] == 0:
+        time.sleep(0.005)
+    future.cancel()
+    assert _run(service, lambda: service.generate('next', 'model')) == 'next'
+    assert service._client.cancelled == ['running']
+
+
+def test_reprioritize_moves_a_waiting_request(make_service):
+    service = make_service()
+
+    async def scenario():
+        tasks = [await _start(service, 'first'),
+                 await _start(service, 'tab-1', key='tab-1'),
+                 await _start(service, 'tab-2', key='tab-2')]
+        service.reprioritize('tab-2', PRIORITY_VISIBLE)
+        # Reprioritizing a request that is not waiting is a no-op
+        service.reprioritize('first', PRIORITY_VISIBLE)
+        service.reprioritize('unknown', PRIORITY_VISIBLE)
+        return await asyncio.gather(*tasks)
+
+    assert _run(service, scenario) == ['first', 'tab-1', 'tab-2']
+    assert service._client.started == ['first', 'tab-2', 'tab-1']
@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from data.rate_limiter import (PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_PREFETCH, RateLimiter,
+                               request_priority)
+
+RATE_PER_MINUTE = 1200  # one token every 50ms
+PAUSE = 0.2
+# (priority, name) in arrival order, and the order they should be served in
+ARRIVALS = [(PRIORITY_PREFETCH, 'prefetch-1'), (PRIORITY_NORMAL, 'normal-1'), (PRIORITY_INTERACTIVE, 'chart'),
+            (PRIORITY_PREFETCH, 'prefetch-2'), (PRIORITY_NORMAL, 'normal-2')]
+SERVED = ['chart', 'normal-1', 'normal-2', 'prefetch-1', 'prefetch-2']
+
+
+def _wait_for_queue_depth(limiter, depth):
+    deadline = time.monotonic() + 2
+    while limiter.stats()['queue_depth'] < depth:
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.005)
+
+
+def test_waiters_are_served_by_priority_then_arrival():
+    limiter = RateLimiter(RATE_PER_MINUTE, burst=1)
+    limiter.penalize(PAUSE)  # hold the bucket until every request is queued
+    served = []
+
+    def request(priority, name):
+        limiter.acquire(priority)
+        served.append(name)
+
+    threads = []
+    for i, (priority, name) in enumerate(ARRIVALS):
+        threads.append(threading.Thread(target=request, args=(priority, name)))
+        threads[-1].start()
+        _wait_for_queue_depth(limiter, i + 1)
+    for thread in threads:
+        thread.join(5)
+
+    assert served == SERVED
+    assert limiter.stats()['max_queue_depth'] == len(ARRIVALS)
+
+
+def test_async_waiters_are_served_by_priority_and_cancel_withdraws():
+    limiter = RateLimiter(RATE_PER_MINUTE, burst=1)
+    limiter.penalize(PAUSE)
+    served = []
+
+    async def request(priority, name):
+        await limiter.acquire_async(priority)
+        served.append(name)
+
+    async def main():
+        tasks = {}
+        for i, (priority, name) in enumerate(ARRIVALS):
+            tasks[name] = asyncio.ensure_future(request(priority, name))
+            while limiter.stats()['queue_depth'] < i + 1:
+                await asyncio.sleep(0.005)
+        tasks['normal-1'].cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    asyncio.run(main())
+    assert served == [name for name in SERVED if name != 'normal-1']
+    assert limiter.stats()['queue_depth'] == 0
+
+
+def test_priority_comes_from_request_priority_context():
+    limiter = RateLimiter(RATE_PER_MINUTE, burst=1)
+    limiter.penalize(PAUSE)
+    served = []
+
+    def request(priority, name):
+        with request_priority(priority):
+            limiter.acquire()
+        served.append(name)
+
+    threads = []
+    for i, (priority, name) in enumerate(ARRIVALS[:3]):
+        threads.append(threading.Thread(target=request, args=(priority, name)))
+        threads[-1].start()
+        _wait_for_queue_depth(limiter, i + 1)
+    for thread in threads:
+        thread.join(5)
+
+    assert served == ['chart', 'normal-1', 'prefetch-1']
+
+
+def test_penalize_pauses_the_bucket():
+    limiter = RateLimiter(RATE_PER_MINUTE, burst=5)
+    limiter.penalize(PAUSE)
+
+    stats = limiter.stats()
+    assert stats['throttled'] == 1 and stats['tokens'] < 1 and 0 < stats['paused_seconds'] <= PAUSE
+
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= PAUSE - 0.01
+    assert limiter.stats()['paused_seconds'] == 0
+
+
+def test_penalize_never_shortens_a_pause():
+    limiter = RateLimiter(RATE_PER_MINUTE, burst=5)
+    limiter.penalize(PAUSE * 2)
+    limiter.penalize(PAUSE / 4)
+    assert limiter.stats()['paused_seconds'] > PAUSE
+
+
+def test_timeout_during_pause_withdraws_the_ticket():
+    limiter = RateLimiter(RATE_PER_MINUTE, burst=5)
+    limiter.penalize(10)
+
+    with pytest.raises(TimeoutError):
+        limiter.acquire(timeout=0.05)
+    stats = limiter.stats()
+    assert stats['timeouts'] == 1 and stats['queue_depth'] == 0
+
+
+def test_request_priority_max_wait_bounds_acquire():
+    limiter = RateLimiter(RATE_PER_MINUTE, burst=5)
+    limiter.penalize(10)
+
+    start = time.monotonic()
+    with request_priority(PRIORITY_INTERACTIVE, max_wait=0.05):
+        # An inner block cannot extend the outer block's limit
+        with request_priority(PRIORITY_INTERACTIVE, max_wait=5):
+            with pytest.raises(TimeoutError):
+                limiter.acquire()
+    assert time.monotonic() - start < 1
+    assert limiter.stats()['queue_depth'] == 0
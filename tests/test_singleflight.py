@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from data.singleflight import SingleFlight
+
+CALLERS = 5
+
+
+def _run_concurrently(flight, fn):
+    """Call flight.do('key', fn) from CALLERS threads once all of them are waiting on fn."""
+    outcomes = [None] * CALLERS
+
+    def call(i):
+        try:
+            outcomes[i] = ('result', flight.do('key', fn))
+        except Exception as e:
+            outcomes[i] = ('error', e)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def _wait_until_shared(flight, threads, release):
+    # Followers register before blocking, so shared counts every waiting caller
+    while flight.stats()['shared'] < CALLERS - 1:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+
+
+def test_concurrent_callers_share_one_result():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(2)
+        return object()
+
+    threads, outcomes = _run_concurrently(flight, fetch)
+    _wait_until_shared(flight, threads, release)
+
+    assert len(calls) == 1
+    assert all(kind == 'result' for kind, _ in outcomes)
+    assert len({id(value) for _, value in outcomes}) == 1
+    assert flight.stats() == {'executions': 1, 'shared': CALLERS - 1, 'in_flight': 0}
+
+
+def test_concurrent_callers_share_one_error():
+    flight = SingleFlight()
+    release = threading.Event()
+    error = ConnectionError('rate limited')
+
+    def fetch():
+        release.wait(2)
+        raise error
+
+    threads, outcomes = _run_concurrently(flight, fetch)
+    _wait_until_shared(flight, threads, release)
+
+    assert outcomes == [('error', error)] * CALLERS
+    assert flight.stats()['executions'] == 1
+
+
+def test_key_is_free_again_after_an_error():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        flight.do('key', fail)
+    assert flight.do('key', lambda: 'ok') == 'ok'
+    assert flight.stats()['executions'] == 2
@@ -0,0 +1,164 @@
+"""
+Persistent cache of Ollama responses.
+
+Responses live in SQLite under the cache root so advisor, consensus and Llama
+analysis text survives restarts. Keys hash the prompt kind, model name,
+prompt version and a fingerprint of the prompt inputs, so changing any of
+them is a miss rather than stale text. Callers pass only the fields a prompt
+actually uses; fingerprint() serialises them canonically (sorted keys, floats
+rounded to FINGERPRINT_DIGITS significant digits) so insignificant noise in
+the inputs still hits. Entries expire after a TTL matched to the freshness
+of the data they were generated from and are evicted least recently used
+first once the cache grows past its size budget.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from data.paths import cache_dir
+
+LLM_CACHE_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+DEFAULT_TTL_SECONDS = 3600.0
+
+# Significant digits floats are rounded to before fingerprinting
+FINGERPRINT_DIGITS = 6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_version INTEGER NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _canonical(value: Any, digits: int) -> Any:
+    """JSON-ready copy of value with floats rounded to `digits` significant digits."""
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        return float(f"{value:.{digits}g}") if np.isfinite(value) else str(value)
+    if isinstance(value, str) or value is None:
+        return value
+    if isinstance(value, dict):
+        return {str(k): _canonical(v, digits) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_canonical(v, digits) for v in value]
+    return str(value)
+
+
+def fingerprint(inputs: Any, digits: int = FINGERPRINT_DIGITS) -> str:
+    """SHA-256 of the canonical JSON form of inputs (dicts, sequences, numbers and strings)."""
+    payload = json.dumps(_canonical(inputs, digits), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path: Optional[str] = None, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        """
+        :param path: SQLite file; defaults to <cache root>/llm/responses.sqlite3
+        :param max_bytes: Total response size kept; least recently used entries are evicted beyond it
+        """
+        self.path = path or os.path.join(cache_dir("llm"), "responses.sqlite3")
+        self.max_bytes = max_bytes
+        # One connection shared by the LLM worker threads, serialised by the lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        self._counters = dict.fromkeys(('hits', 'misses', 'expirations', 'evictions', 'writes'), 0)
+
+    @staticmethod
+    def make_key(kind: str, model: str, prompt_version: int, inputs: Any) -> str:
+        """
+        Key for a prompt: its kind ('advisor', 'consensus', ...), model, prompt version
+        and the fingerprint of the inputs the prompt is built from.
+        """
+        return f"{kind}-{fingerprint([kind, model, prompt_version, inputs])}"
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response for key, or None if missing or expired."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT response, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._counters['misses'] += 1
+                return None
+            response, expires_at = row
+            if now >= expires_at:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._counters['misses'] += 1
+                self._counters['expirations'] += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._counters['hits'] += 1
+            return response
+
+    def set(self, key: str, response: str, kind: str, model: str, prompt_version: int,
+            ttl: float = DEFAULT_TTL_SECONDS):
+        """Store a response for ttl seconds, then evict LRU entries over the size budget (larger responses are not cached)."""
+        now = time.time()
+        size = len(response.encode())
+        with self._lock, self._conn:
+            if size > self.max_bytes:
+                # Would only be evicted again; drop any older response under the key instead
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, model, prompt_version, response, size, now + ttl, now),
+            )
+            self._counters['writes'] += 1
+            self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                for old_key, old_size in self._conn.execute(
+                        "SELECT key, size FROM responses ORDER BY last_used").fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                    total -= old_size
+                    self._counters['evictions'] += 1
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters, hit rate and current entry count and size."""
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            stats = dict(self._counters)
+        lookups = stats['hits'] + stats['misses']
+        stats.update({'hit_rate': stats['hits'] / lookups if lookups else 0.0, 'entries': entries,
+                      'bytes': size, 'max_bytes': self.max_bytes, 'path': self.path})
+        return stats
+
+
+def get_llm_cache() -> LLMCache:
+    """Shared LLM response cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache()
+    return _cache
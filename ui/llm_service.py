@@ -0,0 +1,222 @@
+"""
+Shared Ollama service.
+
+One asyncio event loop runs on a dedicated daemon thread for the lifetime of
+the app, with one ollama.AsyncClient (and its connection pool) reused by every
+generation. At most LLM_MAX_CONCURRENCY generations are in flight, which should
+match how many requests the Ollama host serves in parallel (OLLAMA_NUM_PARALLEL).
+Requests beyond that wait in a bounded priority queue (lower priority value
+first, e.g. the visible advisor tab, and reprioritize() moves a waiting request
+when that changes); when more than LLM_MAX_QUEUED are
+waiting, the least urgent one is dropped with LLMQueueFull rather than piling
+up work on the server. Cancelling a request's future cancels it on the client,
+closing its connection so Ollama stops generating.
+
+Work is submitted from any thread with run() or submit() and comes back as a
+concurrent.futures.Future; Qt code hands the result to the GUI thread by
+emitting a signal from the future's done callback. Generations can also be
+streamed: the text so far is passed to an on_partial callback at most every
+LLM_STREAM_UPDATE_SECONDS, so the UI shows the first words right away without
+re-rendering on every token.
+"""
+import asyncio
+import concurrent.futures
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Any, Callable, Coroutine, Dict, Hashable, Optional
+
+import ollama
+
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "1"))
+LLM_STREAM_UPDATE_SECONDS = float(os.environ.get("LLM_STREAM_UPDATE_SECONDS", "0.15"))
+LLM_MAX_QUEUED = int(os.environ.get("LLM_MAX_QUEUED", "8"))
+
+PRIORITY_VISIBLE = 0  # output the user is looking at
+PRIORITY_BACKGROUND = 1
+
+
+class LLMQueueFull(Exception):
+    """A waiting generation was dropped to keep the queue within LLM_MAX_QUEUED."""
+
+_service = None
+_service_lock = threading.Lock()
+
+
+class LLMService:
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, host: Optional[str] = None,
+                 max_queued: int = LLM_MAX_QUEUED):
+        """
+        :param max_concurrency: Generations in flight at once
+        :param host: Ollama server URL; defaults to the client's default (OLLAMA_HOST)
+        :param max_queued: Generations allowed to wait for a slot; the least urgent is dropped beyond it
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queued = max(0, max_queued)
+        self.host = host
+        self._client: Optional[ollama.AsyncClient] = None
+        self._counters = dict.fromkeys(('submitted', 'completed', 'failed', 'cancelled', 'dropped'), 0)
+        self._counters_lock = threading.Lock()
+        # Slot bookkeeping below is only touched on the loop's thread
+        self._in_flight = 0
+        self._waiters = []  # heap of [priority, sequence, asyncio.Future]
+        self._queued = {}  # generate() key -> its waiter entry, for reprioritize()
+        self._sequence = itertools.count()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="llm-service", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def _count(self, name: str):
+        with self._counters_lock:
+            self._counters[name] += 1
+
+    def run(self, coroutine: Coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine on the service loop (thread-safe)."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    async def _acquire(self, priority: int, key: Optional[Hashable] = None):
+        """Wait for a generation slot; waiters are served by priority, then in arrival order."""
+        if self._in_flight < self.max_concurrency and not self._waiters:
+            self._in_flight += 1
+            return
+        waiter = self._loop.create_future()
+        entry = [priority, next(self._sequence), waiter]
+        heapq.heappush(self._waiters, entry)
+        if key is not None:
+            self._queued[key] = entry
+        # Waiters cancelled on this loop step are still in the heap until their
+        # task runs; they neither count towards the limit nor can be dropped
+        self._waiters = [w for w in self._waiters if not w[2].done()]
+        heapq.heapify(self._waiters)
+        if len(self._waiters) > self.max_queued:
+            dropped = max(self._waiters)  # least urgent, newest among equals
+            self._waiters.remove(dropped)
+            heapq.heapify(self._waiters)
+            dropped[2].set_exception(LLMQueueFull(f"LLM queue full ({self.max_queued} waiting)"))
+        try:
+            await waiter  # _release hands its slot over by resolving the waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # granted just as we were cancelled; pass the slot on
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+        finally:
+            if key is not None and self._queued.get(key) is entry:
+                del self._queued[key]
+
+    def reprioritize(self, key: Hashable, priority: int):
+        """
+        Move a request still waiting for a slot to a new priority (thread-safe).
+        Requests already generating, or not yet queued, are unaffected.
+        :param key: The key the request was submitted with
+        """
+        self._loop.call_soon_threadsafe(self._reprioritize, key, priority)
+
+    def _reprioritize(self, key: Hashable, priority: int):
+        entry = self._queued.get(key)
+        if entry is not None and entry[0] != priority:
+            entry[0] = priority
+            heapq.heapify(self._waiters)
+
+    def _release(self):
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    async def generate(self, prompt: str, model: str, on_partial: Optional[Callable[[str], None]] = None,
+                       priority: int = PRIORITY_BACKGROUND, key: Optional[Hashable] = None, **options: Any) -> str:
+        """
+        Generate a completion; must be awaited on the service loop (i.e. inside run()).
+        :param on_partial: If given, the response is streamed and on_partial receives the text so far,
+                           throttled to one call per LLM_STREAM_UPDATE_SECONDS (called on the service thread)
+        :param priority: Queue priority while waiting for a slot (lower first)
+        :param key: Handle to reprioritize() the request by while it waits
+        :raises LLMQueueFull: If dropped from a full queue
+        :raises Exception: Whatever the Ollama client raises
+        :return: Response text, stripped
+        """
+        self._count('submitted')
+        try:
+            await self._acquire(priority, key)
+            try:
+                if self._client is None:
+                    self._client = ollama.AsyncClient(host=self.host)
+                if on_partial is None:
+                    response = await self._client.generate(model=model, prompt=prompt, **options)
+                    text = response['response']
+                else:
+                    text = await self._stream(prompt, model, on_partial, options)
+            finally:
+                self._release()
+        except asyncio.CancelledError:
+            self._count('cancelled')
+            raise
+        except LLMQueueFull:
+            self._count('dropped')
+            raise
+        except Exception:
+            self._count('failed')
+            raise
+        self._count('completed')
+        return text.strip()
+
+    async def _stream(self, prompt: str, model: str, on_partial: Callable[[str], None], options: Dict[str, Any]) -> str:
+        parts = []
+        last_update = 0.0
+        async for chunk in await self._client.generate(model=model, prompt=prompt, stream=True, **options):
+            parts.append(chunk['response'])
+            now = time.monotonic()
+            if now - last_update >= LLM_STREAM_UPDATE_SECONDS:
+                last_update = now
+                on_partial("".join(parts).strip())
+        return "".join(parts)
+
+    def submit(self, prompt: str, model: str, **options: Any) -> concurrent.futures.Future:
+        """generate() from any thread; the future resolves to the response text."""
+        return self.run(self.generate(prompt, model, **options))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._counters_lock:
+            stats = dict(self._counters)
+        stats.update({'in_flight': self._in_flight, 'queued': sum(not w.done() for _, _, w in list(self._waiters)),
+                      'max_concurrency': self.max_concurrency, 'max_queued': self.max_queued})
+        return stats
+
+    def shutdown(self):
+        """Cancel outstanding work and stop the loop without waiting for generations to finish."""
+        def stop():
+            for task in asyncio.all_tasks(self._loop):
+                task.cancel()
+            self._loop.stop()
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(stop)
+
+
+def get_llm_service() -> LLMService:
+    """Shared LLM service, started on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = LLMService()
+    return _service
+
+
+def shutdown_llm_service():
+    """Stop the shared service if it was started."""
+    global _service
+    with _service_lock:
+        if _service is not None:
+            _service.shutdown()
+            _service = None
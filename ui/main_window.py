@@ -1,48 +1,136 @@
 from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QLabel, QMenuBar, QAction, QApplication, QComboBox, QHBoxLayout, QTabWidget, QTabWidget, QWidget, QVBoxLayout, QFrame, QSizePolicy, QSpacerItem, QScrollArea, QTextBrowser, QToolBox, QSizePolicy, QPushButton
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QObject, QTimer, pyqtSignal
 from .theme import set_dark_theme, set_light_theme
+from .llm_cache import get_llm_cache
+from .llm_service import PRIORITY_BACKGROUND, PRIORITY_VISIBLE, LLMQueueFull, get_llm_service, shutdown_llm_service
 from plots.price_graph import PriceGraphWidget
-from data.fetch_prices import get_prices_for_timeframe, get_ohlcv_for_timeframe
+from data.fetch_prices import TIMEFRAME_TTL_SECONDS, get_prices_for_timeframe, get_ohlcv_for_timeframe
+from data.async_client import fetch_bundle_sync
+from data.rate_limiter import PRIORITY_INTERACTIVE, request_priority
+from data.series import OHLCV
+from data.watchlist import Watchlist
 from analysis.insights import get_trading_insights
 from analysis.enhanced_insights import get_enhanced_trading_insights
 from sklearn.linear_model import LinearRegression
 import numpy as np
 from collections import Counter
-import ollama
-import asyncio
-import hashlib
+from concurrent.futures import ThreadPoolExecutor
 import json
 
-# Global LLM response cache
-llm_cache = {}
+# Coin selector entries and their CoinGecko ids (also the watchlist quoted in the selector)
+COINS = {
+    "Bitcoin (BTC)": "bitcoin",
+    "Ethereum (ETH)": "ethereum",
+    "Dogecoin (DOGE)": "dogecoin",
+    "Solana (SOL)": "solana",
+    "XRP (XRP)": "ripple",
+}
 
-class LLMWorker(QThread):
-    result_ready = pyqtSignal(int, str)
-    def __init__(self, idx, persona, all_method_insights, coin_name, llm_outputs, parent=None):
+# Seconds between watchlist quote refreshes (all coins in one /simple/price request)
+QUOTE_REFRESH_SECONDS = 60
+
+# OHLCV timeframes tried for insights, longest first (7d also feeds the ML analysis)
+INSIGHTS_TIMEFRAMES = ["30d", "7d", "24h"]
+# Prefetched on every coin load; 24h is only a last resort and is fetched on demand
+PREFETCH_OHLCV_TIMEFRAMES = ["30d", "7d"]
+
+# Longest the chart waits for the CoinGecko rate limiter on the GUI thread (e.g. during a
+# 429 pause) before it shows whatever is stored or cached instead
+CHART_MAX_WAIT_SECONDS = 2.0
+
+OLLAMA_MODEL = 'llama3.2:latest'
+
+# Bump when the corresponding prompt template changes so cached responses are not reused
+ADVISOR_PROMPT_VERSION = 1
+CONSENSUS_PROMPT_VERSION = 2
+LLAMA_ANALYSIS_PROMPT_VERSION = 1
+
+# LLM responses stay cached as long as the price data they were generated from
+LLM_CACHE_TTL_SECONDS = TIMEFRAME_TTL_SECONDS[INSIGHTS_TIMEFRAMES[0]]
+
+def _advisor_prompt_fields(all_method_insights):
+    """The per-method values the advisor prompt shows (candles only by count)."""
+    return [
+        {
+            'method': method_data['method'],
+            'high': method_data.get('high', 'N/A'),
+            'low': method_data.get('low', 'N/A'),
+            'rsi_value': method_data.get('rsi_value', 'N/A'),
+            'ma_value': method_data.get('ma_value', 'N/A'),
+            'ml_prediction': method_data.get('ml_prediction'),
+            'ohlcv_points': len(method_data.get('ohlcv_array', [])),
+        }
+        for method_data in all_method_insights
+    ]
+
+class _LLMServiceWorker(QObject):
+    """
+    Runs call_ollama() on the shared LLM service. Subclasses implement
+    `async call_ollama()`, returning the response text, `handle_result(text)`,
+    which emits it, and `handle_error(message)`, called instead when the request
+    fails or is dropped from a full queue. All run on the service thread, so signals are always delivered
+    queued to receivers on the GUI thread, after the code that started the worker
+    has returned (even for cache hits that finish at once). Signals carry the
+    worker's epoch so receivers can drop results of superseded requests.
+    """
+    finished = pyqtSignal()
+    def __init__(self, epoch=0, priority=PRIORITY_BACKGROUND, parent=None):
         super().__init__(parent)
+        self.epoch = epoch
+        self.priority = priority
+        self._future = None
+    def start(self):
+        self._future = get_llm_service().run(self._run())
+        self._future.add_done_callback(lambda future: self.finished.emit())
+    async def _run(self):
+        try:
+            result = await self.call_ollama()
+        except LLMQueueFull:
+            self.handle_error("the LLM is busy with other requests")
+        except Exception as e:
+            self.handle_error(f"LLM error: {e}")
+        else:
+            self.handle_result(result)
+    def isRunning(self):
+        return self._future is not None and not self._future.done()
+    def cancel(self):
+        if self._future is not None:
+            self._future.cancel()
+    def set_priority(self, priority):
+        """Change the priority, including at the LLM service if the request is waiting for a slot."""
+        self.priority = priority
+        get_llm_service().reprioritize(self, priority)
+
+class LLMWorker(_LLMServiceWorker):
+    result_ready = pyqtSignal(int, int, str)  # epoch, advisor index, text
+    partial_ready = pyqtSignal(int, int, str)  # streamed text so far
+    failed = pyqtSignal(int, int, str)  # epoch, advisor index, reason
+    def __init__(self, idx, persona, all_method_insights, coin_name, llm_outputs, epoch=0,
+                 priority=PRIORITY_BACKGROUND, parent=None):
+        super().__init__(epoch, priority, parent)
         self.idx = idx
         self.persona = persona
         self.all_method_insights = all_method_insights
         self.coin_name = coin_name
         self.llm_outputs = llm_outputs
-    def run(self):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(self.call_ollama())
+    def handle_result(self, result):
         self.llm_outputs[self.idx] = result
-        self.result_ready.emit(self.idx, result)
-        # If all outputs are ready, trigger consensus LLM
-        if all(self.llm_outputs):
-            self.parent().start_consensus_llm(self.llm_outputs)
+        # update_llm_tab starts the consensus once all outputs are ready
+        self.result_ready.emit(self.epoch, self.idx, result)
+    def handle_error(self, message):
+        # Not an advisor opinion: leave llm_outputs[idx] unset so the consensus leaves it out
+        self.failed.emit(self.epoch, self.idx, message)
     async def call_ollama(self):
-        # Create cache key based on persona, coin, and all method insights hash
-        cache_key = hashlib.md5(
-            f"{self.persona}|{self.coin_name}|{str(self.all_method_insights)}".encode()
-        ).hexdigest()
+        # Cache key based on persona, coin, and the method values the prompt uses
+        method_fields = _advisor_prompt_fields(self.all_method_insights)
+        llm_cache = get_llm_cache()
+        cache_key = llm_cache.make_key("advisor", OLLAMA_MODEL, ADVISOR_PROMPT_VERSION,
+                                       [self.persona, self.coin_name, method_fields])
         
         # Check cache first
-        if cache_key in llm_cache:
-            return llm_cache[cache_key]
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         # Inject advisor personality into the prompt
         if self.persona == "Conservative Carl":
@@ -70,13 +158,15 @@ class LLMWorker(QThread):
         insights_text = f"The cryptocurrency you are analyzing is {self.coin_name}.\n\n"
         insights_text += "You have access to raw indicator values from multiple methods. Here are the raw values from each method:\n\n"
         
-        for i, method_data in enumerate(self.all_method_insights):
-            insights_text += f"Method {i+1} - {method_data['method']}:\n"
-            insights_text += f"- High: {method_data.get('high', 'N/A')}\n"
-            insights_text += f"- Low: {method_data.get('low', 'N/A')}\n"
-            insights_text += f"- RSI: {method_data.get('rsi_value', 'N/A')}\n"
-            insights_text += f"- MA: {method_data.get('ma_value', 'N/A')}\n"
-            insights_text += f"- OHLCV array: {len(method_data.get('ohlcv_array', []))} data points\n\n"
+        for i, fields in enumerate(method_fields):
+            insights_text += f"Method {i+1} - {fields['method']}:\n"
+            insights_text += f"- High: {fields['high']}\n"
+            insights_text += f"- Low: {fields['low']}\n"
+            insights_text += f"- RSI: {fields['rsi_value']}\n"
+            insights_text += f"- MA: {fields['ma_value']}\n"
+            if fields['ml_prediction'] is not None:
+                insights_text += f"- ML predicted change over the next candle: {fields['ml_prediction'] * 100:+.2f}%\n"
+            insights_text += f"- OHLCV array: {fields['ohlcv_points']} data points\n\n"
         
         prompt = (
             f"{personality}\n\n"
@@ -85,54 +175,65 @@ class LLMWorker(QThread):
             f"Please analyze all these different methods' raw indicator values about {self.coin_name} and provide your consolidated recommendation in simple, friendly English for a non-expert investor. "
             "Make sure your suggestions reflect your personal advisory style and consider the consensus and differences between the methods."
         )
-        try:
-            response = await ollama.AsyncClient().generate(model='llama3.2:latest', prompt=prompt)
-            result = response['response'].strip()
-            # Cache the result
-            llm_cache[cache_key] = result
-            return result
-        except Exception as e:
-            return f"[LLM error: {e}]"
+        result = await get_llm_service().generate(
+            prompt, model=OLLAMA_MODEL, priority=self.priority, key=self,
+            on_partial=lambda text: self.partial_ready.emit(self.epoch, self.idx, text))
+        # Cache the full result
+        llm_cache.set(cache_key, result, "advisor", OLLAMA_MODEL, ADVISOR_PROMPT_VERSION,
+                      ttl=LLM_CACHE_TTL_SECONDS)
+        return result
 
-class ConsensusLLMWorker(QThread):
-    result_ready = pyqtSignal(str)
-    def __init__(self, advisor_outputs, coin_name, parent=None):
-        super().__init__(parent)
+class ConsensusLLMWorker(_LLMServiceWorker):
+    result_ready = pyqtSignal(int, str)  # epoch, text
+    partial_ready = pyqtSignal(int, str)  # streamed text so far
+    def __init__(self, advisor_outputs, coin_name, epoch=0, priority=PRIORITY_BACKGROUND, parent=None):
+        super().__init__(epoch, priority, parent)
         self.advisor_outputs = advisor_outputs
         self.coin_name = coin_name
-    def run(self):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(self.call_ollama())
-        self.result_ready.emit(result)
+    def handle_result(self, result):
+        self.result_ready.emit(self.epoch, result)
+    def handle_error(self, message):
+        self.result_ready.emit(self.epoch, f"<span style='color:inherit;'><i>Consensus explanation unavailable: {message}.</i></span>")
     async def call_ollama(self):
-        # Create cache key based on all advisor outputs and coin name
-        cache_key = hashlib.md5(
-            f"consensus|{self.coin_name}|{'|'.join(self.advisor_outputs)}".encode()
-        ).hexdigest()
+        # Cache key based on all advisor outputs and coin name
+        llm_cache = get_llm_cache()
+        cache_key = llm_cache.make_key("consensus", OLLAMA_MODEL, CONSENSUS_PROMPT_VERSION,
+                                       [self.coin_name, [output.strip() for output in self.advisor_outputs]])
         
         # Check cache first
-        if cache_key in llm_cache:
-            return llm_cache[cache_key]
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
+        # Only the advisors that answered are passed in
+        opinions = "".join(f"\n\nAdvisor {i + 1}: {output}" for i, output in enumerate(self.advisor_outputs))
         prompt = (
-            f"You are a panel of financial advisors analyzing {self.coin_name}. Here are the opinions of three advisors: "
-            f"\n\nAdvisor 1: {self.advisor_outputs[0]}\n\nAdvisor 2: {self.advisor_outputs[1]}\n\nAdvisor 3: {self.advisor_outputs[2]}\n\n"
+            f"You are a panel of financial advisors analyzing {self.coin_name}. Here are the advisors' opinions: "
+            f"{opinions}\n\n"
             f"Please summarize the consensus about {self.coin_name} in simple, friendly English for a non-expert investor, focusing on maximizing gains."
         )
-        try:
-            response = await ollama.AsyncClient().generate(model='llama3.2:latest', prompt=prompt)
-            result = response['response'].strip()
-            # Cache the result
-            llm_cache[cache_key] = result
-            return result
-        except Exception as e:
-            return f"[LLM error: {e}]"
+        result = await get_llm_service().generate(
+            prompt, model=OLLAMA_MODEL, priority=self.priority,
+            on_partial=lambda text: self.partial_ready.emit(self.epoch, text))
+        # Cache the full result
+        llm_cache.set(cache_key, result, "consensus", OLLAMA_MODEL, CONSENSUS_PROMPT_VERSION,
+                      ttl=LLM_CACHE_TTL_SECONDS)
+        return result
+
+def _format_quote(row):
+    """'$price (+x.xx% 24h)' for a watchlist row, or '' if the coin could not be quoted."""
+    price, change = row.get('price'), row.get('change_24h')
+    if price is None:
+        return ""
+    text = f"${price:,.2f}" if price >= 1 else f"${price:.4f}"
+    return f"{text} ({change:+.2f}% 24h)" if change is not None else text
 
 class MainWindow(QMainWindow):
+    quotes_ready = pyqtSignal(list)  # watchlist rows, from the quote refresh thread
     def __init__(self):
         super().__init__()
-        self.llm_threads = []  # Store references to all running LLM threads
+        self.llm_threads = []  # Store references to all running LLM workers
+        self.llm_epoch = 0  # Bumped per advisor run; results of older runs are discarded
         self.setWindowTitle("Trading Insights - Bitcoin")
         self.resize(1200, 900)  # Larger default window size
         self.central_widget = QWidget()
@@ -161,12 +262,17 @@ class MainWindow(QMainWindow):
         coin_label = QLabel("Crypto:", self)
         coin_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
         self.coin_combo = QComboBox(self)
-        self.coin_combo.addItems(["Bitcoin (BTC)", "Ethereum (ETH)", "Dogecoin (DOGE)", "Solana (SOL)", "XRP (XRP)"])
+        self.coin_combo.addItems(list(COINS))
         self.coin_combo.setCurrentText("Bitcoin (BTC)")
         self.coin_combo.currentTextChanged.connect(self.on_coin_changed)
         controls_layout.addWidget(coin_label)
         controls_layout.addWidget(self.coin_combo)
         
+        # Current quote of the selected coin; every coin's quote is in its selector tooltip
+        self.quote_label = QLabel("", self)
+        self.quote_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+        controls_layout.addWidget(self.quote_label)
+        
         # Add some space between the dropdowns
         controls_layout.addSpacing(20)
         
@@ -185,6 +291,17 @@ class MainWindow(QMainWindow):
         
         self.layout.addLayout(controls_layout)
         self.selected_coin = "bitcoin"  # Internal id for API
+        
+        # Quotes for every coin in the selector, refreshed off the GUI thread
+        self.watchlist = Watchlist(COINS.values())
+        self.latest_quotes = {}
+        self._quote_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quotes")
+        self._quote_future = None
+        self.quotes_ready.connect(self.update_quotes)
+        self.quote_timer = QTimer(self)
+        self.quote_timer.timeout.connect(self.refresh_quotes)
+        self.quote_timer.start(QUOTE_REFRESH_SECONDS * 1000)
+        self.refresh_quotes()
 
         # Price chart section (collapsible)
         self.chart_toggle_btn = QPushButton("Hide Price Chart")
@@ -262,6 +379,7 @@ class MainWindow(QMainWindow):
             self.suggestion_tabs.addTab(tab, label)
             self.llm_widgets.append(right_browser)
         self.suggestion_tabs.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.suggestion_tabs.currentChanged.connect(self.on_advisor_tab_changed)
         self.layout.addWidget(self.suggestion_tabs)
 
         # Divider below tabs
@@ -313,15 +431,16 @@ class MainWindow(QMainWindow):
 
     def load_chart_data(self, timeframe="7d"):
         """Load and display chart data for the selected timeframe (visual only)"""
-        data = get_prices_for_timeframe(timeframe, coin_id=self.selected_coin)
+        # Runs on the GUI thread: give up waiting for the rate limiter rather than freeze the window
+        with request_priority(PRIORITY_INTERACTIVE, max_wait=CHART_MAX_WAIT_SECONDS):
+            data = get_prices_for_timeframe(timeframe, coin_id=self.selected_coin)
         self.price_graph.plot_prices(data, title=f"{self.coin_combo.currentText()} Price ({timeframe})")
     
     def load_insights_data(self):
         """Load and calculate insights using the best available data"""
         # Try to get longer-term data for better insights, with multiple fallbacks
         insights_data = None
-        timeframes = ["30d", "7d", "24h"]
-        for timeframe in timeframes:
+        for timeframe in INSIGHTS_TIMEFRAMES:
             try:
                 insights_data = get_ohlcv_for_timeframe(timeframe, coin_id=self.selected_coin)
                 if insights_data and len(insights_data) >= 10:
@@ -330,13 +449,14 @@ class MainWindow(QMainWindow):
                 print(f"Failed to fetch {timeframe} data: {e}")
                 continue
         if not insights_data:
-            print("Warning: Using mock data for insights calculation")
-        prices = [candle[4] for candle in insights_data] if insights_data else []
+            print("Warning: No market data available for insights calculation")
+        prices = insights_data.close.tolist() if insights_data else []
         if len(prices) < 5:
             print("Insufficient data for analysis")
             return
         # Use get_trading_insights for technical, get_enhanced_trading_insights for ML
-        insights = get_trading_insights(prices, insights_data)
+        # MA/RSI advance incrementally from the last refresh of this coin and timeframe
+        insights = get_trading_insights(prices, insights_data, state_key=(self.selected_coin, timeframe))
         enhanced_ml_insights = get_enhanced_trading_insights(self.selected_coin, "7d")  # Use 7d for ML by default
         # self.display_insights(insights)  # REMOVE THIS LINE
         self.display_suggestions_and_consensus(insights, prices, enhanced_ml_insights)
@@ -357,6 +477,7 @@ class MainWindow(QMainWindow):
                     'low': enhanced_ml_insights.get('low'),
                     'rsi_value': enhanced_ml_insights.get('rsi_value'),
                     'ma_value': enhanced_ml_insights.get('ma_value'),
+                    'ml_prediction': enhanced_ml_insights.get('ml_prediction'),
                     'ohlcv_array': enhanced_ml_insights.get('ohlcv_array'),
                 })
             else:
@@ -382,29 +503,6 @@ class MainWindow(QMainWindow):
             self.llm_widgets[i].setMarkdown("<span style='color:inherit;'><i>Loading advisor explanation...</i></span>")
         # Consensus and LLM logic can be updated similarly if needed
         
-        # Display each method's insights in the respective advisor tab and start LLM workers
-        self._cleanup_threads()  # Clean up finished threads before starting new ones
-        self.llm_outputs = [None, None, None]  # Store LLM outputs for consensus
-        
-        for i, advisor_name in enumerate(advisor_names):
-            # Show the individual method that was originally assigned to this tab
-            method_data = all_method_insights[i]
-            left_text = (
-                f"<b>Method:</b> {method_data['method']}<br>"
-                f"<b>High:</b> {method_data['high']}<br>"
-                f"<b>Low:</b> {method_data['low']}<br>"
-                f"<b>RSI:</b> {method_data['rsi_value']}<br>"
-                f"<b>MA:</b> {method_data['ma_value']}<br>"
-                f"<b>OHLCV array:</b> {len(method_data['ohlcv_array'])} data points<br>"
-            )
-            self.llm_widgets[i].setMarkdown("<span style='color:inherit;'><i>Loading advisor explanation...</i></span>")
-            
-            # Pass ALL method insights to each advisor
-            worker = LLMWorker(i, advisor_name, all_method_insights, self.coin_combo.currentText(), self.llm_outputs, self)
-            worker.result_ready.connect(self.update_llm_tab)
-            worker.finished.connect(lambda: self._cleanup_threads())
-            self.llm_threads.append(worker)
-            worker.start()
         consensus = self._generate_consensus(all_method_insights)
         consensus_left = (
             f"<b>Consensus Insights</b><br>"
@@ -432,6 +530,43 @@ class MainWindow(QMainWindow):
         else:
             self.consensus_llm_label.setMarkdown("<span style='color:inherit;'><i>Loading consensus explanation...</i></span>")
         self.consensus_llm_waiting = True
+        
+        # Display each method's insights in the respective advisor tab and start LLM workers
+        self._cancel_llm_workers()  # Supersede the previous run (e.g. after a coin switch)
+        self.llm_outputs = [None, None, None]  # This run's LLM outputs, for its consensus
+        # Inputs of this run's advisors, kept to retry the ones that fail
+        self.advisor_run = {'names': advisor_names, 'insights': all_method_insights,
+                            'coin_name': self.coin_combo.currentText(), 'failed': set()}
+        
+        for i, advisor_name in enumerate(advisor_names):
+            # Show the individual method that was originally assigned to this tab
+            method_data = all_method_insights[i]
+            left_text = (
+                f"<b>Method:</b> {method_data['method']}<br>"
+                f"<b>High:</b> {method_data['high']}<br>"
+                f"<b>Low:</b> {method_data['low']}<br>"
+                f"<b>RSI:</b> {method_data['rsi_value']}<br>"
+                f"<b>MA:</b> {method_data['ma_value']}<br>"
+                f"<b>OHLCV array:</b> {len(method_data['ohlcv_array'])} data points<br>"
+            )
+            self.llm_widgets[i].setMarkdown("<span style='color:inherit;'><i>Loading advisor explanation...</i></span>")
+            
+            # Pass ALL method insights to each advisor
+            # The visible tab's advisor is generated first
+            priority = PRIORITY_VISIBLE if i == self.suggestion_tabs.currentIndex() else PRIORITY_BACKGROUND
+            self._start_advisor_worker(i, priority)
+
+    def _start_advisor_worker(self, idx, priority):
+        run = self.advisor_run
+        worker = LLMWorker(idx, run['names'][idx], run['insights'], run['coin_name'], self.llm_outputs,
+                           epoch=self.llm_epoch, priority=priority, parent=self)
+        worker.result_ready.connect(self.update_llm_tab)
+        worker.partial_ready.connect(self.update_llm_tab_partial)
+        worker.failed.connect(self.update_llm_tab_failed)
+        worker.finished.connect(self._cleanup_threads)
+        worker.finished.connect(worker.deleteLater)
+        self.llm_threads.append(worker)
+        worker.start()
 
     def _generate_method_insights(self, insights, prices, method):
         """Generate insights using four truly different analysis methods"""
@@ -584,21 +719,28 @@ Reasoning: [2-3 sentence explanation of your analysis]
 Be concise and focus on what the price patterns suggest."""
 
         try:
-            # Make synchronous call to Llama (using the async client in sync mode)
-            import asyncio
+            # Make synchronous call to Llama through the shared LLM service
+            llm_cache = get_llm_cache()
+            cache_key = llm_cache.make_key("llama_analysis", OLLAMA_MODEL, LLAMA_ANALYSIS_PROMPT_VERSION, {
+                'current_price': current_price, 'avg_price': avg_price, 'min_price': min_price,
+                'max_price': max_price, 'total_change': total_change, 'volatility': volatility,
+                'recent_changes': price_changes[-10:], 'data_points': len(recent_prices),
+            })
             
             async def get_llama_analysis():
                 try:
-                    response = await ollama.AsyncClient().generate(model='llama3.2:latest', prompt=prompt)
-                    return response['response'].strip()
+                    # The GUI thread blocks on this one, so it goes ahead of queued advisors
+                    result = await get_llm_service().generate(prompt, model=OLLAMA_MODEL, priority=PRIORITY_VISIBLE)
+                    llm_cache.set(cache_key, result, "llama_analysis", OLLAMA_MODEL, LLAMA_ANALYSIS_PROMPT_VERSION,
+                                  ttl=LLM_CACHE_TTL_SECONDS)
+                    return result
                 except Exception as e:
                     return f"AI analysis unavailable: {e}"
             
-            # Run the async function synchronously
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            llama_response = loop.run_until_complete(get_llama_analysis())
-            loop.close()
+            llama_response = llm_cache.get(cache_key)
+            if llama_response is None:
+                # Wait for the generation on the service loop
+                llama_response = get_llm_service().run(get_llama_analysis()).result()
             
             # Parse Llama's response to extract structured data
             return self._parse_llama_response(llama_response, current_price, total_change)
@@ -685,7 +827,7 @@ Be concise and focus on what the price patterns suggest."""
             'low': mean([s.get('low') for s in all_suggestions]),
             'rsi_value': mean([s.get('rsi_value') for s in all_suggestions]),
             'ma_value': mean([s.get('ma_value') for s in all_suggestions]),
-            'ohlcv_array': sum([s.get('ohlcv_array', []) for s in all_suggestions], []),
+            'ohlcv_array': OHLCV.concat([s.get('ohlcv_array') for s in all_suggestions]),
         }
         return consensus
 
@@ -716,25 +858,64 @@ Be concise and focus on what the price patterns suggest."""
 
     def on_coin_changed(self, coin_name):
         # Map display name to API id
-        coin_map = {
-            "Bitcoin (BTC)": "bitcoin", 
-            "Ethereum (ETH)": "ethereum",
-            "Dogecoin (DOGE)": "dogecoin",
-            "Solana (SOL)": "solana", 
-            "XRP (XRP)": "ripple"
-        }
-        self.selected_coin = coin_map.get(coin_name, "bitcoin")
+        self.selected_coin = COINS.get(coin_name, "bitcoin")
+        self.show_quote()
+        # Stop the previous coin's generations now rather than after the new data has loaded
+        self._cancel_llm_workers()
         self.load_price_data(self.timeframe_combo.currentText())
 
-    def update_llm_tab(self, idx, text):
+    def on_advisor_tab_changed(self, index):
+        # Generate the advisor now on screen next if it is still waiting for the LLM
+        for worker in self.llm_threads:
+            if isinstance(worker, LLMWorker):
+                worker.set_priority(PRIORITY_VISIBLE if worker.idx == index else PRIORITY_BACKGROUND)
+        # Opening a tab whose advisor failed retries it
+        run = getattr(self, 'advisor_run', None)
+        if run and index in run['failed']:
+            run['failed'].discard(index)
+            self.llm_widgets[index].setMarkdown("<span style='color:inherit;'><i>Loading advisor explanation...</i></span>")
+            self._start_advisor_worker(index, PRIORITY_VISIBLE)
+
+    def update_llm_tab_failed(self, epoch, idx, message):
+        if epoch != self.llm_epoch:
+            return
+        self.advisor_run['failed'].add(idx)
+        self.llm_widgets[idx].setMarkdown(
+            f"<span style='color:inherit;'><i>Advisor explanation unavailable: {message}. "
+            f"Switch to another tab and back to retry.</i></span>")
+        # The consensus goes ahead without this advisor
+        self._start_consensus_when_settled()
+
+    def update_llm_tab(self, epoch, idx, text):
+        if epoch != self.llm_epoch:
+            return  # late result of a superseded run
         self.llm_widgets[idx].setMarkdown(text)
         # If all advisor outputs are ready, trigger consensus LLM
-        if hasattr(self, 'llm_outputs') and all(self.llm_outputs) and getattr(self, 'consensus_llm_waiting', False):
-            self.start_consensus_llm(self.llm_outputs)
-            self.consensus_llm_waiting = False
+        self._start_consensus_when_settled()
 
-    def update_llm_consensus(self, text):
-        self.consensus_llm_label.setMarkdown(text)
+    def _start_consensus_when_settled(self):
+        """Start the consensus once every advisor has either answered or failed."""
+        if not getattr(self, 'consensus_llm_waiting', False):
+            return
+        failed = self.advisor_run['failed']
+        if not all(output is not None or i in failed for i, output in enumerate(self.llm_outputs)):
+            return
+        self.consensus_llm_waiting = False
+        outputs = [output for output in self.llm_outputs if output is not None]
+        if outputs:
+            self.start_consensus_llm(outputs)
+        else:
+            self.consensus_llm_label.setMarkdown(
+                "<span style='color:inherit;'><i>Consensus explanation unavailable: no advisor answered.</i></span>")
+
+    def update_llm_tab_partial(self, epoch, idx, text):
+        # Streamed text so far; update_llm_tab replaces it with the final response
+        if epoch == self.llm_epoch:
+            self.llm_widgets[idx].setMarkdown(text)
+
+    def update_llm_consensus(self, epoch, text):
+        if epoch == self.llm_epoch:
+            self.consensus_llm_label.setMarkdown(text)
 
     def toggle_consensus_insights(self):
         show = self.consensus_toggle_btn.isChecked()
@@ -759,20 +940,55 @@ Be concise and focus on what the price patterns suggest."""
         self.prediction_toggle_btn.setText("Hide Price Prediction" if show else "Show Price Prediction")
 
     def _cleanup_threads(self):
-        # Remove finished threads from the list
+        # Remove finished workers from the list (each deletes itself once finished)
         self.llm_threads = [t for t in self.llm_threads if t.isRunning()]
 
+    def _cancel_llm_workers(self):
+        """Start a new epoch and cancel every outstanding generation of the previous ones."""
+        self.llm_epoch += 1
+        for worker in self.llm_threads:
+            worker.cancel()
+        self.llm_threads = []
+
+    def refresh_quotes(self):
+        """Quote the whole watchlist on the quote thread (skipped while a refresh is still running)."""
+        if self._quote_future is not None and not self._quote_future.done():
+            return
+        self._quote_future = self._quote_pool.submit(self.watchlist.refresh)
+        self._quote_future.add_done_callback(self._emit_quotes)
+
+    def _emit_quotes(self, future):
+        # Runs on the quote thread; the signal hands the rows to the GUI thread
+        try:
+            self.quotes_ready.emit(future.result())
+        except Exception as e:
+            print(f"Watchlist refresh failed: {e}")
+
+    def update_quotes(self, rows):
+        self.latest_quotes = {row['coin_id']: row for row in rows}
+        for i, coin_id in enumerate(COINS.values()):
+            row = self.latest_quotes.get(coin_id)
+            self.coin_combo.setItemData(i, _format_quote(row) if row else "", Qt.ToolTipRole)
+        self.show_quote()
+
+    def show_quote(self):
+        row = self.latest_quotes.get(self.selected_coin)
+        self.quote_label.setText(_format_quote(row) if row else "")
+
     def closeEvent(self, event):
-        # Gracefully stop all running threads
-        for thread in self.llm_threads:
-            thread.quit()
-            thread.wait()
+        self.quote_timer.stop()
+        self._quote_pool.shutdown(wait=False)
+        # Cancel outstanding generations and stop the LLM service loop without waiting for them
+        self._cancel_llm_workers()
+        shutdown_llm_service()
         event.accept()
 
     def start_consensus_llm(self, advisor_outputs):
-        worker = ConsensusLLMWorker(advisor_outputs, self.coin_combo.currentText())
+        worker = ConsensusLLMWorker(advisor_outputs, self.coin_combo.currentText(), epoch=self.llm_epoch, parent=self)
         worker.result_ready.connect(self.update_llm_consensus)
-        worker.finished.connect(lambda: self._cleanup_threads())
+        worker.partial_ready.connect(self.update_llm_consensus)
+        worker.finished.connect(self._cleanup_threads)
+        worker.finished.connect(worker.deleteLater)
         self.llm_threads.append(worker)
         worker.start()
 
@@ -794,6 +1010,12 @@ Be concise and focus on what the price patterns suggest."""
 
     def load_price_data(self, timeframe="7d"):
         """Load both chart and insights data (used for initial load and coin changes)"""
+        # Fetch every series the chart and insights need concurrently; the loads below are then cache hits
+        try:
+            fetch_bundle_sync([self.selected_coin], price_timeframes=[timeframe],
+                              ohlcv_timeframes=PREFETCH_OHLCV_TIMEFRAMES, priority=PRIORITY_INTERACTIVE)
+        except Exception as e:
+            print(f"Concurrent prefetch failed, loading sequentially: {e}")
         self.load_chart_data(timeframe)
         self.load_insights_data()
 